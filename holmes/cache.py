@@ -1,11 +1,166 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import zlib
+import calendar
+from base64 import b64encode, b64decode
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from time import time
+
 from tornado.concurrent import return_future
 from ujson import loads, dumps
 from octopus.model import Response
 
-from holmes.models import Domain, Page, Limiter, Violation, Request
+from holmes import __version__
+from holmes.models import Domain, Page, Limiter, Violation, Request, Review
+
+
+VIOLATIONS_RANKING_KEY = 'violations-ranking'
+LAST_REVIEWS_KEY = 'last-reviews'
+LAST_REQUESTS_KEY = 'last-requests'
+COMPLETED_REVIEWS_KEY = 'completed-reviews'
+COMPLETED_REVIEWS_SINCE_KEY = 'completed-reviews-since'
+COMPLETED_REVIEWS_EXPIRATION = 2 * 60 * 60
+DIRTY_DOMAINS_KEY = 'dirty-domains'
+MATERIAL_READS_KEY = 'material-reads'
+MATERIAL_STATS_KEY = 'material-stats'
+MATERIAL_REFRESHES_KEY = 'material-refreshes'
+
+# KEYS: counter, pending increments, seed lock
+# ARGV: increment, seed lock expiration
+# returns the new value, 'seed' when the caller must load the counter
+# from the database or 'pending' when someone else is already loading it
+INCREMENT_COUNTER_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 1 then
+    return redis.call('incrby', KEYS[1], ARGV[1])
+end
+
+redis.call('incrby', KEYS[2], ARGV[1])
+redis.call('expire', KEYS[2], ARGV[2])
+
+if redis.call('set', KEYS[3], 1, 'EX', ARGV[2], 'NX') then
+    return 'seed'
+end
+
+return 'pending'
+"""
+
+# KEYS: counter, pending increments, seed lock
+# ARGV: value loaded from the database, increment made by the loader
+SEED_COUNTER_SCRIPT = """
+local pending = tonumber(redis.call('get', KEYS[2]) or '0')
+redis.call('del', KEYS[2], KEYS[3])
+
+if redis.call('exists', KEYS[1]) == 1 then
+    return redis.call('incrby', KEYS[1], pending)
+end
+
+local value = tonumber(ARGV[1]) + pending - tonumber(ARGV[2])
+redis.call('set', KEYS[1], value)
+return value
+"""
+
+# KEYS: feed
+# ARGV: feed limit, serialized items
+# seeds the feed only if no other api process or worker created it first
+SEED_FEED_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 1 then
+    return 0
+end
+
+for index = 2, #ARGV do
+    redis.call('rpush', KEYS[1], ARGV[index])
+end
+
+redis.call('ltrim', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+return 1
+"""
+
+# KEYS: completed reviews, completed reviews since
+# ARGV: from timestamp, to timestamp
+# returns nil while the reviews completed in the period were not all recorded,
+# otherwise their count and the timestamp of the first one
+COUNT_COMPLETED_REVIEWS_SCRIPT = """
+local since = redis.call('get', KEYS[2])
+
+if not since or tonumber(since) > tonumber(ARGV[1]) then
+    return nil
+end
+
+local count = redis.call('zcount', KEYS[1], ARGV[1], ARGV[2])
+local first = redis.call('zrangebyscore', KEYS[1], ARGV[1], ARGV[2], 'WITHSCORES', 'LIMIT', 0, 1)
+
+return {count, first[2] or false}
+"""
+
+
+def get_timestamp(date):
+    return calendar.timegm(date.utctimetuple()) + date.microsecond / 1000000.0
+
+
+def get_review_document_key(review_uuid):
+    # definitions may change between releases, so documents are versioned
+    return 'review-document-%s-%s' % (__version__, review_uuid)
+
+
+def get_fresh_key(key):
+    return '%s-fresh' % key
+
+
+def get_counter_keys(key):
+    return [key, '%s-pending' % key, '%s-seed-lock' % key]
+
+
+class LocalCache(object):
+    '''Bounded in-process LRU that sits in front of redis for hot keys.
+    A max_size of 0 disables it.'''
+
+    def __init__(self, max_size, expiration, invalidating_events=None):
+        self.max_size = max_size
+        self.expiration = expiration
+        self.invalidating_events = set(invalidating_events or [])
+        self.items = OrderedDict()
+
+    def get_time(self):
+        return time()
+
+    def get(self, key):
+        item = self.items.pop(key, None)
+
+        if item is None:
+            return None
+
+        expires_at, value = item
+
+        if expires_at <= self.get_time():
+            return None
+
+        self.items[key] = item
+        return value
+
+    def set(self, key, value):
+        if not self.max_size or value is None:
+            return
+
+        self.items.pop(key, None)
+        self.items[key] = (self.get_time() + self.expiration, value)
+
+        while len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+
+    def get_or_set(self, key, get_value_method):
+        value = self.get(key)
+
+        if value is None:
+            value = get_value_method()
+            self.set(key, value)
+
+        return value
+
+    def invalidate(self, event_type):
+        if event_type in self.invalidating_events:
+            self.items.clear()
 
 
 class Cache(object):
@@ -14,6 +169,8 @@ class Cache(object):
         self.redis = self.application.redis
         self.db = self.application.db
         self.config = self.application.config
+        self.local_cache = self.application.local_cache
+        self.pending_responses = {}
 
     def get_domain_name(self, domain_name):
         if isinstance(domain_name, Domain):
@@ -57,27 +214,46 @@ class Cache(object):
 
     def increment_count(self, key, domain_name, get_default_method, increment=1, callback=None):
         key = '%s-%s' % (self.get_domain_name(domain_name), key)
-        self.has_key(key, self.handle_has_key(key, domain_name, get_default_method, increment, callback))
 
-    def handle_has_key(self, key, domain_name, get_default_method, increment, callback):
-        def handle(has_key):
-            domain = domain_name
-            if domain and not isinstance(domain, Domain):
-                domain = Domain.get_domain_by_name(domain_name, self.db)
+        def get_default_value():
+            domain = self.get_domain(domain_name)
 
-            #if not domain:
-                #callback(None)
-                #return
+            if domain is None:
+                return Page.get_page_count(self.db) + increment - 1
 
-            if has_key:
-                self.redis.incrby(key, increment, callback=callback)
-            else:
-                if domain is None:
-                    value = Page.get_page_count(self.db) + increment - 1
-                else:
-                    value = get_default_method(domain) + increment - 1
+            return get_default_method(domain) + increment - 1
+
+        self.increment_counter(key, get_default_value, increment, callback)
+
+    def increment_counter(self, key, get_default_value, increment, callback):
+        self.redis.send_message(
+            ['EVAL', INCREMENT_COUNTER_SCRIPT, 3] + get_counter_keys(key) +
+            [increment, int(self.config.COUNTER_SEED_LOCK_EXPIRATION_IN_SECONDS)],
+            callback=self.handle_increment_counter(key, get_default_value, increment, callback)
+        )
+
+    def handle_increment_counter(self, key, get_default_value, increment, callback):
+        def handle(result):
+            if result == 'pending':
+                callback(None)
+                return
+
+            if result != 'seed':
+                callback(result)
+                return
+
+            keys = get_counter_keys(key)
+
+            try:
+                value = get_default_value()
+            except Exception:
+                self.redis.delete(keys[2], callback=lambda *args, **kw: None)
+                raise
 
-                self.redis.set(key, value, callback=callback)
+            self.redis.send_message(
+                ['EVAL', SEED_COUNTER_SCRIPT, 3] + keys + [value, increment],
+                callback=callback
+            )
 
         return handle
 
@@ -100,77 +276,116 @@ class Cache(object):
         )
 
     def increment_data(self, key, get_default_method, increment=1, callback=None):
-        self.has_key(key, self.data_handle_has_key(key, get_default_method, increment, callback))
+        self.increment_counter(key, lambda: get_default_method() + increment, increment, callback)
+
+    def get_domain_count_items(self, domain_name):
+        return {
+            'page-count': self.get_count_item(
+                'page-count',
+                domain_name,
+                int(self.config.PAGE_COUNT_EXPIRATION_IN_SECONDS),
+                lambda domain: domain.get_page_count(self.db)
+            ),
+            'violation-count': self.get_count_item(
+                'violation-count',
+                domain_name,
+                int(self.config.PAGE_COUNT_EXPIRATION_IN_SECONDS),
+                lambda domain: domain.get_violation_data(self.db)
+            ),
+            'active-review-count': self.get_count_item(
+                'active-review-count',
+                domain_name,
+                int(self.config.ACTIVE_REVIEW_COUNT_EXPIRATION_IN_SECONDS),
+                lambda domain: domain.get_active_review_count(self.db)
+            ),
+            'good-request-count': self.get_count_item(
+                'good-request-count',
+                domain_name,
+                int(self.config.GOOD_REQUEST_COUNT_EXPIRATION_IN_SECONDS),
+                lambda domain: domain.get_good_request_count(self.db)
+            ),
+            'bad-request-count': self.get_count_item(
+                'bad-request-count',
+                domain_name,
+                int(self.config.BAD_REQUEST_COUNT_EXPIRATION_IN_SECONDS),
+                lambda domain: domain.get_bad_request_count(self.db)
+            ),
+            'response-time-avg': self.get_avg_item(
+                'response-time-avg',
+                domain_name,
+                int(self.config.RESPONSE_TIME_AVG_EXPIRATION_IN_SECONDS),
+                lambda domain: domain.get_response_time_avg(self.db)
+            ),
+        }
 
-    def data_handle_has_key(self, key, get_default_method, increment, callback):
-        def handle(has_key):
-            if has_key:
-                self.redis.incrby(key, increment, callback=callback)
-            else:
-                value = get_default_method() + increment
-                self.redis.set(key, value, callback=callback)
+    @return_future
+    def get_domain_counts(self, domain_name, callback=None):
+        items = self.get_domain_count_items(domain_name).items()
+        names = [name for name, item in items]
+
+        self.get_cached_values(
+            [item for name, item in items],
+            callback=self.handle_get_domain_counts(names, callback),
+            get_values_method=lambda indexes: self.get_domain_counts_from_db(
+                domain_name, dict((index, names[index]) for index in indexes)
+            )
+        )
+
+    def get_domain_counts_from_db(self, domain_name, names):
+        '''Loads the given {index: count name} missing counts of a domain
+        with a single grouped query per table.'''
+
+        domain = self.get_domain(domain_name)
+        if domain is None:
+            return None
+
+        missing = set(names.values())
+        counts = {}
+
+        if 'page-count' in missing:
+            counts['page-count'] = Domain.get_pages_per_domain(self.db, [domain.id]).get(domain.id, 0)
+
+        if 'violation-count' in missing:
+            counts['violation-count'] = Domain.get_violations_per_domain(self.db, [domain.id]).get(domain.id, 0)
+
+        if 'active-review-count' in missing:
+            counts['active-review-count'] = Domain.get_active_reviews_per_domain(self.db, [domain.id]).get(domain.id, 0)
+
+        if missing & set(['good-request-count', 'bad-request-count', 'response-time-avg']):
+            good, bad, avg = Domain.get_requests_per_domain(self.db, [domain.name]).get(domain.name, (0, 0, 0))
+            counts.update({'good-request-count': good, 'bad-request-count': bad, 'response-time-avg': avg})
+
+        return dict((index, counts[name]) for index, name in names.items())
+
+    def handle_get_domain_counts(self, names, callback):
+        def handle(values):
+            callback(dict(zip(names, values)))
 
         return handle
 
     @return_future
     def get_page_count(self, domain_name=None, callback=None):
-        self.get_count(
-            'page-count',
-            domain_name,
-            int(self.config.PAGE_COUNT_EXPIRATION_IN_SECONDS),
-            lambda domain: domain.get_page_count(self.db),
-            callback=callback
-        )
+        self.get_cached_value(*self.get_domain_count_items(domain_name)['page-count'], callback=callback)
 
     @return_future
     def get_violation_count(self, domain_name, callback=None):
-        self.get_count(
-            'violation-count',
-            domain_name,
-            int(self.config.PAGE_COUNT_EXPIRATION_IN_SECONDS),
-            lambda domain: domain.get_violation_data(self.db),
-            callback=callback
-        )
+        self.get_cached_value(*self.get_domain_count_items(domain_name)['violation-count'], callback=callback)
 
     @return_future
     def get_active_review_count(self, domain_name, callback=None):
-        self.get_count(
-            'active-review-count',
-            domain_name,
-            int(self.config.ACTIVE_REVIEW_COUNT_EXPIRATION_IN_SECONDS),
-            lambda domain: domain.get_active_review_count(self.db),
-            callback=callback
-        )
+        self.get_cached_value(*self.get_domain_count_items(domain_name)['active-review-count'], callback=callback)
 
     @return_future
     def get_good_request_count(self, domain_name, callback=None):
-        self.get_count(
-            'good-request-count',
-            domain_name,
-            int(self.config.GOOD_REQUEST_COUNT_EXPIRATION_IN_SECONDS),
-            lambda domain: domain.get_good_request_count(self.db),
-            callback=callback
-        )
+        self.get_cached_value(*self.get_domain_count_items(domain_name)['good-request-count'], callback=callback)
 
     @return_future
     def get_bad_request_count(self, domain_name, callback=None):
-        self.get_count(
-            'bad-request-count',
-            domain_name,
-            int(self.config.BAD_REQUEST_COUNT_EXPIRATION_IN_SECONDS),
-            lambda domain: domain.get_bad_request_count(self.db),
-            callback=callback
-        )
+        self.get_cached_value(*self.get_domain_count_items(domain_name)['bad-request-count'], callback=callback)
 
     @return_future
     def get_response_time_avg(self, domain_name, callback=None):
-        self.get_avg(
-            'response-time-avg',
-            domain_name,
-            int(self.config.RESPONSE_TIME_AVG_EXPIRATION_IN_SECONDS),
-            lambda domain: domain.get_response_time_avg(self.db),
-            callback=callback
-        )
+        self.get_cached_value(*self.get_domain_count_items(domain_name)['response-time-avg'], callback=callback)
 
     @return_future
     def get_top_in_category_for_domain(self, domain, key_category_id, limit, callback=None):
@@ -182,14 +397,37 @@ class Cache(object):
         )
 
     @return_future
-    def get_most_common_violations(self, violation_definitions, sample_limit, callback=None):
-        self.get_data(
-            'most-common-violations',
-            int(self.config.MOST_COMMON_VIOLATIONS_CACHE_EXPIRATION),
-            lambda: Violation.get_most_common_violations(self.db, violation_definitions, sample_limit),
-            callback=callback
+    def get_most_common_violations(self, violation_definitions, callback=None):
+        self.redis.zrevrange(
+            VIOLATIONS_RANKING_KEY, 0, -1, withscores=True,
+            callback=self.handle_get_violations_ranking(violation_definitions, callback)
         )
 
+    def handle_get_violations_ranking(self, violation_definitions, callback):
+        def handle(ranking):
+            if ranking:
+                counts = [
+                    (key_name, int(float(count)))
+                    for key_name, count in zip(ranking[::2], ranking[1::2])
+                ]
+                callback(Violation.format_most_common_violations(violation_definitions, counts))
+                return
+
+            counts = Violation.get_active_count_by_key_name(self.db)
+            violations = Violation.format_most_common_violations(violation_definitions, counts)
+
+            if not counts:
+                callback(violations)
+                return
+
+            self.redis.zadd(
+                VIOLATIONS_RANKING_KEY,
+                dict(counts),
+                callback=self.handle_set_cached_value(violations, callback)
+            )
+
+        return handle
+
     @return_future
     def get_next_jobs_count(self, callback=None):
         self.get_data(
@@ -208,6 +446,156 @@ class Cache(object):
             callback=callback
         )
 
+    @return_future
+    def get_last_reviews(self, callback=None):
+        limit = int(self.config.LAST_REVIEWS_LIMIT)
+
+        self.get_feed(
+            LAST_REVIEWS_KEY,
+            0,
+            limit,
+            limit,
+            lambda: [
+                review.to_summary_dict(
+                    self.application.fact_definitions,
+                    self.application.violation_definitions,
+                    self.application.key_names
+                )
+                for review in Review.get_last_reviews(self.db, limit=limit)
+            ],
+            callback=callback
+        )
+
+    @return_future
+    def get_last_requests(self, current_page=1, page_size=10, callback=None):
+        limit = int(self.config.LAST_REQUESTS_LIMIT)
+        lower_bound = (current_page - 1) * page_size
+        upper_bound = lower_bound + page_size
+
+        if upper_bound > limit:
+            requests = Request.get_last_requests(self.db, current_page=current_page, page_size=page_size)
+            callback([dict(request.to_dict(), id=request.id) for request in requests])
+            return
+
+        self.get_feed(
+            LAST_REQUESTS_KEY,
+            lower_bound,
+            upper_bound,
+            limit,
+            lambda: [
+                dict(request.to_dict(), id=request.id)
+                for request in Request.get_last_requests(self.db, page_size=limit)
+            ],
+            callback=callback
+        )
+
+    def get_feed(self, key, start, stop, limit, get_feed_method, callback=None):
+        self.redis.lrange(
+            key, start, stop - 1,
+            callback=self.handle_get_feed(key, start, stop, limit, get_feed_method, callback)
+        )
+
+    def handle_get_feed(self, key, start, stop, limit, get_feed_method, callback):
+        def handle(items):
+            if items:
+                callback([loads(item) for item in items])
+                return
+
+            self.has_key(key, self.handle_feed_has_key(key, start, stop, limit, get_feed_method, callback))
+
+        return handle
+
+    def handle_feed_has_key(self, key, start, stop, limit, get_feed_method, callback):
+        def handle(has_key):
+            if has_key:
+                callback([])
+                return
+
+            items = get_feed_method()
+
+            if not items:
+                callback(items)
+                return
+
+            self.redis.send_message(
+                ['EVAL', SEED_FEED_SCRIPT, 1, key, limit] + [dumps(item) for item in items],
+                callback=self.handle_set_cached_value(items[start:stop], callback)
+            )
+
+        return handle
+
+    @return_future
+    def get_review_document(self, review_uuid, callback=None):
+        self.redis.get(
+            get_review_document_key(review_uuid),
+            callback=self.handle_get_review_document(review_uuid, callback)
+        )
+
+    def handle_get_review_document(self, review_uuid, callback):
+        def handle(data):
+            if data is not None:
+                callback(loads(zlib.decompress(b64decode(data))))
+                return
+
+            read_db = self.application.db_router.read_db
+            review = Review.by_uuid_with_details(review_uuid, read_db)
+
+            if review is None and read_db is not self.db:
+                # it may not have reached the replica yet
+                review = Review.by_uuid_with_details(review_uuid, self.db)
+
+            if review is None:
+                callback(None)
+                return
+
+            document = review.to_document(
+                self.application.fact_definitions,
+                self.application.violation_definitions,
+                self.application.key_names
+            )
+
+            if not review.is_complete:
+                callback(document)
+                return
+
+            self.redis.setex(
+                key=get_review_document_key(review_uuid),
+                value=b64encode(zlib.compress(dumps(document))),
+                seconds=int(self.config.REVIEW_DOCUMENT_EXPIRATION_IN_SECONDS),
+                callback=self.handle_set_cached_value(document, callback)
+            )
+
+        return handle
+
+    @return_future
+    def get_reviews_count_in_period(self, from_date, to_date, callback=None):
+        if from_date < datetime.utcnow() - timedelta(seconds=COMPLETED_REVIEWS_EXPIRATION):
+            # older reviews are no longer kept in redis
+            callback(Review.get_reviews_count_in_period(self.db, from_date=from_date, to_date=to_date))
+            return
+
+        self.redis.send_message(
+            ['EVAL', COUNT_COMPLETED_REVIEWS_SCRIPT, 2, COMPLETED_REVIEWS_KEY, COMPLETED_REVIEWS_SINCE_KEY,
+             repr(get_timestamp(from_date)), repr(get_timestamp(to_date))],
+            callback=self.handle_count_completed_reviews(from_date, to_date, callback)
+        )
+
+    def handle_count_completed_reviews(self, from_date, to_date, callback):
+        def handle(result):
+            if result is None:
+                callback(Review.get_reviews_count_in_period(self.db, from_date=from_date, to_date=to_date))
+                return
+
+            count, first_timestamp = result
+            first_date = None
+
+            if first_timestamp is not None:
+                first_date = datetime.utcfromtimestamp(float(first_timestamp))
+
+            callback((int(count), first_date))
+
+        return handle
+
     def get_domain(self, domain_name):
         domain = domain_name
         if domain and not isinstance(domain, Domain):
@@ -215,96 +603,247 @@ class Cache(object):
         return domain
 
     def get_count(self, key, domain_name, expiration, get_count_method, callback=None):
-        cache_key = '%s-%s' % (self.get_domain_name(domain_name), key)
-        self.redis.get(cache_key, callback=self.handle_get_count(key, domain_name, expiration, get_count_method, callback))
+        self.get_cached_value(*self.get_count_item(key, domain_name, expiration, get_count_method), callback=callback)
 
-    def handle_get_count(self, key, domain_name, expiration, get_count_method, callback):
-        def handle(count):
-            if count is not None:
-                callback(int(count))
-                return
+    def get_count_item(self, key, domain_name, expiration, get_count_method):
+        cache_key = '%s-%s' % (self.get_domain_name(domain_name), key)
 
+        def get_count():
             domain = self.get_domain(domain_name)
 
             if domain is None:
-                count = Page.get_page_count(self.db)
-            else:
-                count = get_count_method(domain)
+                return Page.get_page_count(self.db)
 
-            cache_key = '%s-%s' % (self.get_domain_name(domain), key)
+            return get_count_method(domain)
 
-            self.redis.setex(
-                key=cache_key,
-                value=int(count),
-                seconds=expiration,
-                callback=self.handle_set_count(count, callback)
+        return cache_key, expiration, get_count, int, int
+
+    def get_avg(self, key, domain_name, expiration, get_avg_method, callback=None):
+        self.get_cached_value(*self.get_avg_item(key, domain_name, expiration, get_avg_method), callback=callback)
+
+    def get_avg_item(self, key, domain_name, expiration, get_avg_method):
+        cache_key = '%s-%s' % (self.get_domain_name(domain_name), key)
+        get_avg = lambda: get_avg_method(self.get_domain(domain_name))
+
+        return cache_key, expiration, get_avg, float, float
+
+    def get_data(self, key, expiration, get_data_method, callback=None):
+        self.get_cached_value(key, expiration, get_data_method, dumps, loads, callback)
+
+    def get_cached_value(self, key, expiration, get_value_method, serialize, parse, callback):
+        value = self.local_cache.get(key)
+
+        if value is not None:
+            callback(value)
+            return
+
+        self.redis.mget(
+            [key, get_fresh_key(key)],
+            callback=self.handle_get_cached_value(
+                key, expiration, get_value_method, serialize, parse, self.handle_local_value(key, callback)
             )
+        )
+
+    def handle_local_value(self, key, callback):
+        def handle(value):
+            self.local_cache.set(key, value)
+            callback(value)
 
         return handle
 
-    def handle_set_count(self, count, callback):
-        def handle(*args, **kw):
-            callback(count)
+    def get_cached_values(self, items, callback, get_values_method=None):
+        '''Same as get_cached_value for a list of (key, expiration,
+        get_value_method, serialize, parse) items, reading every key in a
+        single MGET and refreshing the misses in one pipelined batch.
 
-        return handle
+        get_values_method, when given, receives the indexes of the items this
+        caller has to refresh and returns their {index: value}, so the misses
+        are loaded together. It may return None to load them one by one.'''
 
-    def get_avg(self, key, domain_name, expiration, get_avg_method, callback=None):
-        cache_key = '%s-%s' % (self.get_domain_name(domain_name), key)
-        self.redis.get(cache_key, callback=self.handle_get_avg(key, domain_name, expiration, get_avg_method, callback))
+        values = [self.local_cache.get(item[0]) for item in items]
+        missing = [index for index, value in enumerate(values) if value is None]
 
-    def handle_get_avg(self, key, domain_name, expiration, get_avg_method, callback):
-        def handle(avg):
-            if avg is not None:
-                callback(float(avg))
-                return
+        if not missing:
+            callback(values)
+            return
 
-            domain = self.get_domain(domain_name)
+        keys = []
+        for index in missing:
+            keys.extend([items[index][0], get_fresh_key(items[index][0])])
 
-            avg = get_avg_method(domain)
+        self.redis.mget(
+            keys,
+            callback=self.handle_get_cached_values(items, values, missing, get_values_method, callback)
+        )
 
-            cache_key = '%s-%s' % (self.get_domain_name(domain), key)
+    def handle_get_cached_values(self, items, values, missing, get_values_method, callback):
+        def handle(cached_values):
+            stale = []
 
-            self.redis.setex(
-                key=cache_key,
-                value=float(avg),
-                seconds=expiration,
-                callback=self.handle_set_avg(avg, callback)
+            for position, index in enumerate(missing):
+                key, expiration, get_value_method, serialize, parse = items[index]
+                value, is_fresh = cached_values[position * 2], cached_values[position * 2 + 1]
+
+                if value is not None and is_fresh is not None:
+                    values[index] = parse(value)
+                    self.local_cache.set(key, values[index])
+                else:
+                    stale.append((index, value))
+
+            if not stale:
+                callback(values)
+                return
+
+            handle_lock = self.handle_batch_result(
+                {}, len(stale),
+                self.handle_refresh_locks(items, stale, get_values_method, self.handle_batch_result(values, len(stale), callback))
             )
 
+            for index, value in stale:
+                key, expiration = items[index][:2]
+
+                self.redis.send_message(
+                    ['SET', get_fresh_key(key), 1, 'EX', int(expiration), 'NX'],
+                    callback=handle_lock(index)
+                )
+
         return handle
 
-    def handle_set_avg(self, avg, callback):
-        def handle(*args, **kw):
-            callback(avg)
+    def handle_refresh_locks(self, items, stale, get_values_method, handle_value):
+        def handle(acquired):
+            indexes = [index for index, value in stale if acquired[index]]
+            refreshed = None
+
+            if indexes and get_values_method is not None:
+                try:
+                    refreshed = get_values_method(indexes)
+                except Exception:
+                    for index in indexes:
+                        self.redis.delete(get_fresh_key(items[index][0]), callback=lambda *args, **kw: None)
+                    raise
+
+            for index, value in stale:
+                key, expiration, get_value_method, serialize, parse = items[index]
+
+                if refreshed is not None and index in refreshed:
+                    get_value_method = self.get_refreshed_value(refreshed[index])
+
+                self.handle_refresh_lock(
+                    key, expiration, get_value_method, serialize, parse, value,
+                    self.handle_local_value(key, handle_value(index))
+                )(acquired[index])
 
         return handle
 
-    def get_data(self, key, expiration, get_data_method, callback=None):
-        self.redis.get(key, callback=self.handle_get_data(key, expiration, get_data_method, callback))
+    def get_refreshed_value(self, value):
+        return lambda: value
 
-    def handle_get_data(self, key, expiration, get_data_method, callback):
-        def handle(data):
-            if data is not None:
-                callback(loads(data))
+    def handle_batch_result(self, results, count, callback):
+        remaining = [count]
+
+        def handle_value(index):
+            def handle(value):
+                results[index] = value
+                remaining[0] -= 1
+
+                if not remaining[0]:
+                    callback(results)
+
+            return handle
+
+        return handle_value
+
+    def handle_get_cached_value(self, key, expiration, get_value_method, serialize, parse, callback):
+        def handle(values):
+            value, is_fresh = values
+
+            if value is not None and is_fresh is not None:
+                callback(parse(value))
                 return
 
-            data = get_data_method()
+            # the freshness marker doubles as the refresh lock: only the
+            # caller that sets it goes to the database.
+            self.redis.send_message(
+                ['SET', get_fresh_key(key), 1, 'EX', int(expiration), 'NX'],
+                callback=self.handle_refresh_lock(key, expiration, get_value_method, serialize, parse, value, callback)
+            )
+
+        return handle
 
-            self.redis.setex(
-                key=key,
-                value=dumps(data),
-                seconds=expiration,
-                callback=self.handle_set_data(data, callback)
+    def handle_refresh_lock(self, key, expiration, get_value_method, serialize, parse, stale_value, callback):
+        def handle(acquired):
+            if acquired:
+                self.refresh_cached_value(key, expiration, get_value_method, serialize, callback)
+                return
+
+            if stale_value is not None:
+                callback(parse(stale_value))
+                return
+
+            # someone else is computing a key that is not cached at all;
+            # commands share a connection, so a refresher from this process
+            # has already stored its value by the time this get runs.
+            self.redis.get(
+                key,
+                callback=self.handle_wait_for_refresh(get_value_method, parse, callback)
             )
 
         return handle
 
-    def handle_set_data(self, data, callback):
+    def handle_wait_for_refresh(self, get_value_method, parse, callback):
+        def handle(value):
+            if value is not None:
+                callback(parse(value))
+                return
+
+            callback(get_value_method())
+
+        return handle
+
+    def refresh_cached_value(self, key, expiration, get_value_method, serialize, callback):
+        try:
+            value = get_value_method()
+        except Exception:
+            self.redis.delete(get_fresh_key(key), callback=lambda *args, **kw: None)
+            raise
+
+        self.redis.setex(
+            key=key,
+            value=serialize(value),
+            seconds=int(expiration) + int(self.config.CACHE_STALE_EXPIRATION_IN_SECONDS),
+            callback=self.handle_set_cached_value(value, callback)
+        )
+
+    def handle_set_cached_value(self, value, callback):
         def handle(*args, **kw):
-            callback(data)
+            callback(value)
 
         return handle
 
+    @return_future
+    def get_response(self, key, callback=None):
+        self.redis.get(key, callback=self.handle_get_response(callback))
+
+    def handle_get_response(self, callback):
+        def handle(data):
+            if data is None:
+                callback(None)
+                return
+
+            etag, body = data.split('\n', 1)
+            callback((etag, body))
+
+        return handle
+
+    @return_future
+    def set_response(self, key, etag, body, expiration, callback=None):
+        self.redis.setex(
+            key=key,
+            value='%s\n%s' % (etag, body),
+            seconds=int(expiration),
+            callback=callback
+        )
+
     @return_future
     def lock_page(self, url, callback=None):
         expiration = self.config.URL_LOCK_EXPIRATION_IN_SECONDS
@@ -333,10 +872,45 @@ class Cache(object):
     def release_lock_page(self, url, callback):
         self.redis.delete('%s-lock' % url, callback=callback)
 
+    @return_future
+    def mark_domain_dirty(self, domain_name, callback=None):
+        self.redis.sadd(DIRTY_DOMAINS_KEY, self.get_domain_name(domain_name), callback=callback)
+
+    @return_future
+    def increment_material_reads(self, name, callback=None):
+        self.redis.hincrby(MATERIAL_READS_KEY, name, 1, callback=callback)
+
+    @return_future
+    def get_material_stats(self, callback):
+        self.redis.hgetall(MATERIAL_STATS_KEY, callback=self.handle_get_material_stats(callback))
+
+    def handle_get_material_stats(self, callback):
+        def handle(values):
+            stats = {}
+
+            for name, value in zip(values[::2], values[1::2]):
+                stats[name] = loads(value)
+
+            callback(stats)
+
+        return handle
+
     @return_future
     def get_limit_usage(self, url, callback):
         self.redis.zcard('limit-for-%s' % url, callback=callback)
 
+    @return_future
+    def get_limits_usage(self, urls, callback):
+        if not urls:
+            callback([])
+            return
+
+        handle_value = self.handle_batch_result([None] * len(urls), len(urls), callback)
+
+        # commands share the connection, so these go out as one pipeline
+        for index, url in enumerate(urls):
+            self.redis.zcard('limit-for-%s' % url, callback=handle_value(index))
+
     @return_future
     def remove_domain_limiters_key(self, callback):
         self.redis.delete('domain-limiters', callback=callback)
@@ -348,6 +922,9 @@ class SyncCache(object):
         self.redis = redis
         self.config = config
 
+        self.increment_counter_script = self.redis.register_script(INCREMENT_COUNTER_SCRIPT)
+        self.seed_counter_script = self.redis.register_script(SEED_COUNTER_SCRIPT)
+
     def has_key(self, key):
         return self.redis.exists(key)
 
@@ -384,21 +961,111 @@ class SyncCache(object):
     def increment_count(self, key, domain_name, get_default_method, increment=1):
         key = '%s-%s' % (self.get_domain_name(domain_name), key)
 
-        has_key = self.has_key(key)
-
-        domain = domain_name
-        if domain and not isinstance(domain, Domain):
-            domain = Domain.get_domain_by_name(domain_name, self.db)
+        def get_default_value():
+            domain = domain_name
+            if domain and not isinstance(domain, Domain):
+                domain = Domain.get_domain_by_name(domain_name, self.db)
 
-        if has_key:
-            self.redis.incrby(key, increment)
-        else:
             if domain is None:
-                value = Page.get_page_count(self.db) + increment - 1
-            else:
-                value = get_default_method(domain) + increment - 1
+                return Page.get_page_count(self.db) + increment - 1
+
+            return get_default_method(domain) + increment - 1
 
-            self.redis.set(key, value)
+        return self.increment_counter(key, get_default_value, increment)
+
+    def increment_counter(self, key, get_default_value, increment):
+        keys = get_counter_keys(key)
+
+        result = self.increment_counter_script(
+            keys=keys,
+            args=[increment, int(self.config.COUNTER_SEED_LOCK_EXPIRATION_IN_SECONDS)]
+        )
+
+        if result == 'pending':
+            return None
+
+        if result != 'seed':
+            return result
+
+        try:
+            value = get_default_value()
+        except Exception:
+            self.redis.delete(keys[2])
+            raise
+
+        return self.seed_counter_script(keys=keys, args=[value, increment])
+
+    def increment_violations_ranking(self, increments):
+        if not increments or not self.has_key(VIOLATIONS_RANKING_KEY):
+            return
+
+        pipe = self.redis.pipeline()
+        for key_name, increment in increments.items():
+            if increment:
+                pipe.zincrby(VIOLATIONS_RANKING_KEY, key_name, increment)
+        pipe.zremrangebyscore(VIOLATIONS_RANKING_KEY, '-inf', 0)
+        pipe.execute()
+
+    def add_last_review(self, review_data):
+        self.push_to_feed(LAST_REVIEWS_KEY, review_data, int(self.config.LAST_REVIEWS_LIMIT))
+
+    def add_last_request(self, request_data):
+        self.push_to_feed(LAST_REQUESTS_KEY, request_data, int(self.config.LAST_REQUESTS_LIMIT))
+
+    def push_to_feed(self, key, data, limit):
+        # only feeds already seeded by the api are kept, otherwise the
+        # list would hold just the items saved since it was created
+        pipe = self.redis.pipeline()
+        pipe.lpushx(key, dumps(data))
+        pipe.ltrim(key, 0, limit - 1)
+        pipe.execute()
+
+    def mark_domain_dirty(self, domain_name):
+        self.redis.sadd(DIRTY_DOMAINS_KEY, self.get_domain_name(domain_name))
+
+    def get_dirty_domains(self):
+        return self.redis.smembers(DIRTY_DOMAINS_KEY)
+
+    def remove_dirty_domains(self, domain_names):
+        # domains marked dirty again meanwhile are kept in the set
+        if domain_names:
+            self.redis.srem(DIRTY_DOMAINS_KEY, *domain_names)
+
+    def pop_material_reads(self):
+        pipe = self.redis.pipeline()
+        pipe.hgetall(MATERIAL_READS_KEY)
+        pipe.delete(MATERIAL_READS_KEY)
+        reads, _ = pipe.execute()
+
+        return dict((name, int(count)) for name, count in reads.items())
+
+    def set_material_stats(self, name, stats):
+        self.redis.hset(MATERIAL_STATS_KEY, name, dumps(stats))
+
+    def get_material_next_refresh(self, name):
+        timestamp = self.redis.hget(MATERIAL_REFRESHES_KEY, name)
+
+        if timestamp is None:
+            return None
+
+        return float(timestamp)
+
+    def set_material_next_refresh(self, name, timestamp):
+        self.redis.hset(MATERIAL_REFRESHES_KEY, name, timestamp)
+
+    def add_completed_review(self, review_uuid, completed_date):
+        timestamp = get_timestamp(completed_date)
+
+        pipe = self.redis.pipeline()
+        pipe.zadd(COMPLETED_REVIEWS_KEY, timestamp, str(review_uuid))
+        pipe.zremrangebyscore(COMPLETED_REVIEWS_KEY, '-inf', time() - COMPLETED_REVIEWS_EXPIRATION)
+        # the count is only read from redis for periods starting after this
+        pipe.setnx(COMPLETED_REVIEWS_SINCE_KEY, repr(timestamp))
+        pipe.execute()
+
+    def remove_completed_review(self, review_uuid):
+        # only active reviews are counted, as in Review.get_reviews_count_in_period
+        self.redis.zrem(COMPLETED_REVIEWS_KEY, str(review_uuid))
 
     def increment_next_jobs_count(self, increment=1):
         self.increment_data(
@@ -415,13 +1082,7 @@ class SyncCache(object):
         )
 
     def increment_data(self, key, get_default_method, increment=1):
-        has_key = self.has_key(key)
-
-        if has_key:
-            self.redis.incrby(key, increment)
-        else:
-            value = get_default_method() + increment
-            self.redis.set(key, value)
+        return self.increment_counter(key, lambda: get_default_method() + increment, increment)
 
     def get_page_count(self, domain_name=None):
         return self.get_count(
@@ -450,9 +1111,14 @@ class SyncCache(object):
     def get_count(self, key, domain_name, expiration, get_count_method):
         cache_key = '%s-%s' % (self.get_domain_name(domain_name), key)
 
-        count = self.redis.get(cache_key)
+        count, is_fresh = self.redis.mget(cache_key, get_fresh_key(cache_key))
 
-        if count is not None:
+        if count is not None and is_fresh is not None:
+            return int(count)
+
+        acquired = self.redis.set(get_fresh_key(cache_key), 1, ex=int(expiration), nx=True)
+
+        if count is not None and not acquired:
             return int(count)
 
         domain = domain_name
@@ -464,13 +1130,12 @@ class SyncCache(object):
         else:
             count = get_count_method(domain)
 
-        cache_key = '%s-%s' % (self.get_domain_name(domain), key)
-
-        self.redis.setex(
-            cache_key,
-            expiration,
-            value=int(count)
-        )
+        if acquired:
+            self.redis.setex(
+                cache_key,
+                int(expiration) + int(self.config.CACHE_STALE_EXPIRATION_IN_SECONDS),
+                value=int(count)
+            )
 
         return int(count)
 
@@ -11,6 +11,7 @@ from materialgirl import Materializer
 from materialgirl.storage.redis import RedisStorage
 
 from holmes.cache import SyncCache
+from holmes.db_router import DatabaseRouter
 from holmes.utils import load_classes
 from holmes.config import Config
 
@@ -55,6 +56,7 @@ class BaseCLI(Shepherd):
 
         self.sqlalchemy_db_maker = sessionmaker(bind=engine, autoflush=autoflush, autocommit=True)
         self.db = scoped_session(self.sqlalchemy_db_maker)
+        self.db_router = DatabaseRouter(self.db, self.config)
 
     def connect_to_redis(self):
         host = self.config.get('REDISHOST')
@@ -78,4 +80,4 @@ class BaseCLI(Shepherd):
         from holmes.material import configure_materials
         self.girl = Materializer(storage=RedisStorage(redis=self.redis_material))
 
-        configure_materials(self.girl, self.db, self.config)
+        configure_materials(self.girl, self.db_router, self.config, self.cache)
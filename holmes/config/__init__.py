@@ -21,6 +21,9 @@ Config.define('LOG_DATE_FORMAT', '%Y-%m-%d %H:%M:%S',
 
 Config.define('FACTERS', [], 'List of classes to get facts about a website', 'Review')
 Config.define('VALIDATORS', [], 'List of classes to validate a website', 'Review')
+Config.define('WORKER_CONCURRENT_REVIEWS', 1, 'Number of pages each worker process reviews at the same time, sharing its octopus connections and domain limits', 'Review')
+Config.define('WORKER_PROCESS_POOL_SIZE', 0, 'Number of processes parsing sitemaps and computing content sizes for concurrent reviews (0 runs them inline on the IOLoop)', 'Review')
+Config.define('PLUGIN_MANIFEST_DIRECTORY', None, 'Directory where the manifest with the definitions of the configured facters and validators is kept (defaults to the temp directory)', 'Review')
 Config.define('REVIEW_EXPIRATION_IN_SECONDS', 6 * 60 * 60, 'Number of seconds that a review expires in.', 'Review')
 
 Config.define('MAX_ENQUEUE_BUFFER_LENGTH', 1000,
@@ -59,6 +62,10 @@ Config.define('API_PROXY_HOST', None, 'HTTP Proxy Host to use to connect to the
 Config.define('API_PROXY_PORT', None, 'HTTP Proxy Port to use to connect to the API', 'Web')
 
 Config.define('COMMIT_ON_REQUEST_END', True, 'Commit on request end', 'DB')
+Config.define('SQLALCHEMY_REPLICA_CONNECTION_STRING', None, 'Connection string of a read replica used by read only API handlers and materials', 'DB')
+Config.define('REPLICA_MAX_LAG_IN_SECONDS', 10, 'Reads fall back to the primary when the replica is further behind than this', 'DB')
+Config.define('REPLICA_LAG_CHECK_INTERVAL_IN_SECONDS', 5, 'How often the replica lag is checked', 'DB')
+Config.define('DB_THREAD_POOL_SIZE', 4, 'Number of threads running slow API queries off the IOLoop (0 runs them inline). Keep SQLALCHEMY_POOL_SIZE above it', 'DB')
 
 Config.define('REDISHOST', 'localhost', 'Redis host', 'Redis')
 Config.define('REDISPORT', 7575, 'Redis port', 'Redis')
@@ -92,10 +99,32 @@ Config.define('RESPONSE_TIME_AVG_EXPIRATION_IN_SECONDS', HOUR, 'Expiration for t
 Config.define('VIOLATIONS_BY_CATEGORY_EXPIRATION_IN_SECONDS', 6 * 60, 'Expiration for the cache key for each domain violation count by category', 'Cache')
 Config.define('TOP_CATEGORY_VIOLATIONS_EXPIRATION_IN_SECONDS', 6 * 60, 'Expiration for the cache key for each domain top violation in a category', 'Cache')
 Config.define('TOP_CATEGORY_VIOLATIONS_LIMIT', 10, 'Limit for the size of the list of top vilations of a key category for a domain', 'Domain Handler')
+Config.define('CACHE_STALE_EXPIRATION_IN_SECONDS', 10 * 60, 'How long an expired cache key keeps being served while a single caller refreshes it', 'Cache')
+Config.define('LOCAL_CACHE_SIZE', 0, 'Number of cached values and materials each API process keeps in memory in front of redis (0 disables it)', 'Cache')
+Config.define('LOCAL_CACHE_EXPIRATION_IN_SECONDS', 5, 'How long a value is kept in the in-process cache', 'Cache')
+Config.define('LOCAL_CACHE_INVALIDATING_EVENTS', ['new-review', 'new-page', 'new-domain'], 'Event types that clear the in-process cache. Keep out high rate events such as new-request, or the cache never hits', 'Cache')
+Config.define('COUNTER_SEED_LOCK_EXPIRATION_IN_SECONDS', 60, 'How long a single worker may take to load a missing counter from the database while other increments are buffered', 'Cache')
+Config.define('DOMAINS_DETAILS_EXPIRATION_IN_SECONDS', 10, 'How often the material worker patches the domains details with the domains changed since the last run', 'Cache')
+Config.define('DOMAINS_DETAILS_FULL_REFRESH_IN_SECONDS', 10 * 60, 'How often the material worker recomputes the domains details for every domain', 'Cache')
+Config.define('MATERIAL_MIN_EXPIRATION_IN_SECONDS', 5, 'Shortest interval the material worker refreshes a frequently read material in', 'Material')
+Config.define('MATERIAL_MAX_EXPIRATION_IN_SECONDS', 10 * 60, 'Longest interval the material worker backs off an expensive and rarely read material to', 'Material')
+Config.define('MATERIAL_EXPENSIVE_COMPUTATION_IN_SECONDS', 1, 'Computation time above which a rarely read material is refreshed less often', 'Material')
+Config.define('MATERIAL_HOT_READS_PER_MINUTE', 60, 'Reads per minute above which a material is refreshed more often', 'Material')
+Config.define('MATERIAL_COLD_READS_PER_MINUTE', 1, 'Reads per minute below which an expensive material is refreshed less often', 'Material')
 Config.define('URL_LOCK_EXPIRATION_IN_SECONDS', 30, 'Expiration for the url lock for each url', 'Cache')
 Config.define('NEXT_JOB_URL_LOCK_EXPIRATION_IN_SECONDS', 3 * 60, 'Expiration for the url lock for next jobs', 'Cache')
 Config.define('NEXT_JOBS_COUNT_EXPIRATION_IN_SECONDS', HOUR, 'Expiration for the cache key for next jobs count', 'Cache')
 Config.define('REQUESTS_COUNT_EXPIRATION_IN_SECONDS', HOUR, 'Expiration for the cache key for requests count', 'Cache')
+response_cache_expiration = {
+    'domains-details': 10,
+    'most-common-violations': 30,
+    'workers-info': 5,
+    'next-jobs': 5,
+}
+Config.define('RESPONSE_CACHE_EXPIRATION_IN_SECONDS', response_cache_expiration, 'Seconds each cached route keeps its json response', 'Cache')
+Config.define('REVIEW_DOCUMENT_EXPIRATION_IN_SECONDS', 7 * 24 * HOUR, 'Expiration for the cached document of a completed review', 'Cache')
+Config.define('LAST_REVIEWS_LIMIT', 12, 'Number of reviews kept in the last reviews list', 'Cache')
+Config.define('LAST_REQUESTS_LIMIT', 100, 'Number of requests kept in the last requests list', 'Cache')
 
 
 Config.define('DEFAULT_PAGE_SCORE', 1000000, 'Page Score for pages that the user includes through the UI', 'General')
@@ -105,17 +134,25 @@ Config.define('REQUEST_CACHE_EXPIRATION_IN_SECONDS', HOUR, 'Expiration in second
 
 Config.define('MAX_URL_LEVELS', 20, 'Maximum levels of URL')
 
+Config.define('SEARCH_RESULTS_LIMIT', 10, 'Maximum number of pages returned by the url autocomplete', 'Search')
+Config.define('SEARCH_CANDIDATES_LIMIT', 1000, 'Number of pages read from the url path index before ranking autocomplete results', 'Search')
+Config.define('SEARCH_DOMAINS_LIMIT', 10, 'Maximum number of domains matched by a partial host in the url autocomplete', 'Search')
+
 Config.define('GOOGLE_CLIENT_ID', None, 'Google client ID')
 
 Config.define('LIMITER_LOCKS_EXPIRATION', 120, 'The expiration for locks in the limiter')
 Config.define('LIMITER_VALUES_CACHE_EXPIRATION', 600, 'The expiration for valus in the limiter')
 Config.define('DEFAULT_NUMBER_OF_CONCURRENT_CONNECTIONS', 5, 'Default number of concurrent connections', 'Limiter')
 
-Config.define('MOST_COMMON_VIOLATIONS_CACHE_EXPIRATION', 3 * HOUR, 'Expiration for the cache key for the most common violations', 'Cache')
-Config.define('MOST_COMMON_VIOLATIONS_SAMPLE_LIMIT', 50000, 'Limit for the size of the Vilation sample used in the aggregation', 'Violation Handler')
-
 throttling_message_type = {
     'new-request': 5,
     'worker-status': 2,
 }
 Config.define('EVENT_BUS_THROTTLING_MESSAGE_TYPE', throttling_message_type, 'Trottling by message type', 'Event Bus')
+Config.define('EVENT_BUS_FRAME_INTERVAL_IN_MS', 500, 'Interval between the frames of events sent to websocket clients', 'Event Bus')
+Config.define('EVENT_BUS_MAX_EVENTS_PER_TYPE', 20, 'Maximum number of events of each type in a frame, older ones are dropped and counted', 'Event Bus')
+Config.define('EVENT_BUS_DELTA_MESSAGE_TYPE', ['domain-counts', 'violations-ranking'], 'Event types carrying counter deltas, which are summed instead of dropped', 'Event Bus')
+Config.define('EVENT_BUS_REPLAY_BUFFER_SIZE', 1000, 'Number of recent events kept in redis so websocket clients reconnecting to any api process can resume from their last cursor', 'Event Bus')
+Config.define('EVENT_PUBLISHER_FLUSH_INTERVAL_IN_SECONDS', 1, 'How long workers buffer events before publishing them', 'Event Bus')
+Config.define('EVENT_PUBLISHER_AGGREGATED_MESSAGE_TYPE', ['new-request'], 'Event types workers publish as a count per domain instead of one by one', 'Event Bus')
+Config.define('EVENT_BUS_MAX_PENDING_FRAMES', 10, 'Maximum number of frames queued for a websocket client that is not keeping up', 'Event Bus')
@@ -0,0 +1,69 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import sys
+
+from concurrent.futures import ThreadPoolExecutor
+from tornado.concurrent import TracebackFuture
+from sqlalchemy.orm import sessionmaker
+
+
+class DatabaseExecutor(object):
+    '''Runs database reads in a bounded thread pool so slow queries do not
+    block the IOLoop. Each call gets its own session from the pool of the
+    engine chosen by the database router, closed when the call returns, so
+    the called method must return plain values (rows, dicts, numbers) and
+    not lazy loaded instances.
+
+    With a pool size of 0 calls run inline with the router's read session.
+
+    submit runs a method that does not need a session, such as the router's
+    replica lag check, in the same pool.'''
+
+    def __init__(self, db_router, pool_size):
+        self.db_router = db_router
+        self.pool_size = pool_size
+        self.executor = None
+
+        if pool_size:
+            self.session_maker = sessionmaker()
+            self.executor = ThreadPoolExecutor(max_workers=pool_size)
+
+    def run(self, method, *args, **kw):
+        if self.executor is None:
+            future = TracebackFuture()
+
+            try:
+                future.set_result(method(self.db_router.read_db, *args, **kw))
+            except Exception:
+                future.set_exc_info(sys.exc_info())
+
+            return future
+
+        bind = self.db_router.get_read_bind()
+        return self.executor.submit(self.run_in_session, bind, method, *args, **kw)
+
+    def submit(self, method, *args):
+        if self.executor is None:
+            future = TracebackFuture()
+
+            try:
+                future.set_result(method(*args))
+            except Exception:
+                future.set_exc_info(sys.exc_info())
+
+            return future
+
+        return self.executor.submit(method, *args)
+
+    def run_in_session(self, bind, method, *args, **kw):
+        db = self.session_maker(bind=bind)
+
+        try:
+            return method(db, *args, **kw)
+        finally:
+            db.close()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
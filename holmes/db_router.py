@@ -0,0 +1,124 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import logging
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+from tornado.ioloop import PeriodicCallback
+
+
+class DatabaseRouter(object):
+    '''Chooses the session used for reads. When a replica is configured and
+    its replication lag is within REPLICA_MAX_LAG_IN_SECONDS reads go to it,
+    otherwise they go to the primary session, which also takes every write.
+
+    The lag is never checked while choosing a session: the API checks it
+    every REPLICA_LAG_CHECK_INTERVAL_IN_SECONDS in the database executor's
+    pool and blocking workers check it in their own loop. Until the first
+    check, or when the replica is not replicating, reads go to the primary.'''
+
+    def __init__(self, db, config):
+        self.db = db
+        self.config = config
+
+        self.replica_engine = None
+        self.replica_db = None
+
+        self.replica_is_fresh = False
+        self.lag_check_callback = None
+        self.lag_check_pending = False
+
+        connstr = config.get('SQLALCHEMY_REPLICA_CONNECTION_STRING')
+        if connstr:
+            self.connect_replica(connstr)
+
+    def connect_replica(self, connstr):
+        options = {}
+        if not connstr.startswith('sqlite'):
+            options['pool_size'] = self.config.SQLALCHEMY_POOL_SIZE
+            options['max_overflow'] = self.config.SQLALCHEMY_POOL_MAX_OVERFLOW
+
+        self.replica_engine = create_engine(connstr, convert_unicode=True, **options)
+
+        # autocommit so every read sees a fresh snapshot of the replica
+        self.replica_db = scoped_session(sessionmaker(bind=self.replica_engine, autocommit=True))
+
+    @property
+    def read_db(self):
+        if self.replica_db is None or not self.replica_is_fresh:
+            return self.db
+
+        return self.replica_db
+
+    def get_read_bind(self):
+        return self.read_db.get_bind()
+
+    def start_lag_checks(self, db_executor, io_loop):
+        if self.replica_db is None:
+            return
+
+        self.lag_check_callback = PeriodicCallback(
+            lambda: self.schedule_lag_check(db_executor, io_loop),
+            self.config.REPLICA_LAG_CHECK_INTERVAL_IN_SECONDS * 1000,
+            io_loop=io_loop
+        )
+        self.lag_check_callback.start()
+        self.schedule_lag_check(db_executor, io_loop)
+
+    def stop_lag_checks(self):
+        if self.lag_check_callback is not None:
+            self.lag_check_callback.stop()
+            self.lag_check_callback = None
+
+    def schedule_lag_check(self, db_executor, io_loop):
+        if self.lag_check_pending:
+            return
+
+        self.lag_check_pending = True
+        io_loop.add_future(db_executor.submit(self.get_replica_lag), self.handle_lag_check)
+
+    def handle_lag_check(self, future):
+        self.lag_check_pending = False
+
+        try:
+            lag = future.result()
+        except Exception:
+            logging.exception('Could not check the replica lag.')
+            lag = None
+
+        self.set_replica_lag(lag)
+
+    def check_replica_lag(self):
+        if self.replica_db is not None:
+            self.set_replica_lag(self.get_replica_lag())
+
+    def set_replica_lag(self, lag):
+        self.replica_is_fresh = lag is not None and lag <= self.config.REPLICA_MAX_LAG_IN_SECONDS
+
+    def get_replica_lag(self):
+        if self.replica_engine.dialect.name != 'mysql':
+            return 0
+
+        try:
+            # FIXME: SHOW SLAVE STATUS works only in MySQL.
+            status = self.replica_engine.execute('SHOW SLAVE STATUS').first()
+        except Exception:
+            logging.exception('Could not read the replica status.')
+            return None
+
+        # no status means the replica is not replicating at all
+        if status is None:
+            return None
+
+        lag = status['Seconds_Behind_Master']
+        if lag is None:
+            return None
+
+        return int(lag)
+
+    def remove(self):
+        self.stop_lag_checks()
+
+        if self.replica_db is not None:
+            self.replica_db.remove()
@@ -2,9 +2,64 @@
 # -*- coding: utf-8 -*-
 
 import logging
-from collections import defaultdict
+import re
+from collections import defaultdict, deque, OrderedDict
 from time import time
-from ujson import loads
+
+from tornado.ioloop import PeriodicCallback
+from ujson import dumps, loads
+
+from holmes.utils import get_domain_from_url
+
+
+MESSAGE_TYPE_REGEX = re.compile(r'"type"\s*:\s*"([^"]+)"')
+
+EVENTS_SEQUENCE_KEY = 'events-sequence'
+EVENTS_REPLAY_KEY = 'events-replay'
+
+# KEYS: events sequence, events replay buffer
+# ARGV: channel, replay buffer size, message
+# numbers the event for every api process and keeps it for replaying
+PUBLISH_EVENT_SCRIPT = """
+local sequence = redis.call('incr', KEYS[1])
+local event = sequence .. ':' .. ARGV[3]
+
+redis.call('zadd', KEYS[2], sequence, event)
+redis.call('zremrangebyrank', KEYS[2], 0, -tonumber(ARGV[2]) - 1)
+
+return redis.call('publish', ARGV[1], event)
+"""
+
+
+def get_message_type(message):
+    match = MESSAGE_TYPE_REGEX.search(message)
+    return match and match.group(1)
+
+
+def get_publish_event_args(channel, message, replay_buffer_size):
+    return [PUBLISH_EVENT_SCRIPT, 2, EVENTS_SEQUENCE_KEY, EVENTS_REPLAY_KEY, channel, replay_buffer_size, message]
+
+
+def split_sequence(event):
+    sequence, _, message = event.partition(':')
+
+    # events published without a sequence are passed along as they are
+    if not sequence.isdigit():
+        return None, event
+
+    return int(sequence), message
+
+
+def merge_delta(delta, event):
+    for name, value in event.items():
+        if isinstance(value, dict):
+            merge_delta(delta.setdefault(name, {}), value)
+        elif isinstance(value, (int, long, float)) and not isinstance(value, bool):
+            delta[name] = delta.get(name, 0) + value
+        else:
+            delta[name] = value
+
+    return delta
 
 
 class NoOpEventBus(object):
@@ -23,6 +78,12 @@ class NoOpEventBus(object):
     def flush(self):
         pass
 
+    def get_cursor(self, channel):
+        return None
+
+    def get_frames_since(self, channel, cursor, callback):
+        callback(None)
+
 
 class EventBus(object):
     def __init__(self, application):
@@ -32,9 +93,26 @@ class EventBus(object):
         self.last_message = {}
         self.throttling = self.application.config.EVENT_BUS_THROTTLING_MESSAGE_TYPE
 
+        self.pending_events = defaultdict(OrderedDict)
+        self.dropped_events = defaultdict(int)
+        self.max_events_per_type = self.application.config.EVENT_BUS_MAX_EVENTS_PER_TYPE
+
+        # deltas are summed instead of dropped, clients apply them to their counters
+        self.delta_types = set(self.application.config.EVENT_BUS_DELTA_MESSAGE_TYPE)
+        self.pending_deltas = defaultdict(OrderedDict)
+
+        # events are numbered and kept in redis when published, so cursors
+        # are valid in every api process and across restarts
+        self.sequences = defaultdict(int)
+        self.first_sequences = {}
+        self.replay_buffer_size = self.application.config.EVENT_BUS_REPLAY_BUFFER_SIZE
+
         self.publish_items = []
         self.application.redis_pub_sub.subscribe('events', self.on_message)
 
+        self.frames = PeriodicCallback(self.send_frames, self.application.config.EVENT_BUS_FRAME_INTERVAL_IN_MS)
+        self.frames.start()
+
     def subscribe(self, channel, uuid, handler):
         self.handlers[channel][uuid] = handler
 
@@ -50,7 +128,9 @@ class EventBus(object):
     def flush(self):
         for channel, message in self.publish_items:
             logging.debug('Publishing message to %s...' % channel)
-            self.application.redis.publish(channel, message)
+            self.application.redis.send_message(
+                ['EVAL'] + get_publish_event_args(channel, message, self.replay_buffer_size)
+            )
         self.publish_items = []
 
     def get_time(self):
@@ -65,9 +145,15 @@ class EventBus(object):
         if msg_type != 'message':
             return
 
-        msg_obj = loads(msg_value)
+        sequence, msg_value = split_sequence(msg_value)
 
-        tp = msg_obj['type']
+        if sequence is not None:
+            self.sequences[msg_channel] = max(self.sequences[msg_channel], sequence)
+
+        # only the type is needed here, so the message is not parsed
+        tp = get_message_type(msg_value)
+
+        self.application.local_cache.invalidate(tp)
 
         if tp in self.throttling and tp in self.last_message and self.get_time() - self.last_message[tp] <= self.throttling[tp]:
             return
@@ -75,5 +161,153 @@ class EventBus(object):
         logging.debug("%s on %s for %s" % (msg_type, msg_channel, msg_value))
         self.last_message[tp] = self.get_time()
 
-        for handler in self.handlers.get(msg_channel, {}).values():
-            handler(msg_value)
+        if sequence is not None:
+            self.first_sequences.setdefault(msg_channel, sequence)
+
+        self.add_event(msg_channel, tp, msg_value)
+
+    def add_event(self, channel, tp, message):
+        if tp in self.delta_types:
+            self.add_delta(channel, tp, loads(message))
+            return
+
+        events = self.pending_events[channel].get(tp)
+
+        if events is None:
+            events = self.pending_events[channel][tp] = deque()
+
+        if len(events) >= self.max_events_per_type:
+            events.popleft()
+            self.dropped_events[(channel, tp)] += 1
+
+        events.append(message)
+
+    def add_delta(self, channel, tp, event):
+        key = (tp, event.get('domainName'))
+        merge_delta(self.pending_deltas[channel].setdefault(key, {}), event)
+
+    def send_frames(self):
+        for channel in set(self.pending_events.keys()) | set(self.pending_deltas.keys()):
+            events_by_type = self.pending_events.get(channel, {})
+            messages = []
+
+            for tp, events in events_by_type.items():
+                messages.extend(events)
+
+                dropped = self.dropped_events.pop((channel, tp), 0)
+                if dropped:
+                    messages.append(dumps({'type': 'dropped-events', 'eventType': tp, 'count': dropped}))
+
+            for delta in self.pending_deltas.get(channel, {}).values():
+                messages.append(dumps(delta))
+
+            # serialized once and shared by every subscriber
+            frame = '{"cursor":"%s","events":[%s]}' % (self.get_cursor(channel), ','.join(messages))
+            first_sequence = self.first_sequences.get(channel)
+
+            for handler in self.handlers.get(channel, {}).values():
+                handler(frame, first_sequence, self.sequences[channel])
+
+        self.pending_events.clear()
+        self.pending_deltas.clear()
+        self.first_sequences.clear()
+
+    def get_cursor(self, channel):
+        return str(self.sequences[channel])
+
+    def get_frames_since(self, channel, cursor, callback):
+        '''Calls back with a frame of the events published after the given
+        cursor and the sequence it goes up to, or with None when they are no
+        longer kept and the client has to reload.'''
+
+        if not cursor.isdigit():
+            callback(None)
+            return
+
+        self.application.redis.send_message(
+            ['ZRANGEBYSCORE', EVENTS_REPLAY_KEY, '(%s' % cursor, '+inf'],
+            callback=self.handle_get_frames_since(int(cursor), callback)
+        )
+
+    def handle_get_frames_since(self, sequence, callback):
+        def handle(events):
+            events = [split_sequence(event) for event in events or []]
+
+            if not events:
+                callback((None, sequence))
+                return
+
+            if events[0][0] != sequence + 1:
+                callback(None)
+                return
+
+            last_sequence = events[-1][0]
+            frame = '{"cursor":"%d","events":[%s]}' % (last_sequence, ','.join(message for _, message in events))
+
+            callback((frame, last_sequence))
+
+        return handle
+
+
+class EventPublisher(object):
+    '''Buffers the events published by a worker and sends them in a single
+    pipeline per flush. High-rate types are summarized per domain.'''
+
+    def __init__(self, redis, config):
+        self.redis = redis
+        self.interval = config.EVENT_PUBLISHER_FLUSH_INTERVAL_IN_SECONDS
+        self.replay_buffer_size = config.EVENT_BUS_REPLAY_BUFFER_SIZE
+        self.aggregated_types = set(config.EVENT_PUBLISHER_AGGREGATED_MESSAGE_TYPE)
+        self.delta_types = set(config.EVENT_BUS_DELTA_MESSAGE_TYPE)
+
+        self.messages = []
+        self.aggregated = OrderedDict()
+        self.last_flush = self.get_time()
+
+    def get_time(self):
+        return time()
+
+    def publish(self, message):
+        tp = get_message_type(message)
+
+        if tp in self.aggregated_types:
+            self.aggregate(tp, loads(message))
+        elif tp in self.delta_types:
+            event = loads(message)
+            merge_delta(self.aggregated.setdefault((tp, event.get('domainName')), {}), event)
+        else:
+            self.messages.append(message)
+
+        if self.get_time() - self.last_flush >= self.interval:
+            self.flush()
+
+    def aggregate(self, tp, event):
+        domain, domain_url = get_domain_from_url(event.get('url', ''))
+
+        item = self.aggregated.get((tp, domain))
+
+        if item is None:
+            item = self.aggregated[(tp, domain)] = {'domainName': domain, 'count': 0}
+
+        # the summary keeps the fields of the latest event
+        item.update(event)
+        item['count'] += 1
+
+    def flush(self):
+        self.last_flush = self.get_time()
+
+        if not self.messages and not self.aggregated:
+            return
+
+        pipe = self.redis.pipeline(transaction=False)
+
+        for message in self.messages:
+            pipe.eval(*get_publish_event_args('events', message, self.replay_buffer_size))
+
+        for event in self.aggregated.values():
+            pipe.eval(*get_publish_event_args('events', dumps(event), self.replay_buffer_size))
+
+        pipe.execute()
+
+        self.messages = []
+        self.aggregated.clear()
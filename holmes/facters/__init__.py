@@ -5,6 +5,10 @@ import urlparse
 from holmes.utils import is_valid
 
 
+def get_content_sizes(content):
+    return len(content) / 1024.0, len(content.encode('zip')) / 1024.0
+
+
 class Baser(object):
 
     def __init__(self, reviewer):
@@ -51,6 +55,9 @@ class Baser(object):
     def add_fact(self, key, value):
         self.reviewer.add_fact(key, value)
 
+    def run_in_process(self, handler, method, *args):
+        self.reviewer.run_in_process(handler, method, *args)
+
 
 class Facter(Baser):
 
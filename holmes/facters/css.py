@@ -3,7 +3,7 @@
 
 import logging
 
-from holmes.facters import Facter
+from holmes.facters import Facter, get_content_sizes
 
 
 class CSSFacter(Facter):
@@ -87,12 +87,9 @@ class CSSFacter(Facter):
         self.review.data['page.css'].add((url, response))
 
         if response.text:
-            size_css = len(response.text) / 1024.0
-            size_gzip = len(self.to_gzip(response.text)) / 1024.0
-        else:
-            size_css = 0
-            size_gzip = 0
+            self.run_in_process(self.handle_sizes_loaded, get_content_sizes, response.text)
 
+    def handle_sizes_loaded(self, (size_css, size_gzip)):
         self.review.facts['total.size.css']['value'] += size_css
         self.review.data['total.size.css'] += size_css
 
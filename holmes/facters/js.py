@@ -3,7 +3,7 @@
 
 import logging
 
-from holmes.facters import Facter
+from holmes.facters import Facter, get_content_sizes
 
 
 class JSFacter(Facter):
@@ -85,12 +85,9 @@ class JSFacter(Facter):
         self.review.data['page.js'].add((url, response))
 
         if response.text:
-            size_js = len(response.text) / 1024.0
-            size_gzip = len(self.to_gzip(response.text)) / 1024.0
-        else:
-            size_js = 0
-            size_gzip = 0
+            self.run_in_process(self.handle_sizes_loaded, get_content_sizes, response.text)
 
+    def handle_sizes_loaded(self, (size_js, size_gzip)):
         self.review.facts['total.size.js']['value'] += size_js
         self.review.data['total.size.js'] += size_js
 
@@ -5,11 +5,32 @@ import logging
 import re
 import lxml.etree
 
-from holmes.facters import Facter
+from holmes.facters import Facter, get_content_sizes
 
 
 ROBOTS_SITEMAP = re.compile('Sitemap:\s+(.*)')
 
+NAMESPACES = [
+    ('sm', 'http://www.sitemaps.org/schemas/sitemap/0.9'),
+]
+
+
+def parse_sitemap(text):
+    size_sitemap, size_gzip = get_content_sizes(text)
+    tree = lxml.etree.fromstring(text)
+
+    sitemaps = []
+    for sitemap in tree.xpath('//sm:sitemap | //sitemap', namespaces=NAMESPACES):
+        for loc in sitemap.xpath('sm:loc | loc', namespaces=NAMESPACES):
+            sitemaps.append(loc.text.strip())
+
+    urls = []
+    for sitemap in tree.xpath('//sm:url | //url', namespaces=NAMESPACES):
+        for loc in sitemap.xpath('sm:loc | loc', namespaces=NAMESPACES):
+            urls.append(loc.text.strip())
+
+    return size_sitemap, size_gzip, sitemaps, urls
+
 
 class SitemapFacter(Facter):
 
@@ -84,43 +105,32 @@ class SitemapFacter(Facter):
         logging.debug('Got sitemap %s with status %s' % (url, response.status_code))
         self.review.data['sitemap.data'][url] = response
 
-        namespaces = [
-            ('sm', 'http://www.sitemaps.org/schemas/sitemap/0.9'),
-        ]
-
         if response.status_code > 399 or response.text is None or not response.text.strip():
             return
 
-        self.review.facts['total.sitemap.indexes']['value'] += 1
+        self.run_in_process(self.handle_sitemap_parsed(url), parse_sitemap, response.text)
 
-        size_sitemap = len(response.text) / 1024.0
-        size_gzip = len(self.to_gzip(response.text)) / 1024.0
+    def handle_sitemap_parsed(self, url):
+        def handle((size_sitemap, size_gzip, sitemaps, urls)):
+            self.review.facts['total.sitemap.indexes']['value'] += 1
 
-        self.review.data['sitemap.files.urls'][url] = 0
-        self.review.data['sitemap.files.size'][url] = size_sitemap
-        self.review.data['sitemap.urls'][url] = set()
+            self.review.data['sitemap.files.urls'][url] = len(sitemaps) + len(urls)
+            self.review.data['sitemap.files.size'][url] = size_sitemap
+            self.review.data['sitemap.urls'][url] = set(urls)
 
-        self.review.facts['total.size.sitemap']['value'] += size_sitemap
-        self.review.data['total.size.sitemap'] += size_sitemap
+            self.review.facts['total.size.sitemap']['value'] += size_sitemap
+            self.review.data['total.size.sitemap'] += size_sitemap
 
-        self.review.facts['total.size.sitemap.gzipped']['value'] += size_gzip
-        self.review.data['total.size.sitemap.gzipped'] += size_gzip
+            self.review.facts['total.size.sitemap.gzipped']['value'] += size_gzip
+            self.review.data['total.size.sitemap.gzipped'] += size_gzip
 
-        tree = lxml.etree.fromstring(response.text)
+            self.review.facts['total.sitemap.urls']['value'] += len(urls)
 
-        for sitemap in tree.xpath('//sm:sitemap | //sitemap', namespaces=namespaces):
-            for loc in sitemap.xpath('sm:loc | loc', namespaces=namespaces):
-                loc = loc.text.strip()
+            for loc in sitemaps:
                 self.review.data['sitemap.files'].add(loc)
-                self.review.data['sitemap.files.urls'][url] += 1
                 self.async_get(loc, self.handle_sitemap_loaded)
 
-        for sitemap in tree.xpath('//sm:url | //url', namespaces=namespaces):
-            for loc in sitemap.xpath('sm:loc | loc', namespaces=namespaces):
-                loc = loc.text.strip()
-                self.review.data['sitemap.urls'][url].add(loc)
-                self.review.data['sitemap.files.urls'][url] += 1
-                self.review.facts['total.sitemap.urls']['value'] += 1
+        return handle
 
     def handle_robots_loaded(self, url, response):
         sitemaps = self.get_sitemaps(response)
@@ -2,16 +2,74 @@
 # -*- coding: utf-8 -*-
 
 import logging
+import hashlib
+from functools import wraps
+from datetime import datetime
 
 from ujson import dumps
-from tornado.web import RequestHandler
+from tornado import gen
+from tornado.concurrent import Future
+from tornado.web import RequestHandler, HTTPError
 
 from holmes import __version__
+from holmes.utils import decode_cursor
+
+
+def cached_response(name):
+    '''Caches the json written by the decorated GET for the number of seconds
+    configured for `name` in RESPONSE_CACHE_EXPIRATION_IN_SECONDS, serving
+    it with a stable etag. Concurrent identical requests in this process
+    wait for the one being computed instead of computing it again.'''
+
+    def decorator(method):
+        @gen.coroutine
+        @wraps(method)
+        def wrapper(self, *args, **kw):
+            expiration = self.application.config.RESPONSE_CACHE_EXPIRATION_IN_SECONDS.get(name)
+
+            if not expiration:
+                result = method(self, *args, **kw)
+                if isinstance(result, Future):
+                    yield result
+                return
+
+            key = 'response-%s-%s' % (name, self.request.uri)
+            pending = self.cache.pending_responses
+
+            # registered before the first yield, so of the requests arriving
+            # together only one reads the cache and computes the response
+            while key in pending:
+                yield pending[key]
+
+            future = pending[key] = Future()
+
+            try:
+                response = yield self.cache.get_response(key)
+
+                if response is not None:
+                    etag, body = response
+                    self.write_json_body(body, etag)
+                    return
+
+                self._response_cache = (key, expiration)
+
+                result = method(self, *args, **kw)
+                if isinstance(result, Future):
+                    yield result
+            finally:
+                if pending.get(key) is future:
+                    del pending[key]
+                future.set_result(None)
+
+        return wrapper
+
+    return decorator
 
 
 class BaseHandler(RequestHandler):
     def initialize(self, *args, **kw):
         super(BaseHandler, self).initialize(*args, **kw)
+        self._response_cache = None
 
     def log_exception(self, typ, value, tb):
         for handler in self.application.error_handlers:
@@ -47,8 +105,59 @@ class BaseHandler(RequestHandler):
         self.set_header('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
 
     def write_json(self, obj):
+        body = dumps(obj)
+
+        if self._response_cache is None:
+            self.set_header("Content-Type", "application/json")
+            self.write(body)
+            return
+
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+
+        if self.get_status() == 200:
+            key, expiration = self._response_cache
+            self.cache.set_response(key, etag, body, expiration)
+
+        self.write_json_body(body, etag)
+
+    def write_json_body(self, body, etag):
+        self.set_header('Etag', etag)
+
+        if etag in self.request.headers.get('If-None-Match', ''):
+            self.set_status(304)
+            return
+
         self.set_header("Content-Type", "application/json")
-        self.write(dumps(obj))
+        self.write(body)
+
+    def get_date_argument(self, name, default=None):
+        value = self.get_argument(name, None)
+
+        if not value:
+            return default
+
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise HTTPError(400, 'Invalid date for %s: %s' % (name, value))
+
+    def get_cursor_argument(self, *types):
+        value = self.get_argument('cursor', None)
+
+        if not value:
+            return None
+
+        cursor = decode_cursor(value)
+
+        # cursors of other endpoints decode fine but have another shape
+        if cursor is None or len(cursor) != len(types) or \
+                not all(isinstance(item, kind) for item, kind in zip(cursor, types)):
+            raise HTTPError(400, 'Invalid cursor: %s' % value)
+
+        return cursor
+
+    def run_on_db_executor(self, method, *args, **kw):
+        return self.application.db_executor.run(method, *args, **kw)
 
     @property
     def cache(self):
@@ -62,7 +171,15 @@ class BaseHandler(RequestHandler):
 
         #return self._session
 
+    @property
+    def read_db(self):
+        return self.application.db_router.read_db
+
     @property
     def girl(self):
         return self.application.girl
 
+    def get_material(self, name):
+        # read counts drive how often the material worker refreshes it
+        self.cache.increment_material_reads(name)
+        return self.application.local_cache.get_or_set('material-%s' % name, lambda: self.girl.get(name))
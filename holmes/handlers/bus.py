@@ -2,9 +2,11 @@
 # -*- coding: utf-8 -*-
 
 import logging
+from collections import deque
 from uuid import uuid4
 
 from tornado.websocket import WebSocketHandler
+from ujson import dumps
 
 
 class EventBusHandler(WebSocketHandler):
@@ -13,12 +15,90 @@ class EventBusHandler(WebSocketHandler):
 
     def open(self):
         self.uuid = uuid4()
+        self.pending_frames = deque(maxlen=self.application.config.EVENT_BUS_MAX_PENDING_FRAMES)
+        self.dropped_frames = 0
         logging.debug("WebSocket opened.")
-        self.application.event_bus.subscribe('events', self.uuid, self.async_callback(self.on_event))
 
-    def on_event(self, message):
-        if self.ws_connection is not None:
-            self.write_message(message)
+        event_bus = self.application.event_bus
+        cursor = self.get_argument('cursor', None)
+
+        # frames sent while the missed events are read are held back until then
+        self.resuming_frames = None
+        if cursor:
+            self.resuming_frames = []
+
+        event_bus.subscribe('events', self.uuid, self.async_callback(self.on_event))
+
+        if cursor:
+            event_bus.get_frames_since('events', cursor, self.async_callback(self.resume))
+        else:
+            # new clients start from here
+            self.write_cursor(event_bus.get_cursor('events'), reload=False)
+
+    def resume(self, result):
+        frames, self.resuming_frames = self.resuming_frames, None
+
+        if self.ws_connection is None:
+            return
+
+        if result is None:
+            # the client missed more than is kept and reloads
+            self.write_cursor(self.application.event_bus.get_cursor('events'), reload=True)
+            return
+
+        frame, sequence = result
+
+        if frame is not None:
+            self.write_message(frame)
+
+        for frame, first_sequence, last_sequence in frames:
+            if last_sequence <= sequence:
+                continue
+
+            if first_sequence is not None and first_sequence <= sequence:
+                # part of this frame was already replayed
+                self.write_cursor(self.application.event_bus.get_cursor('events'), reload=True)
+                return
+
+            self.on_event(frame, first_sequence, last_sequence)
+
+    def write_cursor(self, cursor, reload):
+        self.write_message(dumps({'cursor': cursor, 'reload': reload, 'events': []}))
+
+    def on_event(self, frame, first_sequence=None, last_sequence=None):
+        if self.ws_connection is None:
+            return
+
+        if self.resuming_frames is not None:
+            self.resuming_frames.append((frame, first_sequence, last_sequence))
+            return
+
+        if len(self.pending_frames) == self.pending_frames.maxlen:
+            self.dropped_frames += 1
+
+        self.pending_frames.append(frame)
+        self.write_pending_frames()
+
+    def write_pending_frames(self):
+        if self.ws_connection is None or self.stream.closed():
+            return
+
+        # slow clients keep only the latest frames until they catch up
+        if self.stream.writing():
+            return
+
+        if self.dropped_frames:
+            self.write_cursor(self.application.event_bus.get_cursor('events'), reload=True)
+            self.pending_frames.clear()
+            self.dropped_frames = 0
+
+        while self.pending_frames:
+            self.write_message(self.pending_frames.popleft())
+
+        # write_message takes no callback in this tornado, so an empty write
+        # tells when the buffer is drained and frames queued meanwhile can go
+        if self.stream.writing():
+            self.stream.write(b'', self.async_callback(self.write_pending_frames))
 
     def on_close(self):
         if hasattr(self, 'uuid'):
@@ -4,14 +4,24 @@
 from tornado.gen import coroutine
 
 from holmes.models import Domain, Request
-from holmes.handlers import BaseHandler
+from holmes.utils import encode_cursor
+from holmes.handlers import BaseHandler, cached_response
+
+
+class BaseDomainHandler(BaseHandler):
+    def get_domain(self, domain_name):
+        # the domain comes back detached from the executor's session, which
+        # is fine as handlers only read its columns
+        return self.run_on_db_executor(lambda db: Domain.get_domain_by_name(domain_name, db))
 
 
 class DomainsHandler(BaseHandler):
 
     @coroutine
     def get(self):
-        domains = self.db.query(Domain).order_by(Domain.name.asc()).all()
+        domains = yield self.run_on_db_executor(
+            lambda db: db.query(Domain).order_by(Domain.name.asc()).all()
+        )
 
         if not domains:
             self.write("[]")
@@ -32,37 +42,41 @@ class DomainsHandler(BaseHandler):
 
 class DomainsFullDataHandler(BaseHandler):
 
-    @coroutine
+    @cached_response('domains-details')
     def get(self):
-        result = self.girl.get('domains_details')
+        result = self.get_material('domains_details')
         self.write_json(result)
 
 
-class DomainDetailsHandler(BaseHandler):
+class DomainDetailsHandler(BaseDomainHandler):
 
     @coroutine
     def get(self, domain_name):
-        domain = Domain.get_domain_by_name(domain_name, self.db)
+        domain = yield self.get_domain(domain_name)
 
         if not domain:
             self.set_status(404, 'Domain %s not found' % domain_name)
             return
 
-        page_count = yield self.cache.get_page_count(domain)
-        review_count = yield self.cache.get_active_review_count(domain)
-        violation_count = yield self.cache.get_violation_count(domain)
+        counts = yield self.cache.get_domain_counts(domain)
+
+        page_count = counts['page-count']
+        review_count = counts['active-review-count']
+        violation_count = counts['violation-count']
 
-        bad_request_count = yield self.cache.get_bad_request_count(domain)
-        good_request_count = yield self.cache.get_good_request_count(domain)
+        bad_request_count = counts['bad-request-count']
+        good_request_count = counts['good-request-count']
         total_request_count = good_request_count + bad_request_count
         if total_request_count > 0:
             error_percentage = round(float(bad_request_count) / total_request_count * 100, 2)
         else:
             error_percentage = 0
 
-        response_time_avg = yield self.cache.get_response_time_avg(domain)
+        response_time_avg = counts['response-time-avg']
 
-        status_code_info = Request.get_status_code_info(domain_name, self.db)
+        status_code_info = yield self.run_on_db_executor(
+            lambda db: Request.get_status_code_info(domain_name, db)
+        )
 
         if page_count > 0:
             review_percentage = round(float(review_count) / page_count * 100, 2)
@@ -86,16 +100,21 @@ class DomainDetailsHandler(BaseHandler):
         self.write_json(domain_json)
 
 
-class DomainViolationsPerDayHandler(BaseHandler):
+class DomainViolationsPerDayHandler(BaseDomainHandler):
 
+    @coroutine
     def get(self, domain_name):
-        domain = Domain.get_domain_by_name(domain_name, self.db)
+        domain = yield self.get_domain(domain_name)
 
         if not domain:
             self.set_status(404, 'Domain %s not found' % domain_name)
             return
 
-        violations_per_day = domain.get_violations_per_day(self.db)
+        violations_per_day = yield self.run_on_db_executor(
+            domain.get_violations_per_day,
+            from_date=self.get_date_argument('from_date'),
+            to_date=self.get_date_argument('to_date')
+        )
 
         domain_json = {
             "id": domain.id,
@@ -107,25 +126,27 @@ class DomainViolationsPerDayHandler(BaseHandler):
         self.write_json(domain_json)
 
 
-class DomainReviewsHandler(BaseHandler):
+class DomainReviewsHandler(BaseDomainHandler):
 
     @coroutine
     def get(self, domain_name):
         term = self.get_argument('term', None)
         current_page = int(self.get_argument('current_page', 1))
         page_size = int(self.get_argument('page_size', 10))
+        cursor = self.get_cursor_argument(int, int)
 
-        domain = Domain.get_domain_by_name(domain_name, self.db)
+        domain = yield self.get_domain(domain_name)
 
         if not domain:
             self.set_status(404, 'Domain %s not found' % domain_name)
             return
 
-        reviews = domain.get_active_reviews(
-            self.db,
+        reviews = yield self.run_on_db_executor(
+            domain.get_active_reviews,
             url_starts_with=term,
             current_page=current_page,
-            page_size=page_size
+            page_size=page_size,
+            cursor=cursor
         )
 
         if term:
@@ -147,14 +168,18 @@ class DomainReviewsHandler(BaseHandler):
                 "reviewId": str(page.last_review_uuid)
             })
 
+        if reviews and len(reviews) == page_size:
+            last = reviews[-1]
+            result['nextCursor'] = encode_cursor(last.violations_count, last.id)
+
         self.write_json(result)
 
 
-class DomainGroupedViolationsHandler(BaseHandler):
+class DomainGroupedViolationsHandler(BaseDomainHandler):
 
     @coroutine
     def get(self, domain_name):
-        domain = Domain.get_domain_by_name(domain_name, self.db)
+        domain = yield self.get_domain(domain_name)
 
         if not domain:
             self.set_status(404, 'Domain %s not found' % domain_name)
@@ -162,7 +187,7 @@ class DomainGroupedViolationsHandler(BaseHandler):
 
         violation_defs = self.application.violation_definitions
 
-        grouped_violations = self.girl.get('violation_count_by_category_for_domains')
+        grouped_violations = self.get_material('violation_count_by_category_for_domains')
 
         total = 0
         violations = []
@@ -187,11 +212,11 @@ class DomainGroupedViolationsHandler(BaseHandler):
         self.write_json(result)
 
 
-class DomainTopCategoryViolationsHandler(BaseHandler):
+class DomainTopCategoryViolationsHandler(BaseDomainHandler):
 
     @coroutine
     def get(self, domain_name, key_category_id):
-        domain = Domain.get_domain_by_name(domain_name, self.db)
+        domain = yield self.get_domain(domain_name)
 
         if not domain:
             self.set_status(404, 'Domain %s not found' % domain_name)
@@ -235,6 +260,8 @@ class DomainsChangeStatusHandler(BaseHandler):
 
         domain.is_active = not domain.is_active
 
+        yield self.cache.mark_domain_dirty(domain)
+
     @coroutine
     def options(self, domain_name):
         super(DomainsChangeStatusHandler, self).options()
@@ -13,10 +13,12 @@ class LimiterHandler(BaseHandler):
     def get(self):
         limiters = Limiter.get_all(self.db)
 
+        usages = yield self.cache.get_limits_usage([limit.url for limit in limiters])
+
         result = []
 
-        for limit in limiters:
-            current_value = yield self.cache.get_limit_usage(limit.url) or 0
+        for limit, current_value in zip(limiters, usages):
+            current_value = current_value or 0
 
             percentage = 0
             if limit.value > 0:
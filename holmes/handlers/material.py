@@ -0,0 +1,23 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from tornado.gen import coroutine
+
+from holmes.handlers import BaseHandler
+
+
+class MaterialsHandler(BaseHandler):
+    @coroutine
+    def get(self):
+        stats = yield self.cache.get_material_stats()
+
+        result = []
+
+        for name, item in stats.items():
+            item['name'] = name
+            result.append(item)
+
+        # the materials costing the database the most time come first
+        result.sort(key=lambda item: item['totalComputationTime'], reverse=True)
+
+        self.write_json(result)
@@ -7,7 +7,7 @@ from tornado import gen
 from ujson import loads
 
 from holmes.models import Page, Review
-from holmes.handlers import BaseHandler
+from holmes.handlers import BaseHandler, cached_response
 
 
 class PageHandler(BaseHandler):
@@ -70,6 +70,7 @@ class PageHandler(BaseHandler):
 
 class PageReviewsHandler(BaseHandler):
 
+    @gen.coroutine
     def get(self, uuid='', limit=10):
         uuid = UUID(uuid)
 
@@ -79,10 +80,7 @@ class PageReviewsHandler(BaseHandler):
             self.set_status(404, 'Page UUID [%s] not found' % uuid)
             return
 
-        reviews = self.db.query(Review) \
-            .filter(Review.page == page) \
-            .filter(Review.is_complete == True) \
-            .order_by(Review.completed_date.desc())[:limit]
+        reviews = yield self.run_on_db_executor(Review.get_completed_reviews_for_page, page.id, limit=limit)
 
         result = []
         for review in reviews:
@@ -104,7 +102,11 @@ class PageViolationsPerDayHandler(BaseHandler):
             self.set_status(404, 'Page UUID [%s] not found' % uuid)
             return
 
-        violations_per_day = page.get_violations_per_day(self.db)
+        violations_per_day = page.get_violations_per_day(
+            self.read_db,
+            from_date=self.get_date_argument('from_date'),
+            to_date=self.get_date_argument('to_date')
+        )
 
         page_json = {
             "violations": violations_per_day
@@ -114,6 +116,7 @@ class PageViolationsPerDayHandler(BaseHandler):
 
 
 class NextJobHandler(BaseHandler):
+    @cached_response('next-jobs')
     @gen.coroutine
     def get(self):
         current_page = int(self.get_argument('current_page', 1))
@@ -126,7 +129,7 @@ class NextJobHandler(BaseHandler):
             page_size=page_size
         )
 
-        review_count = self.girl.get('next_jobs_count')
+        review_count = self.get_material('next_jobs_count')
 
         result = {'reviewCount': review_count}
         pages = []
@@ -4,7 +4,7 @@
 import datetime
 from tornado.gen import coroutine
 
-from holmes.utils import get_status_code_title
+from holmes.utils import get_status_code_title, encode_cursor
 from holmes.models import Request
 from holmes.handlers import BaseHandler
 
@@ -28,19 +28,21 @@ class RequestDomainHandler(BaseHandler):
 
         current_page = int(self.get_argument('current_page', 1))
         page_size = int(self.get_argument('page_size', 10))
+        cursor = self.get_cursor_argument(datetime.date, int)
 
         requests = Request.get_requests_by_status_code(
             domain_name,
             status_code,
-            self.db,
+            self.read_db,
             current_page=current_page,
-            page_size=page_size
+            page_size=page_size,
+            cursor=cursor
         )
 
         requests_count = Request.get_requests_by_status_count(
             domain_name,
             status_code,
-            self.db
+            self.read_db
         )
 
         result = {
@@ -57,6 +59,10 @@ class RequestDomainHandler(BaseHandler):
                 'completed_date': request.completed_date
             })
 
+        if requests and len(requests) == page_size:
+            last = requests[-1]
+            result['nextCursor'] = encode_cursor(last.completed_date, last.id)
+
         self.write_json(result)
 
 
@@ -65,19 +71,26 @@ class LastRequestsHandler(BaseHandler):
     def get(self):
         current_page = int(self.get_argument('current_page', 1))
         page_size = int(self.get_argument('page_size', 10))
+        cursor = self.get_cursor_argument(int)
 
-        requests = Request.get_last_requests(
-            self.db,
-            current_page=current_page,
-            page_size=page_size
-        )
+        if cursor is None:
+            requests = yield self.cache.get_last_requests(current_page=current_page, page_size=page_size)
+        else:
+            requests = [
+                dict(request.to_dict(), id=request.id)
+                for request in Request.get_last_requests(self.read_db, page_size=page_size, cursor=cursor)
+            ]
 
         requests_count = yield self.cache.get_requests_count()
 
         result = {'requestsCount': requests_count, 'requests': []}
 
         for request in requests:
-            result['requests'].append(request.to_dict())
+            request_id = request.pop('id')
+            result['requests'].append(request)
+
+        if requests and len(requests) == page_size:
+            result['nextCursor'] = encode_cursor(request_id)
 
         self.write_json(result)
 
@@ -86,7 +99,7 @@ class RequestsInLastDayHandler(BaseHandler):
     @coroutine
     def get(self):
         from_date = datetime.datetime.utcnow() - datetime.timedelta(days=1)
-        requests = Request.get_requests_count_by_status_in_period_of_days(self.db, from_date=from_date)
+        requests = Request.get_requests_count_by_status_in_period_of_days(self.read_db, from_date=from_date)
 
         result = []
         for request in requests:
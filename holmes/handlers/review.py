@@ -4,7 +4,10 @@
 import datetime
 from uuid import UUID
 
-from holmes.models import Review
+from tornado import gen
+
+from holmes import __version__
+from holmes.models import Page
 from holmes.handlers import BaseHandler
 
 
@@ -17,46 +20,48 @@ class BaseReviewHandler(BaseHandler):
 
 
 class ReviewHandler(BaseReviewHandler):
+    @gen.coroutine
     def get(self, page_uuid, review_uuid):
         review = None
         if self._parse_uuid(review_uuid):
-            review = Review.by_uuid(review_uuid, self.db)
+            review = yield self.cache.get_review_document(review_uuid)
 
-        if not review:
+        if not review or not review['page'] or review['page']['uuid'] != page_uuid:
             self.set_status(404, 'Review with uuid of %s not found!' % review_uuid)
             return
 
-        result = review.to_dict(self.application.fact_definitions, self.application.violation_definitions)
-        result.update({
-            'violationPoints': review.get_violation_points(),
-            'violationCount': review.violation_count,
-        })
+        if review['isComplete']:
+            # completed review documents never change within a release
+            etag = '"%s-%s"' % (review_uuid, __version__)
+            self.set_header('Etag', etag)
+
+            if etag in self.request.headers.get('If-None-Match', ''):
+                self.set_status(304)
+                return
+
+        page_fields = yield self.run_on_db_executor(Page.get_live_fields, page_uuid)
+        review['page'].update(page_fields)
 
-        self.write_json(result)
+        self.write_json(review)
 
 
 class LastReviewsHandler(BaseReviewHandler):
+    @gen.coroutine
     def get(self):
-        reviews = Review.get_last_reviews(self.db)
-
-        reviews_json = []
-        for review in reviews:
-            review_dict = review.to_dict(self.application.fact_definitions, self.application.violation_definitions)
-            data = {
-                'violationCount': review.violation_count,
-            }
-            review_dict.update(data)
-            reviews_json.append(review_dict)
+        reviews_json = yield self.cache.get_last_reviews()
 
         self.write_json(reviews_json)
 
 
 class ReviewsInLastHourHandler(BaseReviewHandler):
+    @gen.coroutine
     def get(self):
-        from_date = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
-        count, first_date = Review.get_reviews_count_in_period(
-            self.db,
-            from_date=from_date
+        to_date = datetime.datetime.utcnow()
+        from_date = to_date - datetime.timedelta(hours=1)
+
+        count, first_date = yield self.cache.get_reviews_count_in_period(
+            from_date=from_date,
+            to_date=to_date
         )
 
         if first_date:
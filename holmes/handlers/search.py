@@ -29,3 +29,32 @@ class SearchHandler(BaseHandler):
             "url": page.url,
             "reviewId": str(page.last_review.uuid)
         })
+
+
+class SearchAutocompleteHandler(BaseHandler):
+
+    def get(self):
+        term = self.get_argument('term', '').strip()
+        config = self.application.config
+
+        try:
+            limit = int(self.get_argument('limit', config.SEARCH_RESULTS_LIMIT))
+        except ValueError:
+            limit = config.SEARCH_RESULTS_LIMIT
+
+        pages = Page.search_by_url(
+            self.db,
+            term,
+            limit=max(min(limit, config.SEARCH_RESULTS_LIMIT), 0),
+            candidates_limit=config.SEARCH_CANDIDATES_LIMIT,
+            domains_limit=config.SEARCH_DOMAINS_LIMIT
+        )
+
+        self.write_json([
+            {
+                "uuid": str(page.uuid),
+                "url": page.url,
+                "reviewId": str(page.last_review_uuid),
+                "violationCount": page.violations_count
+            } for page in pages
+        ])
@@ -1,19 +1,22 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+from datetime import datetime
+
 from tornado import gen
 
-from holmes.handlers import BaseHandler
+from holmes.handlers import BaseHandler, cached_response
 from holmes.models import Review, Violation
+from holmes.utils import encode_cursor
 
 
 class MostCommonViolationsHandler(BaseHandler):
 
+    @cached_response('most-common-violations')
     @gen.coroutine
     def get(self):
         violations = yield self.cache.get_most_common_violations(
-            self.application.violation_definitions,
-            self.application.config.get('MOST_COMMON_VIOLATIONS_SAMPLE_LIMIT')
+            self.application.violation_definitions
         )
 
         result = []
@@ -49,22 +52,24 @@ class ViolationHandler(BaseHandler):
         page_size = int(self.get_argument('page_size', 10))
         domain_filter = self.get_argument('domain_filter', None)
         page_filter = self.get_argument('page_filter', None)
+        cursor = self.get_cursor_argument(datetime, int)
 
         violations = self.application.violation_definitions
         violation_title = violations[key_name]['title']
         key_id = violations[key_name]['key'].id
 
-        reviews = Review.get_by_violation_key_name(
-            self.db,
+        reviews = yield self.run_on_db_executor(
+            Review.get_by_violation_key_name,
             key_id,
             current_page=current_page,
             page_size=page_size,
             domain_filter=domain_filter,
             page_filter=page_filter,
+            cursor=cursor
         )
 
-        reviews_count = Review.count_by_violation_key_name(
-            self.db,
+        reviews_count = yield self.run_on_db_executor(
+            Review.count_by_violation_key_name,
             key_id,
             domain_filter=domain_filter,
             page_filter=page_filter
@@ -87,6 +92,10 @@ class ViolationHandler(BaseHandler):
             'reviewsCount': reviews_count
         }
 
+        if reviews and len(reviews) == page_size:
+            last = reviews[-1]
+            violation['nextCursor'] = encode_cursor(last.completed_date, last.id)
+
         self.write_json(violation)
         self.finish()
 
@@ -4,7 +4,7 @@
 import sqlalchemy as sa
 
 from holmes.models.worker import Worker
-from holmes.handlers import BaseHandler
+from holmes.handlers import BaseHandler, cached_response
 
 
 class WorkersHandler(BaseHandler):
@@ -18,6 +18,7 @@ class WorkersHandler(BaseHandler):
 
 class WorkersInfoHandler(BaseHandler):
 
+    @cached_response('workers-info')
     def get(self):
         total_workers = self.db \
             .query(sa.func.count(Worker.id).label('count')) \
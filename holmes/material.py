@@ -2,8 +2,10 @@
 # -*- coding: utf-8 -*-
 
 import sys
+from time import time
 from uuid import uuid4
-from functools import partial
+
+from ujson import dumps
 
 from holmes.cli import BaseCLI
 from holmes.models.domain import Domain
@@ -11,22 +13,200 @@ from holmes.models.page import Page
 from holmes.models.violation import Violation
 
 
-def configure_materials(girl, db, config):
+class DomainsDetailsMaterial(object):
+    '''Recomputes the domains details only for the domains marked as dirty
+    since the last run, patching the document stored by whichever material
+    worker refreshed it last. Without a cache every run is a full refresh.'''
+
+    def __init__(self, db_router, config, cache=None, storage=None, key='domains_details'):
+        self.db_router = db_router
+        self.cache = cache
+        self.storage = storage
+        self.key = key
+        self.full_refresh_key = '%s-full-refresh' % key
+        self.full_refresh_interval = config.DOMAINS_DETAILS_FULL_REFRESH_IN_SECONDS
+
+    def get_time(self):
+        return time()
+
+    def __call__(self):
+        if self.cache is None:
+            return Domain.get_domains_details(self.db_router.read_db)
+
+        details = self.get_stored_details()
+
+        if details is None:
+            details = Domain.get_domains_details(self.db_router.read_db)
+            self.cache.set_material_next_refresh(self.full_refresh_key, self.get_time() + self.full_refresh_interval)
+
+        # the replica may not have the latest writes yet, so dirty domains are
+        # patched in even right after a full refresh
+        domain_names = self.cache.get_dirty_domains()
+
+        if domain_names:
+            # dirty domains were just written, so they are read from the primary
+            dirty_details = Domain.get_domains_details(self.db_router.db, domain_names=list(domain_names))
+            details = self.patch(details, dirty_details)
+
+            # only removed once patched, so a failed query retries them
+            self.cache.remove_dirty_domains(domain_names)
+
+        return details
+
+    def get_stored_details(self):
+        next_full_refresh = self.cache.get_material_next_refresh(self.full_refresh_key)
+
+        if next_full_refresh is None or self.get_time() >= next_full_refresh:
+            return None
+
+        return self.storage.retrieve(self.key)
+
+    def patch(self, details, dirty_details):
+        details_by_name = dict((item['name'], item) for item in details)
+        details_by_name.update((item['name'], item) for item in dirty_details)
+
+        return [details_by_name[name] for name in sorted(details_by_name.keys())]
+
+
+class MaterialScheduler(object):
+    '''Refreshes each material when its own expiration is due, recording how
+    long it took, how big it is and how often the API read it. Expensive
+    materials nobody reads back off up to MATERIAL_MAX_EXPIRATION_IN_SECONDS
+    and hot ones tighten down to MATERIAL_MIN_EXPIRATION_IN_SECONDS, moving
+    back to their configured expiration once that no longer holds.
+
+    The next refresh of each material is shared in redis, so of many
+    material workers only the first one due refreshes it.'''
+
+    def __init__(self, girl, cache, config):
+        self.girl = girl
+        self.cache = cache
+
+        self.min_expiration = config.MATERIAL_MIN_EXPIRATION_IN_SECONDS
+        self.max_expiration = config.MATERIAL_MAX_EXPIRATION_IN_SECONDS
+        self.expensive_computation = config.MATERIAL_EXPENSIVE_COMPUTATION_IN_SECONDS
+        self.hot_reads_per_minute = config.MATERIAL_HOT_READS_PER_MINUTE
+        self.cold_reads_per_minute = config.MATERIAL_COLD_READS_PER_MINUTE
+
+        self.reads = {}
+        self.stats = {}
+        self.next_refresh = {}
+        self.configured_expiration = {}
+
+    def get_time(self):
+        return time()
+
+    def run(self):
+        for name, count in self.cache.pop_material_reads().items():
+            self.reads[name] = self.reads.get(name, 0) + count
+
+        storage = self.girl.storage
+
+        for key, material in self.girl.materials.items():
+            if not self.is_due(key):
+                continue
+
+            lock = storage.acquire_lock(key, timeout=material.lock_timeout)
+
+            if lock is None:
+                continue
+
+            try:
+                if self.is_shared_due(key):
+                    self.refresh(key, material)
+            finally:
+                storage.release_lock(lock)
+
+    def is_due(self, key):
+        return self.get_time() >= self.next_refresh.get(key, 0) or self.girl.storage.is_expired(key)
+
+    def is_shared_due(self, key):
+        # another material worker may have refreshed it before the lock
+        next_refresh = self.cache.get_material_next_refresh(key)
+
+        if next_refresh is None or self.get_time() >= next_refresh or self.girl.storage.is_expired(key):
+            return True
+
+        self.next_refresh[key] = next_refresh
+        return False
+
+    def refresh(self, key, material):
+        started_at = self.get_time()
+        value = material.get()
+        computation_time = self.get_time() - started_at
+
+        # kept past its expiration so readers never miss between refreshes
+        self.girl.storage.store(
+            key, value, expiration=material.expiration, grace_period=2 * material.expiration
+        )
+
+        self.record(key, material, computation_time, len(dumps(value)))
+
+    def record(self, key, material, computation_time, payload_size):
+        now = self.get_time()
+        configured_expiration = self.configured_expiration.setdefault(key, material.expiration)
+        stats = self.stats.setdefault(key, {
+            'reads': 0,
+            'computations': 0,
+            'totalComputationTime': 0.0
+        })
+
+        reads = self.reads.pop(key, 0)
+        reads_per_minute = None
+
+        if 'computedAt' in stats and now > stats['computedAt']:
+            reads_per_minute = reads * 60.0 / (now - stats['computedAt'])
+            material.expiration = self.get_expiration(
+                material.expiration, computation_time, reads_per_minute, configured_expiration
+            )
+
+        stats.update({
+            'reads': stats['reads'] + reads,
+            'readsPerMinute': reads_per_minute,
+            'computations': stats['computations'] + 1,
+            'computationTime': computation_time,
+            'totalComputationTime': stats['totalComputationTime'] + computation_time,
+            'payloadSize': payload_size,
+            'expiration': material.expiration,
+            'computedAt': now
+        })
+
+        self.next_refresh[key] = now + material.expiration
+        self.cache.set_material_next_refresh(key, self.next_refresh[key])
+        self.cache.set_material_stats(key, stats)
+
+    def get_expiration(self, expiration, computation_time, reads_per_minute, configured_expiration):
+        if reads_per_minute >= self.hot_reads_per_minute:
+            return max(self.min_expiration, expiration / 2)
+
+        if computation_time >= self.expensive_computation and reads_per_minute <= self.cold_reads_per_minute:
+            return min(self.max_expiration, expiration * 2)
+
+        if expiration < configured_expiration:
+            return min(configured_expiration, expiration * 2)
+
+        if expiration > configured_expiration:
+            return max(configured_expiration, expiration / 2)
+
+        return expiration
+
+
+def configure_materials(girl, db_router, config, cache=None):
     girl.add_material(
         'domains_details',
-        partial(Domain.get_domains_details, db),
-        30
+        DomainsDetailsMaterial(db_router, config, cache, girl.storage),
+        config.DOMAINS_DETAILS_EXPIRATION_IN_SECONDS
     )
 
     girl.add_material(
         'next_jobs_count',
-        partial(Page.get_next_jobs_count, db, config),
+        lambda: Page.get_next_jobs_count(db_router.read_db, config),
         10
     )
 
     girl.add_material(
         'violation_count_by_category_for_domains',
-        partial(Violation.get_group_by_category_id_for_all_domains, db),
+        lambda: Violation.get_group_by_category_id_for_all_domains(db_router.read_db),
         60
     )
 
@@ -41,10 +221,12 @@ class MaterialWorker(BaseCLI):
         self.connect_to_redis()
 
         self.configure_material_girl()
+        self.scheduler = MaterialScheduler(self.girl, self.cache, self.config)
 
     def do_work(self):
         self.info('Running material girl...')
-        self.girl.run()
+        self.db_router.check_replica_lag()
+        self.scheduler.run()
 
 def main():
     worker = MaterialWorker(sys.argv[1:])
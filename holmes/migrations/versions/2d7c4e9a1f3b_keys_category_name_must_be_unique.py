@@ -0,0 +1,36 @@
+"""Keys category name must be unique
+
+Revision ID: 2d7c4e9a1f3b
+Revises: 5a2e8d1f4b7c
+Create Date: 2014-04-10 11:05:42.310274
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '2d7c4e9a1f3b'
+down_revision = '5a2e8d1f4b7c'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    connection = op.get_bind()
+
+    connection.execute(
+        "UPDATE `keys` k "
+        "JOIN keys_category c ON c.id = k.category_id "
+        "JOIN (SELECT name, MIN(id) AS id FROM keys_category GROUP BY name) f ON f.name = c.name "
+        "SET k.category_id = f.id;"
+    )
+
+    connection.execute(
+        "DELETE c FROM keys_category c "
+        "JOIN keys_category f ON f.name = c.name AND f.id < c.id;"
+    )
+
+    op.create_unique_constraint("uk_keys_category_name", "keys_category", ["name"])
+
+
+def downgrade():
+    op.drop_constraint('uk_keys_category_name', 'keys_category', type_='unique')
@@ -0,0 +1,43 @@
+"""create violations per day table
+
+Revision ID: 3b0f6a1c9d2e
+Revises: 1c9004f0ab21
+Create Date: 2014-04-07 10:12:31.204518
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '3b0f6a1c9d2e'
+down_revision = '1c9004f0ab21'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table(
+        'violations_per_day',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('scope', sa.String(10), nullable=False),
+        sa.Column('scope_id', sa.Integer, nullable=False),
+        sa.Column('day', sa.Date, nullable=False),
+        sa.Column('violation_count', sa.Integer, server_default='0', nullable=False),
+        sa.Column('violation_points', sa.Integer, server_default='0', nullable=False)
+    )
+
+    op.create_unique_constraint('uk_scope_day', 'violations_per_day', ['scope', 'scope_id', 'day'])
+
+    connection = op.get_bind()
+
+    for scope, column in (('page', 'page_id'), ('domain', 'domain_id')):
+        connection.execute(
+            "INSERT INTO violations_per_day (scope, scope_id, day, violation_count, violation_points) "
+            "SELECT '%(scope)s', r.%(column)s, DATE(r.completed_date), COUNT(v.id), SUM(v.points) "
+            "FROM reviews r JOIN violations v ON v.review_id = r.id "
+            "WHERE r.is_complete = 1 "
+            "GROUP BY r.%(column)s, DATE(r.completed_date);" % {'scope': scope, 'column': column}
+        )
+
+
+def downgrade():
+    op.drop_table('violations_per_day')
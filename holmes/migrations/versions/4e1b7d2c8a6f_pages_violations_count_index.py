@@ -0,0 +1,25 @@
+"""index pages by domain and violations count
+
+Revision ID: 4e1b7d2c8a6f
+Revises: 2d7c4e9a1f3b
+Create Date: 2014-04-11 09:42:17.530912
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '4e1b7d2c8a6f'
+down_revision = '2d7c4e9a1f3b'
+
+from alembic import op
+
+
+def upgrade():
+    op.create_index(
+        'idx_pages_domain_violations_count',
+        'pages',
+        ['domain_id', 'violations_count']
+    )
+
+
+def downgrade():
+    op.drop_index('idx_pages_domain_violations_count', 'pages')
@@ -0,0 +1,49 @@
+"""add path to pages and index it
+
+Revision ID: 5a2e8d1f4b7c
+Revises: 3b0f6a1c9d2e
+Create Date: 2014-04-08 14:21:05.118230
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5a2e8d1f4b7c'
+down_revision = '3b0f6a1c9d2e'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column(
+        'pages',
+        sa.Column('path', sa.String(2000), server_default='', nullable=False)
+    )
+
+    connection = op.get_bind()
+    connection.execute(
+        "UPDATE pages SET path = IF("
+        "LOCATE('/', url, LOCATE('://', url) + 3) > 0, "
+        "SUBSTRING(url, LOCATE('/', url, LOCATE('://', url) + 3) + 1), "
+        "'');"
+    )
+
+    op.create_index(
+        'idx_pages_domain_path',
+        'pages',
+        ['domain_id', 'path'],
+        mysql_length={'path': 255}
+    )
+
+    op.create_index(
+        'idx_pages_path',
+        'pages',
+        ['path'],
+        mysql_length={'path': 255}
+    )
+
+
+def downgrade():
+    op.drop_index('idx_pages_path', 'pages')
+    op.drop_index('idx_pages_domain_path', 'pages')
+    op.drop_column('pages', 'path')
@@ -43,3 +43,4 @@ from holmes.models.keys_category import KeysCategory  # NOQA
 from holmes.models.request import Request  # NOQA
 from holmes.models.user import User  # NOQA
 from holmes.models.limiter import Limiter # NOQA
+from holmes.models.violations_per_day import ViolationsPerDay  # NOQA
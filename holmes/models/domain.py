@@ -29,24 +29,33 @@ class Domain(Base):
         }
 
     @classmethod
-    def get_pages_per_domain(cls, db):
+    def get_pages_per_domain(cls, db, domain_ids=None):
         from holmes.models import Page
-        return dict(db.query(Page.domain_id, sa.func.count(Page.id)).group_by(Page.domain_id).all())
+
+        query = db.query(Page.domain_id, sa.func.count(Page.id))
+
+        if domain_ids is not None:
+            query = query.filter(Page.domain_id.in_(domain_ids))
+
+        return dict(query.group_by(Page.domain_id).all())
 
     def get_page_count(self, db):
         from holmes.models import Page
         return db.query(func.count(Page.id)).filter(Page.domain_id == self.id).scalar()
 
     @classmethod
-    def get_violations_per_domain(cls, db):
+    def get_violations_per_domain(cls, db, domain_ids=None):
         from holmes.models import Review, Violation
 
-        violations = db \
+        query = db \
             .query(Review.domain_id, sa.func.count(Violation.id).label('count')) \
             .filter(Violation.review_id == Review.id) \
-            .filter(Review.is_active == True) \
-            .group_by(Review.domain_id) \
-            .all()
+            .filter(Review.is_active == True)
+
+        if domain_ids is not None:
+            query = query.filter(Review.domain_id.in_(domain_ids))
+
+        violations = query.group_by(Review.domain_id).all()
 
         domains = {}
         for domain in violations:
@@ -66,42 +75,14 @@ class Domain(Base):
             result.count
         )
 
-    def get_violations_per_day(self, db):
-        from holmes.models import Review, Violation  # Prevent circular dependency
-
-        violations = db \
-            .query(
-                sa.func.year(Review.completed_date).label('year'),
-                sa.func.month(Review.completed_date).label('month'),
-                sa.func.day(Review.completed_date).label('day'),
-                sa.func.count(Violation.id).label('violation_count'),
-                sa.func.sum(Violation.points).label('violation_points')
-            ).join(
-                Domain, Domain.id == Review.domain_id
-            ).join(
-                Violation, Violation.review_id == Review.id
-            ).filter(Review.is_complete == True).filter(Review.domain_id == self.id) \
-            .group_by(
-                sa.func.year(Review.completed_date),
-                sa.func.month(Review.completed_date),
-                sa.func.day(Review.completed_date),
-            ) \
-            .order_by(Review.completed_date) \
-            .all()
-
-        result = []
+    def get_violations_per_day(self, db, from_date=None, to_date=None):
+        from holmes.models import ViolationsPerDay  # Prevent circular dependency
 
-        for day in violations:
-            dt = "%d-%d-%d" % (day.year, day.month, day.day)
-            result.append({
-                "completedAt": dt,
-                "violation_count": int(day.violation_count),
-                "violation_points": int(day.violation_points)
-            })
-
-        return result
+        return ViolationsPerDay.get_violations_per_day(
+            db, 'domain', self.id, from_date=from_date, to_date=to_date
+        )
 
-    def get_active_reviews(self, db, url_starts_with=None, current_page=1, page_size=10):
+    def get_active_reviews(self, db, url_starts_with=None, current_page=1, page_size=10, cursor=None):
         from holmes.models import Page  # Prevent circular dependency
 
         lower_bound = (current_page - 1) * page_size
@@ -109,18 +90,26 @@ class Domain(Base):
 
         items_query = db \
             .query(
-                Page.url, Page.uuid, Page.last_review_date,
+                Page.id, Page.url, Page.uuid, Page.last_review_date,
                 Page.last_review_uuid, Page.violations_count
             ) \
             .filter(Page.last_review_date != None) \
             .filter(Page.domain == self) \
 
         if url_starts_with:
-            items_query = items_query.filter(Page.url.like('%s%%' % url_starts_with))
+            items_query = Page.filter_by_path(db, items_query, url_starts_with, domain=self)
+
+        items_query = items_query.order_by(Page.violations_count.desc(), Page.id.desc())
 
-        items = items_query.order_by('violations_count desc')[lower_bound:upper_bound]
+        if cursor is not None:
+            violations_count, page_id = cursor
+            items_query = items_query.filter(sa.or_(
+                Page.violations_count < violations_count,
+                sa.and_(Page.violations_count == violations_count, Page.id < page_id)
+            ))
+            return items_query[:page_size]
 
-        return items
+        return items_query[lower_bound:upper_bound]
 
     @classmethod
     def get_domain_by_name(self, domain_name, db):
@@ -132,8 +121,8 @@ class Domain(Base):
         query = db.query(func.count(Review.id))
 
         if url_starts_with:
-            query = query.join(Page, Page.id == Review.page_id) \
-                .filter(Page.url.like('%s%%' % url_starts_with))
+            query = query.join(Page, Page.id == Review.page_id)
+            query = Page.filter_by_path(db, query, url_starts_with, domain=self)
 
         query = query.filter(Review.is_active == True, Review.domain_id == self.id)
 
@@ -172,21 +161,74 @@ class Domain(Base):
         return round(time_avg, 3) if time_avg is not None else 0
 
     @classmethod
-    def get_domains_details(cls, db):
-        domains = db.query(Domain).order_by(Domain.name.asc()).all()
+    def get_active_reviews_per_domain(cls, db, domain_ids=None):
+        from holmes.models import Review
+
+        query = db.query(Review.domain_id, sa.func.count(Review.id)).filter(Review.is_active == True)
+
+        if domain_ids is not None:
+            query = query.filter(Review.domain_id.in_(domain_ids))
+
+        return dict(query.group_by(Review.domain_id).all())
+
+    @classmethod
+    def get_requests_per_domain(cls, db, domain_names=None):
+        from holmes.models import Request
+
+        query = db \
+            .query(
+                Request.domain_name,
+                sa.func.sum(sa.case([(Request.status_code < 400, 1)], else_=0)).label('good_request_count'),
+                sa.func.sum(sa.case([(Request.status_code > 399, 1)], else_=0)).label('bad_request_count'),
+                sa.func.avg(sa.case([(Request.status_code < 400, Request.response_time)])).label('response_time_avg')
+            )
+
+        if domain_names is not None:
+            query = query.filter(Request.domain_name.in_(domain_names))
+
+        requests = query.group_by(Request.domain_name).all()
+
+        domains = {}
+        for item in requests:
+            time_avg = item.response_time_avg
+            domains[item.domain_name] = (
+                int(item.good_request_count or 0),
+                int(item.bad_request_count or 0),
+                round(float(time_avg), 3) if time_avg is not None else 0
+            )
+
+        return domains
+
+    @classmethod
+    def get_domains_details(cls, db, domain_names=None):
+        query = db.query(Domain)
+
+        if domain_names is not None:
+            query = query.filter(Domain.name.in_(domain_names))
+
+        domains = query.order_by(Domain.name.asc()).all()
 
         if not domains:
             return []
 
+        domain_ids = None
+        if domain_names is not None:
+            domain_ids = [domain.id for domain in domains]
+            domain_names = [domain.name for domain in domains]
+
+        pages_per_domain = cls.get_pages_per_domain(db, domain_ids)
+        reviews_per_domain = cls.get_active_reviews_per_domain(db, domain_ids)
+        violations_per_domain = cls.get_violations_per_domain(db, domain_ids)
+        requests_per_domain = cls.get_requests_per_domain(db, domain_names)
+
         result = []
 
         for domain in domains:
-            page_count = domain.get_page_count(db)
-            review_count = domain.get_active_review_count(db)
-            violation_count = domain.get_violation_data(db)
-            good_request_count = domain.get_good_request_count(db)
-            bad_request_count = domain.get_bad_request_count(db)
-            response_time_avg = domain.get_response_time_avg(db)
+            page_count = pages_per_domain.get(domain.id, 0)
+            review_count = reviews_per_domain.get(domain.id, 0)
+            violation_count = violations_per_domain.get(domain.id, 0)
+            good_request_count, bad_request_count, response_time_avg = \
+                requests_per_domain.get(domain.name, (0, 0, 0))
 
             if page_count > 0:
                 review_percentage = round(float(review_count) / page_count * 100, 2)
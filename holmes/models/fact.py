@@ -20,11 +20,18 @@ class Fact(Base):
 
     key_id = sa.Column('key_id', sa.Integer, sa.ForeignKey('keys.id'))
 
-    def to_dict(self, fact_definitions):
-        definition = fact_definitions.get(self.key.name, {})
+    def get_key_name(self, key_names=None):
+        if key_names and self.key_id in key_names:
+            return key_names[self.key_id]
+
+        return self.key.name
+
+    def to_dict(self, fact_definitions, key_names=None):
+        key_name = self.get_key_name(key_names)
+        definition = fact_definitions.get(key_name, {})
         return {
             'title': definition.get('title', 'unknown'),
-            'key': self.key.name,
+            'key': key_name,
             'unit': definition.get('unit', 'value'),
             'value': definition.get('description', lambda value: value)(self.value),
             'category': definition.get('category', 'unknown')
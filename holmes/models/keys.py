@@ -41,3 +41,45 @@ class Key(Base):
                 key = Key(name=key_name, category=category)
 
         return key
+
+    @classmethod
+    def insert_keys(cls, db, *definitions):
+        '''Registers every key and category in the given fact or violation
+        definitions with one bulk upsert each, sets the `key` of each
+        definition and returns the id to name map of the keys.'''
+        from holmes.models import KeysCategory
+
+        categories = {}
+
+        for items in definitions:
+            for name, definition in items.items():
+                if definition.get('category') or name not in categories:
+                    categories[name] = definition.get('category')
+
+        if not categories:
+            return {}
+
+        category_ids = KeysCategory.insert_categories(
+            db, set(category for category in categories.values() if category)
+        )
+
+        # FIXME: ON DUPLICATE KEY UPDATE works only in MySQL.
+        db.execute(
+            'INSERT INTO `keys` (name, category_id) VALUES (:name, :category_id) '
+            'ON DUPLICATE KEY UPDATE category_id = COALESCE(VALUES(category_id), category_id)',
+            [
+                {'name': name, 'category_id': category_ids.get(category)}
+                for name, category in categories.items()
+            ]
+        )
+
+        keys = dict(
+            (key.name, key)
+            for key in db.query(Key).populate_existing().filter(Key.name.in_(categories.keys())).all()
+        )
+
+        for items in definitions:
+            for name, definition in items.items():
+                definition['key'] = keys[name]
+
+        return dict((key.id, key.name) for key in keys.values())
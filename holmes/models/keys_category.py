@@ -9,6 +9,9 @@ from holmes.models import Base
 
 class KeysCategory(Base):
     __tablename__ = "keys_category"
+    __table_args__ = (
+        sa.UniqueConstraint('name', name='uk_keys_category_name'),
+    )
 
     id = sa.Column(sa.Integer, primary_key=True)
     name = sa.Column('name', sa.String(255), nullable=False)
@@ -37,3 +40,23 @@ class KeysCategory(Base):
             category = KeysCategory(name=category_name)
 
         return category
+
+    @classmethod
+    def insert_categories(cls, db, category_names):
+        category_names = list(category_names)
+
+        if not category_names:
+            return {}
+
+        # FIXME: ON DUPLICATE KEY UPDATE works only in MySQL.
+        db.execute(
+            'INSERT INTO keys_category (name) VALUES (:name) '
+            'ON DUPLICATE KEY UPDATE name = VALUES(name)',
+            [{'name': name} for name in category_names]
+        )
+
+        return dict(
+            db.query(KeysCategory.name, KeysCategory.id)
+              .filter(KeysCategory.name.in_(category_names))
+              .all()
+        )
@@ -14,7 +14,7 @@ from ujson import dumps
 from tornado.concurrent import return_future
 
 from holmes.models import Base
-from holmes.utils import get_domain_from_url
+from holmes.utils import get_domain_from_url, get_url_path, get_like_prefix
 
 
 class Page(Base):
@@ -23,6 +23,7 @@ class Page(Base):
     id = sa.Column(sa.Integer, primary_key=True)
     url = sa.Column('url', sa.String(2000), nullable=False)
     url_hash = sa.Column('url_hash', sa.String(128), nullable=False)
+    path = sa.Column('path', sa.String(2000), server_default='', nullable=False)
     uuid = sa.Column('uuid', sa.String(36), default=uuid4, nullable=False)
     created_date = sa.Column('created_date', sa.DateTime, default=datetime.utcnow, nullable=False)
 
@@ -57,49 +58,100 @@ class Page(Base):
     def __repr__(self):
         return str(self)
 
-    def get_violations_per_day(self, db):
-        from holmes.models import Review, Violation  # Prevent circular dependency
+    def get_violations_per_day(self, db, from_date=None, to_date=None):
+        from holmes.models import ViolationsPerDay  # Prevent circular dependency
 
-        violations = db \
-            .query(
-                sa.func.year(Review.completed_date).label('year'),
-                sa.func.month(Review.completed_date).label('month'),
-                sa.func.day(Review.completed_date).label('day'),
-                sa.func.count(Violation.id).label('violation_count'),
-                sa.func.sum(Violation.points).label('violation_points')
-            ).join(
-                Page, Page.id == Review.page_id
-            ).join(
-                Violation, Violation.review_id == Review.id
-            ).filter(Review.is_complete == True).filter(Review.page_id == self.id) \
-            .group_by(
-                sa.func.year(Review.completed_date),
-                sa.func.month(Review.completed_date),
-                sa.func.day(Review.completed_date),
-            ) \
-            .order_by(Review.completed_date) \
-            .all()
-
-        result = []
-
-        for day in violations:
-            dt = "%d-%d-%d" % (day.year, day.month, day.day)
-            result.append({
-                "completedAt": dt,
-                "violation_count": int(day.violation_count),
-                "violation_points": int(day.violation_points)
-            })
-
-        return result
+        return ViolationsPerDay.get_violations_per_day(
+            db, 'page', self.id, from_date=from_date, to_date=to_date
+        )
 
     @classmethod
     def by_uuid(cls, uuid, db):
         return db.query(Page).filter(Page.uuid == uuid).first()
 
+    @classmethod
+    def get_live_fields(cls, db, uuid):
+        page = db \
+            .query(Page.last_modified, Page.expires, Page.score) \
+            .filter(Page.uuid == uuid) \
+            .first()
+
+        if page is None:
+            return {}
+
+        return {
+            'lastModified': page.last_modified,
+            'expires': page.expires,
+            'score': page.score
+        }
+
     @classmethod
     def by_url_hash(cls, url_hash, db):
         return db.query(Page).filter(Page.url_hash==url_hash).first()
 
+    @classmethod
+    def filter_by_path(cls, db, query, path_prefix, domain=None):
+        if '://' in path_prefix:
+            from holmes.models import Domain
+
+            domain_name, domain_url = get_domain_from_url(path_prefix)
+            domain = Domain.get_domain_by_name(domain_name, db)
+
+            if domain is None:
+                return query.filter(Page.url.like(get_like_prefix(path_prefix), escape='\\'))
+
+            path_prefix = get_url_path(path_prefix)
+
+        if domain is not None:
+            query = query.filter(Page.domain_id == domain.id)
+
+        return query.filter(Page.path.like(get_like_prefix(path_prefix.lstrip('/')), escape='\\'))
+
+    @classmethod
+    def search_by_url(cls, db, term, limit=10, candidates_limit=1000, domains_limit=10):
+        from holmes.models import Domain
+
+        host, slash, path = term.split('://', 1)[-1].partition('/')
+        host = host.split(':')[0]
+
+        if host.startswith('www.'):
+            host = host[len('www.'):]
+
+        if not host:
+            return []
+
+        if slash:
+            domain = Domain.get_domain_by_name(host, db)
+            if domain is None:
+                return []
+            domain_ids = [domain.id]
+        else:
+            domain_ids = [
+                item.id for item in db
+                .query(Domain.id)
+                .filter(Domain.name.like(get_like_prefix(host), escape='\\'))
+                .order_by(Domain.name)[:domains_limit]
+            ]
+
+        if not domain_ids:
+            return []
+
+        candidates = db \
+            .query(
+                Page.uuid,
+                Page.url,
+                Page.last_review_uuid,
+                Page.violations_count
+            ) \
+            .filter(Page.domain_id.in_(domain_ids)) \
+            .filter(Page.path.like(get_like_prefix(path), escape='\\')) \
+            .filter(Page.last_review_uuid != None) \
+            .order_by(Page.violations_count.desc())[:candidates_limit]
+
+        candidates = sorted(candidates, key=lambda item: (-item.violations_count, len(item.url)))
+
+        return candidates[:limit]
+
     @classmethod
     def get_page_count(cls, db):
         return int(db.query(sa.func.count(Page.id)).scalar())
@@ -336,13 +388,20 @@ class Page(Base):
 
         db.begin(subtransactions=True)
         try:
-            page = Page(url=url, url_hash=url_hash, domain=domain, score=score)
+            page = Page(url=url, url_hash=url_hash, path=get_url_path(url), domain=domain, score=score)
             db.add(page)
             db.flush()
             db.commit()
             cache.increment_page_count(domain)
             cache.increment_page_count()
             cache.increment_next_jobs_count()
+            cache.mark_domain_dirty(domain)
+
+            publish_method(dumps({
+                'type': 'domain-counts',
+                'domainName': domain.name,
+                'pageCount': 1
+            }))
         except Exception:
             db.rollback()
             err = sys.exc_info()[1]
@@ -61,17 +61,25 @@ class Request(Base):
         return result
 
     @classmethod
-    def get_requests_by_status_code(self, domain_name, status_code, db, current_page=1, page_size=10):
+    def get_requests_by_status_code(self, domain_name, status_code, db, current_page=1, page_size=10, cursor=None):
         lower_bound = (current_page - 1) * page_size
         upper_bound = lower_bound + page_size
 
-        requests = db \
+        query = db \
             .query(Request.id, Request.url, Request.review_url, Request.completed_date) \
             .filter(Request.domain_name == domain_name) \
             .filter(Request.status_code == status_code) \
-            .order_by('completed_date desc')[lower_bound:upper_bound]
+            .order_by(Request.completed_date.desc(), Request.id.desc())
+
+        if cursor is not None:
+            completed_date, request_id = cursor
+            query = query.filter(sa.or_(
+                Request.completed_date < completed_date,
+                sa.and_(Request.completed_date == completed_date, Request.id < request_id)
+            ))
+            return query[:page_size]
 
-        return requests
+        return query[lower_bound:upper_bound]
 
     @classmethod
     def get_requests_by_status_count(self, domain_name, status_code, db):
@@ -86,13 +94,19 @@ class Request(Base):
         return int(db.query(sa.func.count(Request.id)).scalar())
 
     @classmethod
-    def get_last_requests(self, db, current_page=1, page_size=10):
+    def get_last_requests(self, db, current_page=1, page_size=10, cursor=None):
         lower_bound = (current_page - 1) * page_size
         upper_bound = lower_bound + page_size
 
-        return db \
+        query = db \
             .query(Request) \
-            .order_by('id desc')[lower_bound:upper_bound]
+            .order_by(Request.id.desc())
+
+        if cursor is not None:
+            request_id, = cursor
+            return query.filter(Request.id < request_id)[:page_size]
+
+        return query[lower_bound:upper_bound]
 
     @classmethod
     def get_requests_count_by_status_in_period_of_days(self, db, from_date, to_date=None):
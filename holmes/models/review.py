@@ -5,11 +5,12 @@ import sys
 import logging
 
 from uuid import uuid4
+from collections import defaultdict
 from datetime import datetime
 
 from ujson import dumps
 import sqlalchemy as sa
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, joinedload, subqueryload
 
 from holmes.models import Base
 
@@ -34,7 +35,7 @@ class Review(Base):
     facts = relationship("Fact", cascade="all,delete")
     violations = relationship("Violation", cascade="all,delete")
 
-    def to_dict(self, fact_definitions, violation_definitions):
+    def to_dict(self, fact_definitions, violation_definitions, key_names=None):
         return {
             'page': self.page and self.page.to_dict() or None,
             'domain': self.domain and self.domain.name or None,
@@ -42,10 +43,25 @@ class Review(Base):
             'uuid': str(self.uuid),
             'createdAt': self.created_date,
             'completedAt': self.completed_date,
-            'facts': [fact.to_dict(fact_definitions) for fact in self.facts],
-            'violations': [violation.to_dict(violation_definitions) for violation in self.violations]
+            'facts': [fact.to_dict(fact_definitions, key_names) for fact in self.facts],
+            'violations': [violation.to_dict(violation_definitions, key_names) for violation in self.violations]
         }
 
+    def to_summary_dict(self, fact_definitions, violation_definitions, key_names=None):
+        data = self.to_dict(fact_definitions, violation_definitions, key_names)
+        data['violationCount'] = self.violation_count
+        return data
+
+    def to_document(self, fact_definitions, violation_definitions, key_names=None):
+        data = self.to_dict(fact_definitions, violation_definitions, key_names)
+        # documents of completed reviews are cached and served with a strong
+        # etag, so they leave out the page fields that keep changing, merged
+        # back in by the handler when serving them
+        data['page'] = self.page and {'uuid': str(self.page.uuid), 'url': self.page.url} or None
+        data['violationPoints'] = sum(violation['points'] for violation in data['violations'])
+        data['violationCount'] = len(data['violations'])
+        return data
+
     def __str__(self):
         return str(self.uuid)
 
@@ -86,23 +102,32 @@ class Review(Base):
         return db.query(Review).filter(Review.is_active == True) \
                                .order_by(Review.completed_date.desc())[:limit]
 
+    @classmethod
+    def get_completed_reviews_for_page(cls, db, page_id, limit=10):
+        from holmes.models.violation import Violation  # to avoid circular dependency
+
+        return db \
+            .query(
+                Review.uuid,
+                Review.completed_date,
+                sa.func.count(Violation.id).label('violation_count')
+            ) \
+            .outerjoin(Violation, Violation.review_id == Review.id) \
+            .filter(Review.page_id == page_id) \
+            .filter(Review.is_complete == True) \
+            .group_by(Review.id) \
+            .order_by(Review.completed_date.desc())[:limit]
+
     @classmethod
     def get_reviews_count_in_period(cls, db, from_date, to_date=None):
         if to_date is None:
             to_date = datetime.utcnow()
 
-        reviews = db \
-            .query(Review.completed_date) \
+        count, first_date = db \
+            .query(sa.func.count(Review.id), sa.func.min(Review.completed_date)) \
             .filter(Review.is_active == True) \
             .filter(Review.completed_date.between(from_date, to_date)) \
-            .order_by(Review.completed_date.asc()) \
-            .all()
-
-        count = len(reviews)
-
-        first_date = None
-        if count > 0:
-            first_date = reviews[0].completed_date
+            .one()
 
         return count, first_date
 
@@ -116,6 +141,19 @@ class Review(Base):
     def by_uuid(cls, uuid, db):
         return db.query(Review).filter(Review.uuid == uuid).first()
 
+    @classmethod
+    def by_uuid_with_details(cls, uuid, db):
+        return db \
+            .query(Review) \
+            .options(
+                joinedload('page'),
+                joinedload('domain'),
+                subqueryload('facts').joinedload('key'),
+                subqueryload('violations').joinedload('key')
+            ) \
+            .filter(Review.uuid == uuid) \
+            .first()
+
     @property
     def violation_count(self):
         return len(self.violations)
@@ -132,19 +170,14 @@ class Review(Base):
             .filter(Review.is_active == 1) \
             .filter(Violation.key_id == key_id)
 
-        page_filter_prefix = '%'
+        domain = None
         if domain_filter:
             domain = Domain.get_domain_by_name(domain_filter, db)
             if domain:
                 query = query.filter(Review.domain_id == domain.id)
-                page_filter_prefix = domain.url
 
         if page_filter:
-            query = query.filter(
-                Page.url.like(
-                    '{0}{1}%'.format(page_filter_prefix, page_filter)
-                )
-            )
+            query = Page.filter_by_path(db, query, page_filter, domain=domain)
 
         return query
 
@@ -158,28 +191,23 @@ class Review(Base):
             .filter(Violation.review_is_active == 1) \
             .filter(Violation.key_id == key_id)
 
-        page_filter_prefix = '%'
+        domain = None
         if domain_filter:
             from holmes.models.domain import Domain  # to avoid circular dependency
             domain = Domain.get_domain_by_name(domain_filter, db)
             if domain:
                 query = query.filter(Review.domain_id == domain.id)
-                page_filter_prefix = domain.url
 
         if page_filter:
             from holmes.models.page import Page  # to avoid circular dependency
             query = query.filter(Review.id == Violation.review_id) \
-                .filter(Page.id == Review.page_id) \
-                .filter(
-                    Page.url.like(
-                        '{0}{1}%'.format(page_filter_prefix, page_filter)
-                    )
-                )
+                .filter(Page.id == Review.page_id)
+            query = Page.filter_by_path(db, query, page_filter, domain=domain)
 
         return query.scalar()
 
     @classmethod
-    def get_by_violation_key_name(cls, db, key_id, current_page=1, page_size=10, domain_filter=None, page_filter=None):
+    def get_by_violation_key_name(cls, db, key_id, current_page=1, page_size=10, domain_filter=None, page_filter=None, cursor=None):
         from holmes.models.page import Page  # to avoid circular dependency
         from holmes.models.review import Review  # to avoid circular dependency
         from holmes.models.violation import Violation  # to avoid circular dependency
@@ -189,6 +217,7 @@ class Review(Base):
 
         query = db \
             .query(
+                Review.id,
                 Review.uuid.label('review_uuid'),
                 Page.url,
                 Page.uuid.label('page_uuid'),
@@ -199,36 +228,44 @@ class Review(Base):
             .filter(Review.is_active == 1) \
             .filter(Page.id == Review.page_id) \
 
-        page_filter_prefix = '%'
+        domain = None
         if domain_filter:
             from holmes.models.domain import Domain  # to avoid circular dependency
             domain = Domain.get_domain_by_name(domain_filter, db)
             if domain:
                 query = query.filter(Review.domain_id == domain.id)
-                page_filter_prefix = domain.url
 
         if page_filter:
-            query = query.filter(
-                Page.url.like(
-                    '{0}{1}%'.format(page_filter_prefix, page_filter)
-                )
-            )
+            query = Page.filter_by_path(db, query, page_filter, domain=domain)
+
+        query = query.order_by(Review.completed_date.desc(), Review.id.desc())
+
+        if cursor is not None:
+            completed_date, review_id = cursor
+            query = query.filter(sa.or_(
+                Review.completed_date < completed_date,
+                sa.and_(Review.completed_date == completed_date, Review.id < review_id)
+            ))
+            return query[:page_size]
 
-        return query.order_by(Review.completed_date.desc())[lower_bound:upper_bound]
+        return query[lower_bound:upper_bound]
 
     @classmethod
-    def save_review(cls, page_uuid, review_data, db, fact_definitions, violation_definitions, cache, publish):
-        from holmes.models import Page
+    def save_review(cls, page_uuid, review_data, db, fact_definitions, violation_definitions, cache, publish, key_names=None):
+        from holmes.models import Page, ViolationsPerDay
 
         page = Page.by_uuid(page_uuid, db)
         last_review = page.last_review
 
+        completed_date = datetime.utcnow()
+
         review = Review(
             domain_id=page.domain.id,
             page_id=page.id,
             is_active=True,
             is_complete=False,
-            completed_date=datetime.utcnow(),
+            completed_date=completed_date,
+            completed_day=completed_date.date(),
             uuid=uuid4(),
         )
 
@@ -271,6 +308,24 @@ class Review(Base):
 
         review.is_complete = True
 
+        for i in range(3):
+            db.begin(subtransactions=True)
+            try:
+                ViolationsPerDay.add_review(db, review)
+                db.commit()
+                break
+            except Exception:
+                err = sys.exc_info()[1]
+                if 'Deadlock found' in str(err):
+                    logging.error('Deadlock happened! Trying again (try number %d)! (Details: %s)' % (i, str(err)))
+                else:
+                    db.rollback()
+                    raise
+
+        ranking_increments = defaultdict(int)
+        for violation in review_data['violations']:
+            ranking_increments[violation['key']] += 1
+
         if not last_review:
             cache.increment_active_review_count(page.domain)
 
@@ -281,6 +336,8 @@ class Review(Base):
 
             cache.increment_next_jobs_count(-1)
 
+            domain_counts = {'reviewCount': 1, 'violationCount': page.violations_count}
+
         else:
             old_violations_count = len(last_review.violations)
             new_violations_count = len(review.violations)
@@ -290,6 +347,8 @@ class Review(Base):
                 increment=new_violations_count - old_violations_count
             )
 
+            domain_counts = {'violationCount': new_violations_count - old_violations_count}
+
             for i in range(3):
                 db.begin(subtransactions=True)
                 try:
@@ -306,7 +365,34 @@ class Review(Base):
                         db.rollback()
                         raise
 
+            for violation in last_review.violations:
+                ranking_increments[violation.get_key_name(key_names)] -= 1
+
+            cache.remove_completed_review(last_review.uuid)
+
+        cache.increment_violations_ranking(ranking_increments)
+        cache.mark_domain_dirty(page.domain)
+
+        cache.add_last_review(review.to_summary_dict(fact_definitions, violation_definitions, key_names))
+        cache.add_completed_review(review.uuid, review.completed_date)
+
         publish(dumps({
             'type': 'new-review',
             'reviewId': str(review.uuid)
         }))
+
+        publish(dumps(dict(
+            domain_counts,
+            type='domain-counts',
+            domainName=page.domain.name
+        )))
+
+        ranking_increments = dict(
+            (key_name, increment) for key_name, increment in ranking_increments.items() if increment
+        )
+
+        if ranking_increments:
+            publish(dumps({
+                'type': 'violations-ranking',
+                'increments': ranking_increments
+            }))
@@ -29,11 +29,18 @@ class Violation(Base):
     def __repr__(self):
         return str(self)
 
-    def to_dict(self, violation_definitions):
-        definition = violation_definitions.get(self.key.name, {})
+    def get_key_name(self, key_names=None):
+        if key_names and self.key_id in key_names:
+            return key_names[self.key_id]
+
+        return self.key.name
+
+    def to_dict(self, violation_definitions, key_names=None):
+        key_name = self.get_key_name(key_names)
+        definition = violation_definitions.get(key_name, {})
 
         return {
-            'key': self.key.name,
+            'key': key_name,
             'title': definition.get('title', 'undefined'),
             'description': definition.get('description', lambda value: value)(self.value),
             'points': self.points,
@@ -41,29 +48,30 @@ class Violation(Base):
         }
 
     @classmethod
-    def get_most_common_violations(cls, db, violation_definitions, sample_limit=50000):
-        violations = []
-
-        sample = db \
+    def get_active_count_by_key_name(cls, db):
+        return db \
             .query(
-                Violation.id,
-                Violation.key_id,
-                Key.name.label('key_name')
+                Key.name.label('key_name'),
+                sa.func.count(Violation.id).label('count')
             ) \
             .filter(Violation.key_id == Key.id) \
-            .order_by(Violation.id.desc()) \
-            .limit(sample_limit) \
-            .subquery()
+            .filter(Violation.review_is_active == True) \
+            .group_by(Violation.key_id) \
+            .order_by('count desc') \
+            .all()
 
-        results = db \
-            .query(
-                sample.columns.key_name,
-                sa.func.count(sample.columns.key_id).label('count')
-            ) \
-            .group_by(sample.columns.key_id) \
-            .order_by('count desc')
+    @classmethod
+    def get_most_common_violations(cls, db, violation_definitions):
+        return cls.format_most_common_violations(
+            violation_definitions,
+            cls.get_active_count_by_key_name(db)
+        )
+
+    @classmethod
+    def format_most_common_violations(cls, violation_definitions, counts):
+        violations = []
 
-        for key_name, count in results:
+        for key_name, count in counts:
             definition = violation_definitions.get(key_name, {})
             violations.append({
                 "key": key_name,
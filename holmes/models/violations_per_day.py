@@ -0,0 +1,75 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import sqlalchemy as sa
+
+from holmes.models import Base
+
+
+class ViolationsPerDay(Base):
+    __tablename__ = "violations_per_day"
+    __table_args__ = (
+        sa.UniqueConstraint('scope', 'scope_id', 'day', name='uk_scope_day'),
+    )
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    scope = sa.Column('scope', sa.String(10), nullable=False)
+    scope_id = sa.Column('scope_id', sa.Integer, nullable=False)
+    day = sa.Column('day', sa.Date, nullable=False)
+    violation_count = sa.Column('violation_count', sa.Integer, server_default='0', nullable=False)
+    violation_points = sa.Column('violation_points', sa.Integer, server_default='0', nullable=False)
+
+    def __str__(self):
+        return '%s %s: %s' % (self.scope, self.scope_id, self.day)
+
+    def __repr__(self):
+        return str(self)
+
+    def to_dict(self):
+        return {
+            "completedAt": "%d-%d-%d" % (self.day.year, self.day.month, self.day.day),
+            "violation_count": self.violation_count,
+            "violation_points": self.violation_points
+        }
+
+    @classmethod
+    def add_review(cls, db, review):
+        violation_count = len(review.violations)
+
+        if not violation_count:
+            return
+
+        day = review.completed_date.date()
+        violation_points = review.get_violation_points()
+
+        for scope, scope_id in (('page', review.page_id), ('domain', review.domain_id)):
+            # FIXME: ON DUPLICATE KEY UPDATE works only in MySQL.
+            db.execute(
+                'INSERT INTO violations_per_day (scope, scope_id, day, violation_count, violation_points) '
+                'VALUES (:scope, :scope_id, :day, :violation_count, :violation_points) '
+                'ON DUPLICATE KEY UPDATE '
+                'violation_count = violation_count + VALUES(violation_count), '
+                'violation_points = violation_points + VALUES(violation_points)',
+                {
+                    'scope': scope,
+                    'scope_id': scope_id,
+                    'day': day,
+                    'violation_count': violation_count,
+                    'violation_points': violation_points
+                }
+            )
+
+    @classmethod
+    def get_violations_per_day(cls, db, scope, scope_id, from_date=None, to_date=None):
+        query = db \
+            .query(ViolationsPerDay) \
+            .filter(ViolationsPerDay.scope == scope) \
+            .filter(ViolationsPerDay.scope_id == scope_id)
+
+        if from_date is not None:
+            query = query.filter(ViolationsPerDay.day >= from_date)
+
+        if to_date is not None:
+            query = query.filter(ViolationsPerDay.day <= to_date)
+
+        return [item.to_dict() for item in query.order_by(ViolationsPerDay.day).all()]
@@ -0,0 +1,160 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+import hashlib
+import pkgutil
+import tempfile
+
+from ujson import loads, dumps
+
+from holmes import __version__
+from holmes.utils import load_classes, get_class
+
+
+MANIFEST_FIELDS = ('title', 'category', 'unit')
+
+
+def get_class_path(klass):
+    return '%s.%s' % (klass.__module__, klass.__name__)
+
+
+def get_module_mtime(class_path):
+    '''Modification time of the module defining the class, found without
+    importing the module itself.'''
+
+    try:
+        loader = pkgutil.get_loader(class_path.rsplit('.', 1)[0])
+        return os.path.getmtime(loader.get_filename())
+    except Exception:
+        return None
+
+
+class LazyDescription(object):
+    '''Stands for the description of a definition read from the manifest,
+    importing its plugin the first time a value is described.'''
+
+    def __init__(self, plugin, definitions_method, name):
+        self.plugin = plugin
+        self.definitions_method = definitions_method
+        self.name = name
+        self.description = None
+
+    def __call__(self, value):
+        if self.description is None:
+            definitions = getattr(get_class(self.plugin), self.definitions_method)()
+            self.description = definitions[self.name]['description']
+
+        return self.description(value)
+
+
+class PluginRegistry(object):
+    '''Resolves the configured facters and validators. Their merged
+    definitions are kept in a manifest keyed by the configured classes, the
+    modification time of their modules and the holmes version, so processes
+    starting with the same plugins read the definitions without importing a
+    single plugin. Plugin classes are only imported when first used.'''
+
+    def __init__(self, config):
+        self.config = config
+
+        directory = config.PLUGIN_MANIFEST_DIRECTORY or tempfile.gettempdir()
+        self.manifest_path = os.path.join(directory, 'holmes-plugins-%s.json' % self.get_manifest_key())
+
+        self._manifest = None
+        self._facters = None
+        self._validators = None
+
+    def get_manifest_key(self):
+        plugins = list(self.config.FACTERS) + list(self.config.VALIDATORS)
+        # editing a plugin's definitions must not keep serving the old manifest
+        mtimes = [get_module_mtime(plugin) for plugin in plugins]
+
+        return hashlib.sha1(dumps([__version__, plugins, mtimes])).hexdigest()
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            self._manifest = self.read_manifest()
+
+        if self._manifest is None:
+            self._manifest = self.build_manifest()
+            self.write_manifest(self._manifest)
+
+        return self._manifest
+
+    @property
+    def facters(self):
+        if self._facters is None:
+            self._facters = load_classes(default=self.manifest['facters'])
+
+        return self._facters
+
+    @property
+    def validators(self):
+        if self._validators is None:
+            self._validators = load_classes(default=self.manifest['validators'])
+
+        return self._validators
+
+    def get_fact_definitions(self):
+        return self.get_definitions(self.manifest['factDefinitions'], 'get_fact_definitions')
+
+    def get_violation_definitions(self):
+        return self.get_definitions(self.manifest['violationDefinitions'], 'get_violation_definitions')
+
+    def get_definitions(self, manifest_definitions, definitions_method):
+        definitions = {}
+
+        for name, item in manifest_definitions.items():
+            definition = dict((field, item[field]) for field in MANIFEST_FIELDS if field in item)
+
+            if item['description']:
+                definition['description'] = LazyDescription(item['plugin'], definitions_method, name)
+
+            definitions[name] = definition
+
+        return definitions
+
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path) as manifest_file:
+                return loads(manifest_file.read())
+        except (IOError, ValueError):
+            return None
+
+    def write_manifest(self, manifest):
+        temp_path = '%s.%d' % (self.manifest_path, os.getpid())
+
+        try:
+            with open(temp_path, 'w') as manifest_file:
+                manifest_file.write(dumps(manifest))
+
+            # concurrent processes only ever see a complete manifest
+            os.rename(temp_path, self.manifest_path)
+        except (IOError, OSError):
+            logging.warn('Could not write the plugin manifest to %s.' % self.manifest_path)
+
+    def build_manifest(self):
+        self._facters = load_classes(default=self.config.FACTERS)
+        self._validators = load_classes(default=self.config.VALIDATORS)
+
+        return {
+            'facters': [get_class_path(facter) for facter in self._facters],
+            'validators': [get_class_path(validator) for validator in self._validators],
+            'factDefinitions': self.get_manifest_definitions(self._facters, 'get_fact_definitions'),
+            'violationDefinitions': self.get_manifest_definitions(self._validators, 'get_violation_definitions'),
+        }
+
+    def get_manifest_definitions(self, classes, definitions_method):
+        definitions = {}
+
+        for klass in classes:
+            for name, definition in getattr(klass, definitions_method)().items():
+                item = dict((field, definition[field]) for field in MANIFEST_FIELDS if field in definition)
+                item['plugin'] = get_class_path(klass)
+                item['description'] = 'description' in definition
+                definitions[name] = item
+
+        return definitions
@@ -0,0 +1,44 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+from tornado.concurrent import TracebackFuture
+
+
+class ProcessExecutor(object):
+    '''Runs CPU bound parsing in a pool of processes so a worker uses every
+    core of its host while a single IOLoop keeps fetching. Methods and
+    arguments are pickled on their way to the pool, so the called method
+    must be a module level function receiving and returning plain values
+    (strings, lists, numbers) and not parsed trees or responses.
+
+    The callback gets a future on the IOLoop once the method is done. With a
+    pool size of 0 calls run inline and the callback is called right away.'''
+
+    def __init__(self, io_loop, pool_size):
+        self.io_loop = io_loop
+        self.pool_size = pool_size
+        self.executor = None
+
+        if pool_size:
+            self.executor = ProcessPoolExecutor(max_workers=pool_size)
+
+    def run(self, callback, method, *args):
+        if self.executor is None:
+            future = TracebackFuture()
+
+            try:
+                future.set_result(method(*args))
+            except Exception:
+                future.set_exc_info(sys.exc_info())
+
+            callback(future)
+            return
+
+        self.io_loop.add_future(self.executor.submit(method, *args), callback)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
@@ -1,6 +1,7 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import sys
 from os.path import join
 import urlparse
 import inspect
@@ -66,7 +67,8 @@ class Reviewer(object):
             self, api_url, page_uuid, page_url, page_score,
             increase_lambda_tax_method=None, config=None, validators=[], facters=[],
             async_get=None, wait=None, wait_timeout=None, db=None, cache=None, publish=None,
-            fact_definitions=None, violation_definitions=None):
+            fact_definitions=None, violation_definitions=None, key_names=None, complete_method=None,
+            process_executor=None):
 
         self.db = db
         self.cache = cache
@@ -107,26 +109,148 @@ class Reviewer(object):
         self._wait_for_async_requests = wait
         self._wait_timeout = wait_timeout
 
+        # with a complete_method the review runs alongside others on the same
+        # IOLoop, moving to its next step once its own requests are finished
+        # instead of waiting for every request in the process
+        self.complete_method = complete_method
+        self.pending_requests = 0
+        self.requests_finished_callback = None
+        self.is_complete = False
+        self.error = None
+        self.process_executor = process_executor
+
         self.fact_definitions = fact_definitions
         self.violation_definitions = violation_definitions
+        self.key_names = key_names
 
     def ping(self):
         if self.ping_method is not None:
             self.ping_method()
 
+    @property
+    def is_concurrent(self):
+        return self.complete_method is not None
+
     def _async_get(self, url, handler, method='GET', **kw):
         if self.async_get_func:
+            self.pending_requests += 1
             self.async_get_func(url, self.handle_async_get(handler), method, **kw)
 
     def handle_async_get(self, handler):
         def handle(url, response):
-            if not hasattr(response, 'from_cache') or not response.from_cache:
-                self.save_request(url, response)
+            try:
+                self.run_step(self.handle_response, url, response, handler)
+            finally:
+                self.pending_requests -= 1
+
+            self.check_requests_finished()
+
+        return handle
+
+    def _async_get_page(self, url, handler, method='GET', **kw):
+        # pages being enqueued are not saved as requests of the review, but a
+        # concurrent review still waits for them before completing
+        self.pending_requests += 1
+        self.async_get_func(url, self.handle_async_get_page(handler), method, **kw)
+
+    def handle_async_get_page(self, handler):
+        def handle(url, response):
+            try:
+                self.run_step(handler, url, response)
+            finally:
+                self.pending_requests -= 1
+
+            self.check_requests_finished()
+
+        return handle
+
+    def run_in_process(self, handler, method, *args):
+        if self.process_executor is None or not self.is_concurrent:
+            handler(method(*args))
+            return
 
-            handler(url, response)
+        self.pending_requests += 1
+        self.process_executor.run(self.handle_process_result(handler), method, *args)
+
+    def handle_process_result(self, handler):
+        def handle(future):
+            try:
+                self.run_step(lambda: handler(future.result()))
+            finally:
+                self.pending_requests -= 1
+
+            self.check_requests_finished()
 
         return handle
 
+    def handle_response(self, url, response, handler):
+        if not hasattr(response, 'from_cache') or not response.from_cache:
+            self.save_request(url, response)
+
+        handler(url, response)
+
+    def run_step(self, method, *args):
+        if not self.is_concurrent:
+            method(*args)
+            return
+
+        try:
+            method(*args)
+            self.flush_step()
+        except InvalidReviewError:
+            self.error = str(sys.exc_info()[1])
+            self.discard_step()
+        except Exception:
+            logging.exception('Error reviewing %s.' % self.page_url)
+            self.discard_step()
+
+    def flush_step(self):
+        # concurrent reviews share the worker's session, so no change is left
+        # pending for another review's commit or rollback to pick up
+        if self.db is not None and (self.db.new or self.db.dirty or self.db.deleted):
+            self.db.flush()
+
+    def discard_step(self):
+        if self.db is None:
+            return
+
+        for instance in list(self.db.new):
+            self.db.expunge(instance)
+
+        for instance in list(self.db.dirty):
+            self.db.expire(instance)
+
+    def when_requests_finished(self, callback):
+        if not self.is_concurrent:
+            self.wait_for_async_requests()
+            callback()
+            return
+
+        self.requests_finished_callback = callback
+        self.check_requests_finished()
+
+    def check_requests_finished(self):
+        if not self.is_concurrent or self.is_complete or self.pending_requests > 0:
+            return
+
+        callback, self.requests_finished_callback = self.requests_finished_callback, None
+
+        if callback is None:
+            self.is_complete = True
+            self.complete_method(self)
+            return
+
+        # holds the review open while the step runs, as inline results (such
+        # as a process pool of size 0) finish before the next step is set
+        self.pending_requests += 1
+
+        try:
+            self.run_step(callback)
+        finally:
+            self.pending_requests -= 1
+
+        self.check_requests_finished()
+
     def save_request(self, url, response):
         if not response:
             return
@@ -150,8 +274,11 @@ class Reviewer(object):
         )
 
         self.db.add(req)
+        self.db.flush()
 
         self.cache.increment_requests_count()
+        self.cache.mark_domain_dirty(domain_name)
+        self.cache.add_last_request(dict(req.to_dict(), id=req.id))
 
         url = url.encode('utf-8')
 
@@ -164,6 +291,9 @@ class Reviewer(object):
         self.load_content(self.content_loaded)
         self.wait_for_async_requests()
 
+        if self.async_get_func is None:
+            self.check_requests_finished()
+
     def load_content(self, callback):
         self._async_get(self.page_url, callback)
 
@@ -207,12 +337,11 @@ class Reviewer(object):
             self._current.html = None
 
         self.run_facters()
-        self.wait_for_async_requests()
+        self.when_requests_finished(self.facts_loaded)
 
+    def facts_loaded(self):
         self.run_validators()
-        self.wait_for_async_requests()
-
-        self.save_review()
+        self.when_requests_finished(self.save_review)
 
     @property
     def current(self):
@@ -255,7 +384,7 @@ class Reviewer(object):
                 self.cache,
                 url,
                 score,
-                self.async_get_func,
+                self._async_get_page,
                 self.publish,
                 self.config,
                 self.handle_page_added
@@ -284,10 +413,13 @@ class Reviewer(object):
         Review.save_review(
             self.page_uuid, data, self.db,
             self.fact_definitions, self.violation_definitions,
-            self.cache, self.publish
+            self.cache, self.publish, self.key_names
         )
 
     def wait_for_async_requests(self):
+        if self.is_concurrent:
+            return
+
         self._wait_for_async_requests(self._wait_timeout)
 
     def is_root(self):
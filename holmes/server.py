@@ -28,7 +28,7 @@ from holmes.handlers.domains import (
     DomainGroupedViolationsHandler, DomainTopCategoryViolationsHandler
 )
 from holmes.handlers.search import (
-    SearchHandler
+    SearchHandler, SearchAutocompleteHandler
 )
 from holmes.handlers.settings import (
     TaxHandler
@@ -37,13 +37,16 @@ from holmes.handlers.request import (
     RequestDomainHandler, LastRequestsHandler, RequestsInLastDayHandler
 )
 from holmes.handlers.limiter import LimiterHandler
+from holmes.handlers.material import MaterialsHandler
 
 from holmes.handlers.bus import EventBusHandler
 from holmes.event_bus import EventBus, NoOpEventBus
 from holmes.utils import load_classes
+from holmes.plugins import PluginRegistry
 from holmes.models import Key
-from holmes.models import KeysCategory
-from holmes.cache import Cache
+from holmes.cache import Cache, LocalCache
+from holmes.db_executor import DatabaseExecutor
+from holmes.db_router import DatabaseRouter
 from holmes import __version__
 from holmes.handlers import BaseHandler
 
@@ -89,6 +92,7 @@ class HolmesApiServer(Server):
             (r'/page/([a-z0-9-]*)/reviews/?', PageReviewsHandler),
             (r'/page/([a-z0-9-]*)/violations-per-day/?', PageViolationsPerDayHandler),
             (r'/page/([a-z0-9-]*)/?', PageHandler),
+            (r'/search/autocomplete/?', SearchAutocompleteHandler),
             (r'/search/?', SearchHandler),
             (r'/page/?', PageHandler),
             (r'/domains/?', DomainsHandler),
@@ -106,6 +110,7 @@ class HolmesApiServer(Server):
             (r'/violation/([_a-z0-9\.]*)/domains/?', ViolationDomainsHandler),
             (r'/tax/?', TaxHandler),
             (r'/limiters/?', LimiterHandler),
+            (r'/materials/?', MaterialsHandler),
             (r'/next-jobs/?', NextJobHandler),
             (r'/last-requests/?', LastRequestsHandler),
             (r'/requests-in-last-day/?', RequestsInLastDayHandler),
@@ -126,32 +131,35 @@ class HolmesApiServer(Server):
         else:
             self.application.db = self.application.get_sqlalchemy_session()
 
+        self.application.db_router = DatabaseRouter(self.application.db, self.config)
+
         if self.debug:
             from sqltap import sqltap
             self.sqltap = sqltap.start()
 
-        self.application.facters = self._load_facters()
-        self.application.validators = self._load_validators()
         self.application.error_handlers = [handler(self.application.config) for handler in self._load_error_handlers()]
 
-        self.application.fact_definitions = {}
-        self.application.violation_definitions = {}
-
-        for facter in self.application.facters:
-            self.application.fact_definitions.update(facter.get_fact_definitions())
-
-        self._insert_keys(self.application.fact_definitions)
+        self.application.plugins = PluginRegistry(self.config)
+        self.application.fact_definitions = self.application.plugins.get_fact_definitions()
+        self.application.violation_definitions = self.application.plugins.get_violation_definitions()
 
-        for validator in self.application.validators:
-            self.application.violation_definitions.update(validator.get_violation_definitions())
-
-        self._insert_keys(self.application.violation_definitions)
+        self.application.key_names = self._insert_keys(
+            self.application.fact_definitions,
+            self.application.violation_definitions
+        )
 
         self.application.event_bus = NoOpEventBus(self.application)
         self.application.http_client = AsyncHTTPClient(io_loop=io_loop)
         self.connect_pub_sub(io_loop)
 
+        self.application.local_cache = LocalCache(
+            self.config.LOCAL_CACHE_SIZE,
+            self.config.LOCAL_CACHE_EXPIRATION_IN_SECONDS,
+            self.config.LOCAL_CACHE_INVALIDATING_EVENTS
+        )
         self.application.cache = Cache(self.application)
+        self.application.db_executor = DatabaseExecutor(self.application.db_router, self.config.DB_THREAD_POOL_SIZE)
+        self.application.db_router.start_lag_checks(self.application.db_executor, io_loop)
 
         self.configure_material_girl()
 
@@ -165,39 +173,19 @@ class HolmesApiServer(Server):
 
         self.application.girl = Materializer(storage=RedisStorage(redis=self.redis_material))
 
-        configure_materials(self.application.girl, self.application.db, self.config)
+        configure_materials(self.application.girl, self.application.db_router, self.config)
 
-    def _insert_key_category(self, key, name):
-        category = KeysCategory.get_or_create(self.application.db, name)
-        self.application.db.add(category)
-        self.application.db.flush()
+    def _insert_keys(self, *definitions):
+        key_names = Key.insert_keys(self.application.db, *definitions)
         self.application.db.commit()
-        return category
-
-    def _insert_keys(self, keys):
-        for name in keys.keys():
-            key = Key.get_or_create(self.application.db, name)
-            keys[name]['key'] = key
-
-            category_name = keys[name].get('category', None)
-            if category_name:
-                category = self._insert_key_category(key, category_name)
-                key.category = category
-
-            self.application.db.add(key)
-            self.application.db.flush()
-            self.application.db.commit()
-
-    def _load_validators(self):
-        return load_classes(default=self.config.VALIDATORS)
-
-    def _load_facters(self):
-        return load_classes(default=self.config.FACTERS)
+        return key_names
 
     def _load_error_handlers(self):
         return load_classes(default=self.config.ERROR_HANDLERS)
 
     def before_end(self, io_loop):
+        self.application.db_router.remove()
+        self.application.db_executor.shutdown()
         self.application.db.remove()
 
         if self.debug and getattr(self, 'sqltap', None) is not None:
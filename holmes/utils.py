@@ -2,14 +2,20 @@
 # -*- coding: utf-8 -*-
 
 import logging
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime, date
 
 try:
     from tornado import httputil
+    from ujson import dumps, loads
 
     from six.moves.urllib.parse import urlparse
 except ImportError:
     logging.warning('Could not import some dependencies. Probably setup.py installing holmes...')
 
+CURSOR_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+CURSOR_DATE_FORMAT = '%Y-%m-%d'
+
 EMPTY_DOMAIN_RESULT = ('', '')
 
 
@@ -41,6 +47,21 @@ def get_domain_from_url(url, default_scheme='http'):
     return domain, '%s://%s' % (scheme, original_domain)
 
 
+def get_url_path(url):
+    if not url:
+        return ''
+
+    return url.split('://', 1)[-1].partition('/')[2]
+
+
+def get_like_prefix(value):
+    '''Pattern matching values starting with the given one, to be used with
+    like(..., escape='\\') so `%` and `_` in it are matched literally.'''
+
+    value = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return '%s%%' % value
+
+
 def get_class(klass):
     module_name, class_name = klass.rsplit('.', 1)
 
@@ -105,3 +126,41 @@ def count_url_levels(url):
             path = path[1:]
         return len(path.split('/'))
     return None
+
+
+def encode_cursor(*values):
+    items = []
+
+    for value in values:
+        if isinstance(value, datetime):
+            items.append(['datetime', value.strftime(CURSOR_DATETIME_FORMAT)])
+        elif isinstance(value, date):
+            items.append(['date', value.strftime(CURSOR_DATE_FORMAT)])
+        elif isinstance(value, float):
+            items.append(['float', repr(value)])
+        else:
+            items.append(['value', value])
+
+    return urlsafe_b64encode(dumps(items))
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+
+    try:
+        values = []
+
+        for kind, value in loads(urlsafe_b64decode(str(cursor))):
+            if kind == 'datetime':
+                value = datetime.strptime(value, CURSOR_DATETIME_FORMAT)
+            elif kind == 'date':
+                value = datetime.strptime(value, CURSOR_DATE_FORMAT).date()
+            elif kind == 'float':
+                value = float(value)
+
+            values.append(value)
+
+        return tuple(values)
+    except (TypeError, ValueError):
+        return None
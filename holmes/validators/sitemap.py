@@ -17,6 +17,36 @@ HTML_ENTITIES = re.compile(r'(&amp;|&apos;|&quot;|&gt;|&lt;)')
 INVALID_CHARS = re.compile(r'(&|\'|"|>|<)')
 
 
+def get_sitemap_links(urls):
+    links = []
+    not_encoded_links = 0
+
+    for url in urls:
+        match = URL_RE.match(url)
+
+        if not match:
+            continue
+
+        parse = match.groupdict()
+        relative = parse['relative']
+        encoded = True
+
+        try:
+            str(relative).encode('utf-8')
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            encoded = False
+
+        relative = HTML_ENTITIES.sub('', relative)
+        encoded = encoded and not INVALID_CHARS.findall(relative)
+
+        if not encoded:
+            not_encoded_links += 1
+
+        links.append(url)
+
+    return links, not_encoded_links
+
+
 class SitemapValidator(Validator):
     MAX_SITEMAP_SIZE = 10  # 10 MB
     MAX_LINKS_SITEMAP = 50000
@@ -61,6 +91,9 @@ class SitemapValidator(Validator):
         if not self.reviewer.is_root():
             return
 
+        self.pending_sitemaps = 0
+        self.is_validated = False
+
         for sitemap, size in self.review.data['sitemap.files.size'].items():
             response = self.review.data['sitemap.data'][sitemap]
 
@@ -82,7 +115,6 @@ class SitemapValidator(Validator):
 
             size_mb = (size / 1024.0)
             urls_count = self.review.data['sitemap.files.urls'][sitemap]
-            not_encoded_links = 0
 
             if size_mb > self.MAX_SITEMAP_SIZE:
                 self.add_violation(
@@ -104,37 +136,39 @@ class SitemapValidator(Validator):
                     points=10
                 )
 
-            for url in self.review.data['sitemap.urls'][sitemap]:
-                match = URL_RE.match(url)
-
-                if not match:
-                    continue
-
-                parse = match.groupdict()
-                relative = parse['relative']
-                encoded = True
-
-                try:
-                    str(relative).encode('utf-8')
-                except (UnicodeEncodeError, UnicodeDecodeError):
-                    encoded = False
-
-                relative = HTML_ENTITIES.sub('', relative)
-                encoded = encoded and not INVALID_CHARS.findall(relative)
-
-                if not encoded:
-                    not_encoded_links += 1
-
-                self.send_url(url, self.reviewer.page_score / float(urls_count), response)
-
-            if not_encoded_links > 0:
-                self.add_violation(
-                    key='sitemap.links.not_encoded',
-                    value={
-                        'url': sitemap,
-                        'links': not_encoded_links
-                    },
-                    points=10
-                )
-
-        self.flush()
+            self.pending_sitemaps += 1
+            self.run_in_process(
+                self.handle_sitemap_links(sitemap, urls_count, response),
+                get_sitemap_links,
+                list(self.review.data['sitemap.urls'][sitemap])
+            )
+
+        self.is_validated = True
+        self.flush_when_done()
+
+    def handle_sitemap_links(self, sitemap, urls_count, response):
+        def handle((links, not_encoded_links)):
+            try:
+                for url in links:
+                    self.send_url(url, self.reviewer.page_score / float(urls_count), response)
+
+                if not_encoded_links > 0:
+                    self.add_violation(
+                        key='sitemap.links.not_encoded',
+                        value={
+                            'url': sitemap,
+                            'links': not_encoded_links
+                        },
+                        points=10
+                    )
+            finally:
+                self.pending_sitemaps -= 1
+
+            self.flush_when_done()
+
+        return handle
+
+    def flush_when_done(self):
+        # sitemap links may come back from the process pool after validate returns
+        if self.is_validated and self.pending_sitemaps == 0:
+            self.flush()
@@ -12,19 +12,24 @@ from octopus.limiter.redis.per_domain import Limiter
 from sqlalchemy.exc import OperationalError
 
 from holmes import __version__
+from holmes.event_bus import EventPublisher
+from holmes.plugins import PluginRegistry
+from holmes.process_executor import ProcessExecutor
 from holmes.reviewer import Reviewer, InvalidReviewError
-from holmes.utils import load_classes, count_url_levels
+from holmes.utils import count_url_levels
 from holmes.models import Settings, Worker, Page, Domain
 from holmes.models import Limiter as LimiterModel
 from holmes.cli import BaseCLI
 
 
 class BaseWorker(BaseCLI):
-    def _load_validators(self):
-        return load_classes(default=self.config.VALIDATORS)
+    @property
+    def facters(self):
+        return self.plugins.facters
 
-    def _load_facters(self):
-        return load_classes(default=self.config.FACTERS)
+    @property
+    def validators(self):
+        return self.plugins.validators
 
     def get_otto_limiter(self):
         domains = self.cache.get_domain_limiters()
@@ -92,47 +97,37 @@ class BaseWorker(BaseCLI):
         pass
 
     def publish(self, data):
-        self.redis_pub_sub.publish('events', data)
+        self.event_publisher.publish(data)
 
-    def _insert_keys(self, keys):
+    def _insert_keys(self, *definitions):
         from holmes.models import Key
 
-        for name in keys.keys():
-            self.db.begin(subtransactions=True)
-            key = Key.get_or_create(self.db, name)
-            keys[name]['key'] = key
-            self.db.add(key)
-            self.db.commit()
+        self.db.begin(subtransactions=True)
+        key_names = Key.insert_keys(self.db, *definitions)
+        self.db.commit()
+
+        return key_names
 
 
 class HolmesWorker(BaseWorker):
     def initialize(self):
         self.uuid = uuid4().hex
         self.working_url = None
+        self.reviewers = set()
 
-        self.facters = self._load_facters()
-        self.validators = self._load_validators()
+        self.plugins = PluginRegistry(self.config)
         self.error_handlers = [handler(self.config) for handler in self.load_error_handlers()]
 
         self.connect_sqlalchemy()
         self.connect_to_redis()
+        self.event_publisher = EventPublisher(self.redis_pub_sub, self.config)
         self.start_otto()
+        self.process_executor = ProcessExecutor(self.otto.ioloop, self.config.WORKER_PROCESS_POOL_SIZE)
 
-        self.facters = self._load_facters()
-        self.validators = self._load_validators()
+        self.fact_definitions = self.plugins.get_fact_definitions()
+        self.violation_definitions = self.plugins.get_violation_definitions()
 
-        self.fact_definitions = {}
-        self.violation_definitions = {}
-
-        for facter in self.facters:
-            self.fact_definitions.update(facter.get_fact_definitions())
-
-        self._insert_keys(self.fact_definitions)
-
-        for validator in self.validators:
-            self.violation_definitions.update(validator.get_violation_definitions())
-
-        self._insert_keys(self.violation_definitions)
+        self.key_names = self._insert_keys(self.fact_definitions, self.violation_definitions)
 
     def config_parser(self, parser):
         parser.add_argument(
@@ -163,7 +158,14 @@ class HolmesWorker(BaseWorker):
 
         self._remove_zombie_workers()
 
-        if self._ping_api():
+        if self.config.WORKER_CONCURRENT_REVIEWS > 1:
+            self._start_reviews()
+
+            # octopus stops the IOLoop whenever it has no request left, while
+            # reviews may still be waiting on the process pool
+            while self.reviewers:
+                self.otto.ioloop.start()
+        elif self._ping_api():
             err = None
             job = self._load_next_job()
             if job and self._start_job(job['url']):
@@ -179,6 +181,8 @@ class HolmesWorker(BaseWorker):
             elif job:
                 self.debug('Could not start job for url "%s". Maybe other worker doing it?' % job['url'])
 
+        self.event_publisher.flush()
+
     def _start_reviewer(self, job):
         if job:
 
@@ -187,27 +191,79 @@ class HolmesWorker(BaseWorker):
                 return
 
             self.debug('Starting Review for [%s]' % job['url'])
-            reviewer = Reviewer(
-                api_url=self.config.HOLMES_API_URL,
-                page_uuid=job['page'],
-                page_url=job['url'],
-                page_score=job['score'],
-                increase_lambda_tax_method=self._increase_lambda_tax,
-                config=self.config,
-                validators=self.validators,
-                facters=self.facters,
-                async_get=self.async_get,
+            reviewer = self._get_reviewer(
+                job,
                 wait=self.otto.wait,
-                wait_timeout=0,  # max time to wait for all requests to finish
-                db=self.db,
-                cache=self.cache,
-                publish=self.publish,
-                fact_definitions=self.fact_definitions,
-                violation_definitions=self.violation_definitions
+                wait_timeout=0  # max time to wait for all requests to finish
             )
 
             reviewer.review()
 
+    def _get_reviewer(self, job, **kw):
+        return Reviewer(
+            api_url=self.config.HOLMES_API_URL,
+            page_uuid=job['page'],
+            page_url=job['url'],
+            page_score=job['score'],
+            increase_lambda_tax_method=self._increase_lambda_tax,
+            config=self.config,
+            validators=self.validators,
+            facters=self.facters,
+            async_get=self.async_get,
+            db=self.db,
+            cache=self.cache,
+            publish=self.publish,
+            fact_definitions=self.fact_definitions,
+            violation_definitions=self.violation_definitions,
+            key_names=self.key_names,
+            process_executor=self.process_executor,
+            **kw
+        )
+
+    def _start_reviews(self):
+        if len(self.reviewers) >= self.config.WORKER_CONCURRENT_REVIEWS or not self._ping_api():
+            return
+
+        while len(self.reviewers) < self.config.WORKER_CONCURRENT_REVIEWS:
+            job = self._load_next_job()
+
+            if not job:
+                return
+
+            if not self._start_job(job['url']):
+                self.debug('Could not start job for url "%s". Maybe other worker doing it?' % job['url'])
+                return
+
+            self._start_concurrent_reviewer(job)
+
+    def _start_concurrent_reviewer(self, job):
+        if count_url_levels(job['url']) > self.config.MAX_URL_LEVELS:
+            self.info('Max URL levels! Details: %s' % job['url'])
+            self._complete_job(job.get('lock', None))
+            return
+
+        self.info('Starting new job for %s...' % job['url'])
+        reviewer = self._get_reviewer(job, complete_method=self._handle_review_complete(job))
+
+        self.reviewers.add(reviewer)
+        reviewer.review()
+
+    def _handle_review_complete(self, job):
+        def handle(reviewer):
+            self.reviewers.discard(reviewer)
+
+            if reviewer.error:
+                self.error("Fail to review %s: %s" % (job['url'], reviewer.error))
+
+            self._complete_job(job.get('lock', None), error=reviewer.error)
+
+            self._start_reviews()
+
+            if not self.reviewers:
+                self.otto.ioloop.stop()
+
+        return handle
+
     def _increase_lambda_tax(self, tax):
         tax = float(tax)
         for i in range(3):
@@ -251,13 +307,19 @@ class HolmesWorker(BaseWorker):
             self.error("Could not ping API due to error: %s" % str(exc))
             return False
 
-        self.publish(dumps({
-            'type': 'worker-status',
-            'workerId': str(self.uuid)
-        }))
+        self.publish_status('worker-status')
 
         return True
 
+    def publish_status(self, status_type):
+        self.publish(dumps({
+            'type': status_type,
+            'workerId': str(self.uuid),
+            'currentUrl': self.working_url,
+            # concurrent reviews: current_url only holds one of them
+            'currentUrls': sorted(reviewer.page_url for reviewer in self.reviewers)
+        }))
+
     def handle_limiter_miss(self, url):
         self._ping_api()
 
@@ -303,6 +365,8 @@ class HolmesWorker(BaseWorker):
         self.db.flush()
         self.db.commit()
 
+        self.publish_status('worker-state')
+
         return True
 
     def _verify_workers_limits(self, url, avg_links_per_page=10):
@@ -310,7 +374,8 @@ class HolmesWorker(BaseWorker):
         return LimiterModel.has_limit_to_work(self.db, active_domains, url, avg_links_per_page)
 
     def _complete_job(self, lock, error=None):
-        self.working_url = None
+        # other reviews may still be running in this process
+        self.working_url = next(iter(self.reviewers)).page_url if self.reviewers else None
         worker = Worker.by_uuid(self.uuid, self.db)
 
         if worker:
@@ -319,7 +384,7 @@ class HolmesWorker(BaseWorker):
 
                 try:
                     self.cache.release_next_job(lock)
-                    worker.current_url = None
+                    worker.current_url = self.working_url
                     worker.last_ping = datetime.utcnow()
                     self.db.flush()
                     self.db.commit()
@@ -332,6 +397,8 @@ class HolmesWorker(BaseWorker):
                         self.db.rollback()
                         raise
 
+        self.publish_status('worker-state')
+
         return True
 
 
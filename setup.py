@@ -60,6 +60,7 @@ Holmes is a service to investigate your website health.
         'raven',
         'rotunicode',
         'materialgirl',
+        'futures',
     ],
     extras_require={
         'tests': tests_require,
@@ -10,6 +10,7 @@ from holmes.models import (
     Domain, Page, Review, Worker, Violation, Fact, Key, KeysCategory, Request,
     User, Limiter
 )
+from holmes.utils import get_url_path
 from uuid import uuid4
 
 
@@ -55,6 +56,7 @@ class PageFactory(BaseFactory):
     @classmethod
     def _adjust_kwargs(cls, **kwargs):
         kwargs['url_hash'] = hashlib.sha512(kwargs['url']).hexdigest()
+        kwargs['path'] = get_url_path(kwargs['url'])
         return kwargs
 
 
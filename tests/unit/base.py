@@ -11,6 +11,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import scoped_session, sessionmaker
 
 from holmes.config import Config
+from holmes.cache import COMPLETED_REVIEWS_KEY, COMPLETED_REVIEWS_SINCE_KEY
 from holmes.server import HolmesApiServer
 from tests.fixtures import (
     DomainFactory, PageFactory, ReviewFactory, FactFactory,
@@ -56,6 +57,7 @@ class ApiTestCase(CowTestCase):
         self.clean_cache('www.globo.com')
         self.clean_cache('globo.com')
         self.clean_cache('g1.globo.com')
+        self.clean_feeds()
 
     def tearDown(self):
         self.db.rollback()
@@ -72,6 +74,8 @@ class ApiTestCase(CowTestCase):
             REDISPORT=57575,
             MATERIAL_GIRL_REDISHOST='localhost',
             MATERIAL_GIRL_REDISPORT=57575,
+            RESPONSE_CACHE_EXPIRATION_IN_SECONDS={},
+            DB_THREAD_POOL_SIZE=0,
         )
 
     def get_server(self):
@@ -101,6 +105,14 @@ class ApiTestCase(CowTestCase):
         self.server.application.redis.delete('%s-bad-request-count' % domain_name, callback=do_nothing)
         self.server.application.redis.delete('%s-response-time-avg' % domain_name, callback=do_nothing)
 
+    def clean_feeds(self):
+        do_nothing = lambda *args, **kw: None
+
+        self.server.application.redis.delete('last-reviews', callback=do_nothing)
+        self.server.application.redis.delete('last-requests', callback=do_nothing)
+        self.server.application.redis.delete(COMPLETED_REVIEWS_KEY, callback=do_nothing)
+        self.server.application.redis.delete(COMPLETED_REVIEWS_SINCE_KEY, callback=do_nothing)
+
     def connect_to_sync_redis(self):
         import redis
         from holmes.cache import SyncCache
@@ -6,7 +6,7 @@ from preggy import expect
 
 from holmes.config import Config
 from holmes.reviewer import Reviewer
-from holmes.facters.sitemap import SitemapFacter
+from holmes.facters.sitemap import SitemapFacter, parse_sitemap
 from tests.unit.base import FacterTestCase
 from tests.fixtures import PageFactory
 
@@ -257,3 +257,13 @@ class TestSitemapFacter(FacterTestCase):
         expect('total.sitemap.urls' in definitions).to_be_true()
         expect('total.size.sitemap' in definitions).to_be_true()
         expect('total.size.sitemap.gzipped' in definitions).to_be_true()
+
+    def test_can_parse_sitemap(self):
+        content = self.get_file('url_sitemap.xml')
+
+        size_sitemap, size_gzip, sitemaps, urls = parse_sitemap(content)
+
+        expect(size_sitemap).to_equal(0.296875)
+        expect(size_gzip).to_equal(0.1494140625)
+        expect(sitemaps).to_be_empty()
+        expect(urls).to_equal(['http://domain.com/1.html', 'http://domain.com/2.html'])
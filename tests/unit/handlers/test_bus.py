@@ -0,0 +1,71 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase
+
+from mock import Mock
+from preggy import expect
+from ujson import loads
+
+from holmes.handlers.bus import EventBusHandler
+
+
+class TestEventBusHandler(TestCase):
+    def get_handler(self, cursor):
+        handler = EventBusHandler.__new__(EventBusHandler)
+        handler.application = Mock(config=Mock(EVENT_BUS_MAX_PENDING_FRAMES=10))
+        handler.application.event_bus.get_cursor.return_value = '9'
+        handler.get_argument = Mock(return_value=cursor)
+        handler.async_callback = lambda callback: callback
+        handler.ws_connection = Mock()
+        handler.stream = Mock()
+        handler.stream.closed.return_value = False
+        handler.stream.writing.return_value = False
+        handler.write_message = Mock()
+
+        handler.open()
+
+        return handler
+
+    def get_written(self, handler):
+        return [call[0][0] for call in handler.write_message.call_args_list]
+
+    def test_new_client_starts_from_current_cursor(self):
+        handler = self.get_handler(None)
+
+        expect(loads(self.get_written(handler)[0])).to_equal({'cursor': '9', 'reload': False, 'events': []})
+
+    def test_resumes_with_missed_frame_then_newer_live_frames(self):
+        handler = self.get_handler('2')
+        event_bus = handler.application.event_bus
+
+        handler.on_event('replayed', 3, 4)
+        handler.on_event('live', 5, 6)
+        expect(handler.write_message.called).to_be_false()
+
+        resume = event_bus.get_frames_since.call_args[0][2]
+        resume(('missed', 4))
+
+        expect(self.get_written(handler)).to_equal(['missed', 'live'])
+
+        handler.on_event('next', 7, 7)
+        expect(self.get_written(handler)).to_equal(['missed', 'live', 'next'])
+
+    def test_reloads_when_missed_events_are_gone(self):
+        handler = self.get_handler('2')
+        event_bus = handler.application.event_bus
+
+        event_bus.get_frames_since.call_args[0][2](None)
+
+        expect(loads(self.get_written(handler)[0])).to_equal({'cursor': '9', 'reload': True, 'events': []})
+
+    def test_reloads_when_live_frame_was_partly_replayed(self):
+        handler = self.get_handler('2')
+        event_bus = handler.application.event_bus
+
+        handler.on_event('straddling', 4, 5)
+        event_bus.get_frames_since.call_args[0][2](('missed', 4))
+
+        written = self.get_written(handler)
+        expect(written[0]).to_equal('missed')
+        expect(loads(written[1])['reload']).to_be_true()
@@ -0,0 +1,62 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from mock import Mock
+from preggy import expect
+from tornado import gen
+from tornado.concurrent import Future
+from tornado.testing import AsyncTestCase, gen_test
+
+from holmes.config import Config
+from holmes.handlers import cached_response
+
+
+class FakeCache(object):
+    def __init__(self, io_loop):
+        self.io_loop = io_loop
+        self.pending_responses = {}
+        self.responses = {}
+        self.gets = 0
+
+    def get_response(self, key):
+        self.gets += 1
+        future = Future()
+        self.io_loop.add_callback(lambda: future.set_result(self.responses.get(key)))
+        return future
+
+
+class FakeHandler(object):
+    def __init__(self, application, cache, computed):
+        self.application = application
+        self.cache = cache
+        self.computed = computed
+        self.request = Mock(uri='/workers/info/')
+        self.written = []
+
+    @cached_response('workers-info')
+    @gen.coroutine
+    def get(self):
+        self.computed.append(self)
+        yield gen.Task(self.cache.io_loop.add_callback)
+        self.cache.responses['response-workers-info-/workers/info/'] = ('"etag"', '{}')
+
+    def write_json_body(self, body, etag):
+        self.written.append((etag, body))
+
+
+class TestCachedResponse(AsyncTestCase):
+
+    @gen_test
+    def test_overlapping_requests_compute_the_response_once(self):
+        application = Mock(config=Config(RESPONSE_CACHE_EXPIRATION_IN_SECONDS={'workers-info': 60}))
+        cache = FakeCache(self.io_loop)
+        computed = []
+
+        first = FakeHandler(application, cache, computed)
+        second = FakeHandler(application, cache, computed)
+
+        yield [first.get(), second.get()]
+
+        expect(computed).to_equal([first])
+        expect(second.written).to_equal([('"etag"', '{}')])
+        expect(cache.pending_responses).to_be_empty()
@@ -0,0 +1,26 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from preggy import expect
+from tornado.testing import gen_test
+from ujson import loads
+
+from tests.unit.base import ApiTestCase
+
+
+class TestMaterialsHandler(ApiTestCase):
+    @gen_test
+    def test_can_get_material_stats(self):
+        sync_cache = self.connect_to_sync_redis()
+        sync_cache.redis.delete('material-stats')
+
+        sync_cache.set_material_stats('next_jobs_count', {'totalComputationTime': 0.5})
+        sync_cache.set_material_stats('domains_details', {'totalComputationTime': 3.0})
+
+        response = yield self.http_client.fetch(self.get_url('/materials'))
+
+        expect(response.code).to_equal(200)
+        expect(loads(response.body)).to_equal([
+            {'name': 'domains_details', 'totalComputationTime': 3.0},
+            {'name': 'next_jobs_count', 'totalComputationTime': 0.5},
+        ])
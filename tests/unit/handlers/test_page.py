@@ -12,7 +12,7 @@ from tornado.testing import gen_test
 from tornado.httpclient import HTTPError
 from mock import Mock
 
-from holmes.models import Page
+from holmes.models import Page, ViolationsPerDay
 from tests.unit.base import ApiTestCase
 from tests.fixtures import DomainFactory, PageFactory, ReviewFactory
 
@@ -183,9 +183,14 @@ class TestViolationsPerDayHandler(ApiTestCase):
 
         page = PageFactory.create()
 
-        ReviewFactory.create(page=page, is_active=False, is_complete=True, completed_date=dt, number_of_violations=20)
-        ReviewFactory.create(page=page, is_active=False, is_complete=True, completed_date=dt2, number_of_violations=10)
-        ReviewFactory.create(page=page, is_active=True, is_complete=True, completed_date=dt3, number_of_violations=30)
+        reviews = [
+            ReviewFactory.create(page=page, is_active=False, is_complete=True, completed_date=dt, number_of_violations=20),
+            ReviewFactory.create(page=page, is_active=False, is_complete=True, completed_date=dt2, number_of_violations=10),
+            ReviewFactory.create(page=page, is_active=True, is_complete=True, completed_date=dt3, number_of_violations=30)
+        ]
+
+        for review in reviews:
+            ViolationsPerDay.add_review(self.db, review)
 
         response = yield self.http_client.fetch(
             self.get_url('/page/%s/violations-per-day/' % page.uuid)
@@ -1,6 +1,7 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import sys
 import calendar
 from datetime import datetime, timedelta
 from preggy import expect
@@ -8,8 +9,10 @@ from ujson import loads
 from tests.unit.base import ApiTestCase
 from tests.fixtures import RequestFactory
 from tornado.testing import gen_test
+from tornado.httpclient import HTTPError
 
 from holmes.models import Request
+from holmes.utils import encode_cursor
 
 
 class TestLastRequestsHandler(ApiTestCase):
@@ -45,6 +48,31 @@ class TestLastRequestsHandler(ApiTestCase):
         })
 
 
+    @gen_test
+    def test_get_last_requests_with_cursor_of_another_endpoint(self):
+        cursor = encode_cursor(datetime(2013, 11, 12).date(), 10)
+
+        try:
+            yield self.http_client.fetch(self.get_url('/last-requests/?cursor=%s' % cursor))
+        except HTTPError:
+            err = sys.exc_info()[1]
+            expect(err.code).to_equal(400)
+        else:
+            assert False, 'Should not have got this far'
+
+    @gen_test
+    def test_get_last_requests_with_empty_page(self):
+        RequestFactory.create()
+
+        response = yield self.http_client.fetch(self.get_url('/last-requests/?page_size=0'))
+
+        expect(response.code).to_equal(200)
+
+        result = loads(response.body)
+        expect(result['requests']).to_be_empty()
+        expect(result).not_to_include('nextCursor')
+
+
 class TestRequestsInLastDayHandler(ApiTestCase):
     @gen_test
     def test_get_requests_in_last_day(self):
@@ -10,6 +10,7 @@ from tornado.testing import gen_test
 from tornado.httpclient import HTTPError
 from ujson import loads
 
+from holmes import __version__
 from tests.unit.base import ApiTestCase
 from tests.fixtures import PageFactory, ReviewFactory, KeyFactory
 
@@ -81,6 +82,43 @@ class TestReviewHandler(ApiTestCase):
         expect(loads(response.body)).to_be_like(expected)
 
 
+    @gen_test
+    def test_completed_review_is_served_with_etag(self):
+        review = ReviewFactory.create(is_complete=True, completed_date=datetime(2010, 11, 12, 13, 14, 15))
+
+        url = self.get_url('/page/%s/review/%s' % (review.page.uuid, review.uuid))
+
+        response = yield self.http_client.fetch(url)
+
+        expect(response.code).to_equal(200)
+        expect(response.headers['Etag']).to_equal('"%s-%s"' % (review.uuid, __version__))
+        expect(loads(response.body)['uuid']).to_equal(str(review.uuid))
+
+        try:
+            yield self.http_client.fetch(url, headers={'If-None-Match': response.headers['Etag']})
+        except HTTPError:
+            err = sys.exc_info()[1]
+            expect(err.code).to_equal(304)
+        else:
+            assert False, 'Should not have got this far'
+
+    @gen_test
+    def test_etag_of_review_from_another_page_is_not_modified(self):
+        review = ReviewFactory.create(is_complete=True, completed_date=datetime(2010, 11, 12, 13, 14, 15))
+        page = PageFactory.create()
+
+        url = self.get_url('/page/%s/review/%s' % (page.uuid, review.uuid))
+        etag = '"%s-%s"' % (review.uuid, __version__)
+
+        try:
+            yield self.http_client.fetch(url, headers={'If-None-Match': etag})
+        except HTTPError:
+            err = sys.exc_info()[1]
+            expect(err.code).to_equal(404)
+        else:
+            assert False, 'Should not have got this far'
+
+
 class TestLastReviewsHandler(ApiTestCase):
 
     @gen_test
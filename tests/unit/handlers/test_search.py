@@ -8,7 +8,8 @@ from preggy import expect
 from tornado.testing import gen_test
 
 from tests.unit.base import ApiTestCase
-from tests.fixtures import PageFactory, ReviewFactory
+from holmes.models import Domain
+from tests.fixtures import PageFactory, ReviewFactory, DomainFactory
 
 
 class TestSearchHandler(ApiTestCase):
@@ -43,3 +44,42 @@ class TestSearchHandler(ApiTestCase):
             u'reviewId': str(review1.uuid),
             u'uuid': str(page.uuid)
         })
+
+
+class TestSearchAutocompleteHandler(ApiTestCase):
+
+    @gen_test
+    def test_can_autocomplete_urls(self):
+        self.db.query(Domain).delete()
+
+        domain = DomainFactory.create(url='http://mypage.com', name='mypage.com')
+        page = PageFactory.create(domain=domain, url='http://mypage.com/news/', violations_count=3)
+        PageFactory.create(domain=domain, url='http://mypage.com/sports/', violations_count=8)
+
+        review = ReviewFactory.create(page=page, is_active=True, is_complete=True)
+        page.last_review_uuid = review.uuid
+        self.db.flush()
+
+        response = yield self.http_client.fetch(
+            self.get_url('/search/autocomplete?term=http://www.mypage.com/n'),
+            method='GET',
+        )
+
+        expect(response.code).to_equal(200)
+
+        expect(loads(response.body)).to_be_like([{
+            u'uuid': str(page.uuid),
+            u'url': u'http://mypage.com/news/',
+            u'reviewId': str(review.uuid),
+            u'violationCount': 3
+        }])
+
+    @gen_test
+    def test_autocomplete_ignores_invalid_limit(self):
+        response = yield self.http_client.fetch(
+            self.get_url('/search/autocomplete?term=unknown.com&limit=abc'),
+            method='GET',
+        )
+
+        expect(response.code).to_equal(200)
+        expect(loads(response.body)).to_be_empty()
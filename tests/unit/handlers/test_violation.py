@@ -23,7 +23,7 @@ class TestMostCommonViolationsHandler(ApiTestCase):
     @gen_test
     def test_can_get_most_common_violations(self):
         self.db.query(Violation).delete()
-        self.clean_cache(cache_keys=['most-common-violations'])
+        self.clean_cache(cache_keys=['violations-ranking'])
 
         review = ReviewFactory.create()
 
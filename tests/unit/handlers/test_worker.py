@@ -1,10 +1,14 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import sys
+
 from ujson import loads
 
 from preggy import expect
 from tornado.testing import gen_test
+from tornado.gen import Task
+from tornado.httpclient import HTTPError
 
 from holmes.models import Worker
 from tests.unit.base import ApiTestCase
@@ -56,3 +60,29 @@ class TestWorkerHandler(ApiTestCase):
         expect(returned_json['total']).to_equal(total_workers)
         expect(returned_json['active']).to_equal(total_workers - inactive_workers)
         expect(returned_json['inactive']).to_equal(inactive_workers)
+
+    @gen_test
+    def test_workers_info_is_served_from_response_cache(self):
+        self.server.application.config.RESPONSE_CACHE_EXPIRATION_IN_SECONDS = {'workers-info': 60}
+
+        url = self.get_url('/workers/info/')
+        yield Task(self.server.application.redis.delete, 'response-workers-info-/workers/info/')
+
+        response = yield self.http_client.fetch(url)
+        expect(response.code).to_equal(200)
+
+        WorkerFactory.create(current_url='http://www.globo.com/')
+        self.db.flush()
+
+        cached_response = yield self.http_client.fetch(url)
+        expect(cached_response.code).to_equal(200)
+        expect(cached_response.body).to_equal(response.body)
+        expect(cached_response.headers['Etag']).to_equal(response.headers['Etag'])
+
+        try:
+            yield self.http_client.fetch(url, headers={'If-None-Match': response.headers['Etag']})
+        except HTTPError:
+            err = sys.exc_info()[1]
+            expect(err.code).to_equal(304)
+        else:
+            assert False, 'Should not have got this far'
@@ -6,7 +6,7 @@ from datetime import datetime
 from preggy import expect
 from tornado.testing import gen_test
 
-from holmes.models import Domain, Request, Violation
+from holmes.models import Domain, Request, Violation, ViolationsPerDay
 from tests.unit.base import ApiTestCase
 from tests.fixtures import DomainFactory, PageFactory, ReviewFactory, RequestFactory
 
@@ -113,9 +113,14 @@ class TestDomain(ApiTestCase):
 
         page = PageFactory.create(domain=domain)
 
-        ReviewFactory.create(domain=domain, page=page, is_active=False, is_complete=True, completed_date=dt, number_of_violations=20)
-        ReviewFactory.create(domain=domain, page=page, is_active=False, is_complete=True, completed_date=dt2, number_of_violations=10)
-        ReviewFactory.create(domain=domain, page=page, is_active=True, is_complete=True, completed_date=dt3, number_of_violations=30)
+        reviews = [
+            ReviewFactory.create(domain=domain, page=page, is_active=False, is_complete=True, completed_date=dt, number_of_violations=20),
+            ReviewFactory.create(domain=domain, page=page, is_active=False, is_complete=True, completed_date=dt2, number_of_violations=10),
+            ReviewFactory.create(domain=domain, page=page, is_active=True, is_complete=True, completed_date=dt3, number_of_violations=30)
+        ]
+
+        for review in reviews:
+            ViolationsPerDay.add_review(self.db, review)
 
         violations = domain.get_violations_per_day(self.db)
 
@@ -159,6 +164,23 @@ class TestDomain(ApiTestCase):
 
         expect(reviews[0].last_review_uuid).to_equal(str(review.uuid))
 
+    def test_active_review_count_matches_reviews_filtered_by_path(self):
+        dt = datetime(2013, 10, 10, 10, 10, 10)
+
+        domain = DomainFactory.create(url='http://globo.com', name='globo.com')
+
+        page = PageFactory.create(domain=domain, url='http://globo.com/esportes/', last_review_date=dt)
+        other_page = PageFactory.create(domain=domain, url='http://globo.com/economia/', last_review_date=dt)
+
+        ReviewFactory.create(page=page, is_active=True, is_complete=True, completed_date=dt)
+        ReviewFactory.create(page=other_page, is_active=True, is_complete=True, completed_date=dt)
+
+        reviews = domain.get_active_reviews(self.db, url_starts_with='esportes/')
+        count = domain.get_active_review_count(self.db, url_starts_with='esportes/')
+
+        expect(reviews).to_length(1)
+        expect(count).to_equal(1)
+
     def test_invalid_domain_returns_None(self):
         domain_name = 'domain-details.com'
         domain = Domain.get_domain_by_name(domain_name, self.db)
@@ -248,6 +270,41 @@ class TestDomain(ApiTestCase):
         avg = domain.get_response_time_avg(self.db)
         expect(avg).to_be_like(0.3)
 
+    def test_can_get_active_reviews_per_domain(self):
+        domain = DomainFactory.create()
+        domain2 = DomainFactory.create()
+        DomainFactory.create()
+
+        ReviewFactory.create(page=PageFactory.create(domain=domain), is_active=True)
+        ReviewFactory.create(page=PageFactory.create(domain=domain), is_active=True)
+        ReviewFactory.create(page=PageFactory.create(domain=domain), is_active=False)
+        ReviewFactory.create(page=PageFactory.create(domain=domain2), is_active=True)
+
+        reviews_per_domain = Domain.get_active_reviews_per_domain(self.db)
+
+        expect(reviews_per_domain).to_be_like({
+            domain.id: 2,
+            domain2.id: 1
+        })
+
+    def test_can_get_requests_per_domain(self):
+        self.db.query(Request).delete()
+
+        domain = DomainFactory.create()
+        domain2 = DomainFactory.create()
+
+        RequestFactory.create(status_code=200, domain_name=domain.name, response_time=0.25)
+        RequestFactory.create(status_code=304, domain_name=domain.name, response_time=0.35)
+        RequestFactory.create(status_code=404, domain_name=domain.name, response_time=0.25)
+        RequestFactory.create(status_code=500, domain_name=domain2.name, response_time=0.25)
+
+        requests_per_domain = Domain.get_requests_per_domain(self.db)
+
+        expect(requests_per_domain).to_be_like({
+            domain.name: (2, 1, 0.3),
+            domain2.name: (0, 1, 0)
+        })
+
     def test_can_get_domains_details(self):
         self.db.query(Domain).delete()
 
@@ -287,6 +344,24 @@ class TestDomain(ApiTestCase):
         expect(details[0]['is_active']).to_be_true()
         expect(details[0]['averageResponseTime']).to_equal(0.3)
 
+    def test_can_get_domains_details_for_some_domains(self):
+        self.db.query(Domain).delete()
+
+        domain = DomainFactory.create(name='domain-1.com', url='http://domain-1.com/')
+        domain2 = DomainFactory.create(name='domain-2.com', url='http://domain-2.com/')
+
+        ReviewFactory.create(domain=domain, page=PageFactory.create(domain=domain), is_active=True, number_of_violations=20)
+        ReviewFactory.create(domain=domain2, page=PageFactory.create(domain=domain2), is_active=True, number_of_violations=30)
+        RequestFactory.create(status_code=200, domain_name=domain2.name, response_time=0.25)
+
+        details = Domain.get_domains_details(self.db, domain_names=['domain-2.com', 'unknown.com'])
+
+        expect(details).to_length(1)
+        expect(details[0]['name']).to_equal('domain-2.com')
+        expect(details[0]['violationCount']).to_equal(30)
+        expect(details[0]['pageCount']).to_equal(1)
+        expect(details[0]['averageResponseTime']).to_equal(0.25)
+
     def test_can_get_active_domains(self):
         self.db.query(Domain).delete()
 
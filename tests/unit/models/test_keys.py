@@ -3,9 +3,9 @@
 
 from preggy import expect
 from tests.unit.base import ApiTestCase
-from tests.fixtures import KeyFactory, KeysCategoryFactory
+from tests.fixtures import KeyFactory
 
-from holmes.models import Key
+from holmes.models import Key, KeysCategory
 
 
 class TestKey(ApiTestCase):
@@ -31,7 +31,7 @@ class TestKey(ApiTestCase):
     def test_can_add_category(self):
         key = KeyFactory.create(name='some.random.key')
 
-        category = KeysCategoryFactory(name='SEO')
+        category = KeysCategory.get_or_create(self.db, 'SEO')
 
         key.category = category
 
@@ -41,3 +41,28 @@ class TestKey(ApiTestCase):
 
         expect(str(loaded_category.name)).to_be_like('%s' % category.name)
         expect(loaded_category.name).to_equal(category.name)
+
+    def test_can_insert_keys(self):
+        KeyFactory.create(name='some.random.key', category=None)
+
+        fact_definitions = {'some.random.key': {'category': 'SEO'}}
+        violation_definitions = {
+            'some.random.key': {},
+            'other.random.key': {'category': 'HTTP'}
+        }
+
+        key_names = Key.insert_keys(self.db, fact_definitions, violation_definitions)
+
+        key = fact_definitions['some.random.key']['key']
+        other_key = violation_definitions['other.random.key']['key']
+
+        expect(violation_definitions['some.random.key']['key']).to_equal(key)
+        expect(key.category.name).to_equal('SEO')
+        expect(other_key.category.name).to_equal('HTTP')
+
+        expect(key_names).to_equal({
+            key.id: 'some.random.key',
+            other_key.id: 'other.random.key'
+        })
+
+        expect(self.db.query(Key).filter(Key.name == 'some.random.key').count()).to_equal(1)
@@ -42,3 +42,14 @@ class TestKeysCategory(ApiTestCase):
         # Get
         cat2 = KeysCategory.get_or_create(self.db, 'SEO')
         expect(cat1.id).to_equal(cat2.id)
+
+    def test_can_insert_categories(self):
+        category = KeysCategory.get_or_create(self.db, 'SEO')
+        self.db.add(category)
+        self.db.flush()
+
+        category_ids = KeysCategory.insert_categories(self.db, ['SEO', 'some.random.category'])
+
+        expect(category_ids).to_length(2)
+        expect(category_ids['SEO']).to_equal(category.id)
+        expect(self.db.query(KeysCategory).filter(KeysCategory.name == 'SEO').count()).to_equal(1)
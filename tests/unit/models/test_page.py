@@ -7,7 +7,7 @@ from datetime import datetime
 from preggy import expect
 
 from holmes.config import Config
-from holmes.models import Domain, Page, Settings
+from holmes.models import Domain, Page, Settings, ViolationsPerDay
 from tests.unit.base import ApiTestCase
 from tests.fixtures import PageFactory, ReviewFactory, DomainFactory, WorkerFactory, LimiterFactory
 
@@ -42,9 +42,14 @@ class TestPage(ApiTestCase):
 
         page = PageFactory.create()
 
-        ReviewFactory.create(page=page, domain=page.domain, is_active=False, is_complete=True, completed_date=dt, number_of_violations=20)
-        ReviewFactory.create(page=page, domain=page.domain, is_active=False, is_complete=True, completed_date=dt2, number_of_violations=10)
-        ReviewFactory.create(page=page, domain=page.domain, is_active=True, is_complete=True, completed_date=dt3, number_of_violations=30)
+        reviews = [
+            ReviewFactory.create(page=page, domain=page.domain, is_active=False, is_complete=True, completed_date=dt, number_of_violations=20),
+            ReviewFactory.create(page=page, domain=page.domain, is_active=False, is_complete=True, completed_date=dt2, number_of_violations=10),
+            ReviewFactory.create(page=page, domain=page.domain, is_active=True, is_complete=True, completed_date=dt3, number_of_violations=30)
+        ]
+
+        for review in reviews:
+            ViolationsPerDay.add_review(self.db, review)
 
         violations = page.get_violations_per_day(self.db)
 
@@ -76,6 +81,18 @@ class TestPage(ApiTestCase):
         invalid_page = Page.by_uuid(uuid4(), self.db)
         expect(invalid_page).to_be_null()
 
+    def test_can_get_live_fields_of_page(self):
+        page = PageFactory.create(score=2.5)
+
+        fields = Page.get_live_fields(self.db, page.uuid)
+        expect(fields).to_equal({
+            'lastModified': page.last_modified,
+            'expires': page.expires,
+            'score': 2.5
+        })
+
+        expect(Page.get_live_fields(self.db, uuid4())).to_equal({})
+
     def test_can_get_page_by_url_hash(self):
         page = PageFactory.create()
         PageFactory.create()
@@ -86,6 +103,59 @@ class TestPage(ApiTestCase):
         invalid_page = Page.by_uuid('123', self.db)
         expect(invalid_page).to_be_null()
 
+    def test_can_filter_pages_by_path(self):
+        self.db.query(Domain).delete()
+
+        globo = DomainFactory.create(url='http://globo.com', name='globo.com')
+        g1 = DomainFactory.create(url='http://g1.com', name='g1.com')
+
+        page = PageFactory.create(domain=globo, url='http://globo.com/esportes/index.html')
+        PageFactory.create(domain=globo, url='http://globo.com/news/')
+        other_page = PageFactory.create(domain=g1, url='http://g1.com/esportes/')
+
+        expect(page.path).to_equal('esportes/index.html')
+
+        query = self.db.query(Page.id)
+
+        pages = Page.filter_by_path(self.db, query, '/esportes').all()
+        expect(sorted(item.id for item in pages)).to_equal(sorted([page.id, other_page.id]))
+
+        pages = Page.filter_by_path(self.db, query, 'esportes', domain=globo).all()
+        expect([item.id for item in pages]).to_equal([page.id])
+
+        pages = Page.filter_by_path(self.db, query, 'http://www.g1.com/esp').all()
+        expect([item.id for item in pages]).to_equal([other_page.id])
+
+        expect(Page.filter_by_path(self.db, query, 'esp_rtes', domain=globo).all()).to_be_empty()
+
+    def test_can_search_pages_by_url(self):
+        self.db.query(Domain).delete()
+
+        globo = DomainFactory.create(url='http://globo.com', name='globo.com')
+        g1 = DomainFactory.create(url='http://g1.com', name='g1.com')
+
+        page = PageFactory.create(domain=globo, url='http://globo.com/esportes/', last_review_uuid=uuid4(), violations_count=2)
+        top_page = PageFactory.create(domain=globo, url='http://globo.com/esportes/futebol/', last_review_uuid=uuid4(), violations_count=10)
+        PageFactory.create(domain=globo, url='http://globo.com/esportes/volei/')
+        other_page = PageFactory.create(domain=g1, url='http://g1.com/esportes/', last_review_uuid=uuid4(), violations_count=5)
+
+        pages = Page.search_by_url(self.db, 'http://www.globo.com/esp')
+        expect([item.uuid for item in pages]).to_equal([top_page.uuid, page.uuid])
+
+        pages = Page.search_by_url(self.db, 'g', limit=2)
+        expect([item.uuid for item in pages]).to_equal([top_page.uuid, other_page.uuid])
+
+        # the candidate scan keeps the pages with most violations
+        pages = Page.search_by_url(self.db, 'globo.com/esp', candidates_limit=1)
+        expect([item.uuid for item in pages]).to_equal([top_page.uuid])
+
+        expect(Page.search_by_url(self.db, 'unknown.com/esportes')).to_be_empty()
+
+        # like wildcards in the term are matched literally
+        expect(Page.search_by_url(self.db, 'globo.com/esp_rtes')).to_be_empty()
+        expect(Page.search_by_url(self.db, 'globo.com/%')).to_be_empty()
+        expect(Page.search_by_url(self.db, '')).to_be_empty()
+
     def test_can_get_next_job(self):
         domain = DomainFactory.create()
         pages = []
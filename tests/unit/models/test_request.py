@@ -76,6 +76,33 @@ class TestRequest(ApiTestCase):
         )
         expect(invalid_code).to_equal([])
 
+    def test_can_get_requests_by_status_code_after_cursor(self):
+        completed_date = date(2014, 4, 1)
+        requests = [
+            RequestFactory.create(
+                domain_name='globo.com',
+                status_code=404,
+                completed_date=completed_date
+            ) for i in range(3)
+        ]
+
+        first_page = Request.get_requests_by_status_code('globo.com', 404, self.db, page_size=2)
+        expect([item.id for item in first_page]).to_equal([requests[2].id, requests[1].id])
+
+        last = first_page[-1]
+        next_page = Request.get_requests_by_status_code(
+            'globo.com', 404, self.db, page_size=2,
+            cursor=(last.completed_date, last.id)
+        )
+        expect([item.id for item in next_page]).to_equal([requests[0].id])
+
+    def test_can_get_last_requests_after_cursor(self):
+        requests = [RequestFactory.create() for i in range(3)]
+
+        loaded = Request.get_last_requests(self.db, page_size=2, cursor=(requests[2].id,))
+
+        expect([item.id for item in loaded]).to_equal([requests[1].id, requests[0].id])
+
     def test_can_get_requests_by_status_count(self):
         for i in range(4):
             RequestFactory.create(domain_name='globo.com', status_code=200)
@@ -3,9 +3,9 @@
 
 from preggy import expect
 
-from holmes.models import Violation, Key
+from holmes.models import Violation, Key, KeysCategory
 from tests.unit.base import ApiTestCase
-from tests.fixtures import ViolationFactory, KeyFactory, KeysCategoryFactory, DomainFactory
+from tests.fixtures import ViolationFactory, KeyFactory, DomainFactory
 
 
 class TestViolations(ApiTestCase):
@@ -41,11 +41,25 @@ class TestViolations(ApiTestCase):
             'category': 'undefined'
         })
 
+    def test_to_dict_resolves_key_name_from_key_names(self):
+        violation = ViolationFactory.create(
+            key=Key(name='some.random.fact'),
+            value='value',
+            points=1203,
+        )
+
+        violations_definitions = {'other.random.fact': {'title': 'Other'}}
+
+        data = violation.to_dict(violations_definitions, {violation.key_id: 'other.random.fact'})
+
+        expect(data['key']).to_equal('other.random.fact')
+        expect(data['title']).to_equal('Other')
+
     def test_can_get_most_common_violations(self):
         self.db.query(Violation).delete()
         self.db.query(Key).delete()
 
-        category = KeysCategoryFactory.create(name='SEO')
+        category = KeysCategory.get_or_create(self.db, 'SEO')
         for i in range(3):
             key = KeyFactory.create(name='some.random.fact.%s' % i, category=category)
             for j in range(i):
@@ -86,15 +100,26 @@ class TestViolations(ApiTestCase):
             }
         ])
 
+        for violation in self.db.query(Violation).all():
+            if violation.key.name == 'some.random.fact.2':
+                violation.review_is_active = False
+                break
+        self.db.flush()
+
         violations = Violation.get_most_common_violations(
             self.db,
-            violation_definitions,
-            sample_limit=2
+            violation_definitions
         )
 
         expect(violations).to_be_like([
             {
-                'count': 2,
+                'count': 1,
+                'key': 'some.random.fact.1',
+                'category': 'SEO',
+                'title': 'SEO'
+            },
+            {
+                'count': 1,
                 'key': 'some.random.fact.2',
                 'category': 'SEO',
                 'title': 'SEO'
@@ -0,0 +1,74 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, date
+
+from preggy import expect
+
+from holmes.models import ViolationsPerDay
+from tests.unit.base import ApiTestCase
+from tests.fixtures import PageFactory, ReviewFactory
+
+
+class TestViolationsPerDay(ApiTestCase):
+    def test_can_add_review(self):
+        page = PageFactory.create()
+
+        for hour in (10, 11):
+            review = ReviewFactory.create(
+                page=page,
+                is_complete=True,
+                completed_date=datetime(2014, 4, 1, hour, 0, 0),
+                number_of_violations=5
+            )
+            ViolationsPerDay.add_review(self.db, review)
+
+        for scope, scope_id in (('page', page.id), ('domain', page.domain.id)):
+            violations = ViolationsPerDay.get_violations_per_day(self.db, scope, scope_id)
+
+            expect(violations).to_be_like([
+                {
+                    "completedAt": "2014-4-1",
+                    "violation_count": 10,
+                    "violation_points": 20
+                }
+            ])
+
+    def test_add_review_ignores_reviews_without_violations(self):
+        page = PageFactory.create()
+        review = ReviewFactory.create(
+            page=page,
+            is_complete=True,
+            completed_date=datetime(2014, 4, 1, 10, 0, 0)
+        )
+
+        ViolationsPerDay.add_review(self.db, review)
+
+        violations = ViolationsPerDay.get_violations_per_day(self.db, 'page', page.id)
+        expect(violations).to_be_empty()
+
+    def test_can_get_violations_per_day_in_a_date_window(self):
+        page = PageFactory.create()
+
+        for day in (1, 2, 3):
+            review = ReviewFactory.create(
+                page=page,
+                is_complete=True,
+                completed_date=datetime(2014, 4, day, 10, 0, 0),
+                number_of_violations=day
+            )
+            ViolationsPerDay.add_review(self.db, review)
+
+        violations = ViolationsPerDay.get_violations_per_day(
+            self.db, 'page', page.id,
+            from_date=date(2014, 4, 2),
+            to_date=date(2014, 4, 2)
+        )
+
+        expect(violations).to_be_like([
+            {
+                "completedAt": "2014-4-2",
+                "violation_count": 2,
+                "violation_points": 1
+            }
+        ])
@@ -1,12 +1,19 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-from ujson import dumps
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from mock import patch
+from ujson import dumps, loads
 from preggy import expect
 from tornado.testing import gen_test
 from tornado.gen import Task
 
-from holmes.cache import Cache
+from holmes.cache import (
+    Cache, LocalCache, get_review_document_key, get_fresh_key, get_counter_keys, get_timestamp,
+    COMPLETED_REVIEWS_KEY, COMPLETED_REVIEWS_SINCE_KEY
+)
 from holmes.models import Domain, Limiter, Page, Request
 from tests.unit.base import ApiTestCase
 from tests.fixtures import (
@@ -14,6 +21,56 @@ from tests.fixtures import (
 )
 
 
+class LocalCacheTestCase(TestCase):
+    def test_can_get_and_set(self):
+        cache = LocalCache(10, 5)
+        cache.set('key', 'value')
+
+        expect(cache.get('key')).to_equal('value')
+        expect(cache.get('other-key')).to_be_null()
+
+    def test_is_disabled_without_size(self):
+        cache = LocalCache(0, 5)
+        cache.set('key', 'value')
+
+        expect(cache.get('key')).to_be_null()
+
+    def test_expires_values(self):
+        cache = LocalCache(10, 5)
+        cache.get_time = lambda: 10
+        cache.set('key', 'value')
+
+        cache.get_time = lambda: 15
+        expect(cache.get('key')).to_be_null()
+
+    def test_evicts_least_recently_used(self):
+        cache = LocalCache(2, 5)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        expect(cache.get('a')).to_equal(1)
+        expect(cache.get('b')).to_be_null()
+        expect(cache.get('c')).to_equal(3)
+
+    def test_get_or_set(self):
+        cache = LocalCache(10, 5)
+
+        expect(cache.get_or_set('key', lambda: 'value')).to_equal('value')
+        expect(cache.get_or_set('key', lambda: 'other-value')).to_equal('value')
+
+    def test_invalidate_by_event_type(self):
+        cache = LocalCache(10, 5, ['new-review'])
+        cache.set('key', 'value')
+
+        cache.invalidate('worker-status')
+        expect(cache.get('key')).to_equal('value')
+
+        cache.invalidate('new-review')
+        expect(cache.get('key')).to_be_null()
+
+
 class CacheTestCase(ApiTestCase):
     @property
     def cache(self):
@@ -318,13 +375,68 @@ class CacheTestCase(ApiTestCase):
         avg = yield self.cache.get_response_time_avg('globo.com')
         expect(avg).to_be_like(0.3)
 
+    @gen_test
+    def test_can_get_domain_counts(self):
+        self.db.query(Request).delete()
+        self.db.query(Domain).delete()
+
+        globocom = DomainFactory.create(url='http://globo.com', name='globo.com')
+        keys = [
+            'globo.com-%s' % name for name in (
+                'page-count', 'violation-count', 'active-review-count',
+                'good-request-count', 'bad-request-count', 'response-time-avg'
+            )
+        ]
+        yield Task(self.cache.redis.delete, keys + [get_fresh_key(key) for key in keys])
+
+        page = PageFactory.create(domain=globocom)
+        PageFactory.create(domain=globocom)
+        ReviewFactory.create(is_active=True, is_complete=True, domain=globocom, page=page, number_of_violations=4)
+
+        RequestFactory.create(status_code=200, domain_name='globo.com', response_time=0.25)
+        RequestFactory.create(status_code=404, domain_name='globo.com', response_time=0.35)
+
+        counts = yield self.cache.get_domain_counts(globocom)
+
+        expect(counts).to_be_like({
+            'page-count': 2,
+            'violation-count': 4,
+            'active-review-count': 1,
+            'good-request-count': 1,
+            'bad-request-count': 1,
+            'response-time-avg': 0.3
+        })
+
+        # should get from cache
+        self.cache.db = None
+
+        cached_counts = yield self.cache.get_domain_counts('globo.com')
+        expect(cached_counts).to_be_like(counts)
+
+    @gen_test
+    def test_domain_counts_misses_are_loaded_with_grouped_queries(self):
+        self.db.query(Domain).delete()
+
+        globocom = DomainFactory.create(url='http://globo.com', name='globo.com')
+        keys = ['globo.com-page-count', 'globo.com-violation-count']
+        yield Task(self.cache.redis.delete, keys + [get_fresh_key(key) for key in keys])
+
+        PageFactory.create(domain=globocom)
+
+        with patch.object(Domain, 'get_page_count') as page_count_mock:
+            counts = yield self.cache.get_domain_counts(globocom)
+
+        expect(page_count_mock.called).to_be_false()
+        expect(counts['page-count']).to_equal(1)
+        expect(counts['violation-count']).to_equal(0)
+
     @gen_test
     def test_can_get_most_common_violations(self):
         self.db.query(Request).delete()
         self.db.query(Domain).delete()
         DomainFactory.create(url='http://globo.com', name='globo.com')
 
-        cache_key = 'most-common-violations'
+        cache_key = 'violations-ranking'
         self.cache.redis.delete(cache_key)
 
         ReviewFactory.create(
@@ -350,15 +462,181 @@ class CacheTestCase(ApiTestCase):
                 'category': 'violation.%d.category' % k
             }
 
-        violations = yield self.cache.get_most_common_violations(violation_definitions, 14)
+        violations = yield self.cache.get_most_common_violations(violation_definitions)
         expect(violations).to_length(9)
 
         self.cache.db = None
 
-        violations_from_cache = yield self.cache.get_most_common_violations(violation_definitions, 14)
+        violations_from_cache = yield self.cache.get_most_common_violations(violation_definitions)
         expect(violations_from_cache).to_length(9)
         expect(violations_from_cache).to_be_like(violations)
 
+    @gen_test
+    def test_expired_data_is_refreshed_by_a_single_caller(self):
+        key = 'my-stale-data'
+        yield Task(self.cache.redis.delete, [key, get_fresh_key(key)])
+        yield Task(self.cache.redis.setex, key=key, value=dumps({'stale': True}), seconds=60)
+
+        data = yield Task(self.cache.get_data, key, 10, lambda: {'stale': False})
+        expect(data).to_be_like({'stale': False})
+
+        is_fresh = yield Task(self.cache.redis.exists, get_fresh_key(key))
+        expect(is_fresh).to_be_true()
+
+    @gen_test
+    def test_stale_data_is_served_while_another_caller_refreshes(self):
+        key = 'my-stale-data'
+        yield Task(self.cache.redis.delete, [key, get_fresh_key(key)])
+        yield Task(self.cache.redis.setex, key=key, value=dumps({'stale': True}), seconds=60)
+
+        calls = []
+
+        def get_data_method():
+            calls.append(1)
+            return {'stale': False}
+
+        data = yield [
+            Task(self.cache.get_data, key, 10, get_data_method),
+            Task(self.cache.get_data, key, 10, get_data_method)
+        ]
+
+        expect(calls).to_length(1)
+        expect(data).to_be_like([{'stale': False}, {'stale': True}])
+
+    @gen_test
+    def test_missing_data_is_computed_once_per_process(self):
+        key = 'my-missing-data'
+        yield Task(self.cache.redis.delete, [key, get_fresh_key(key)])
+
+        calls = []
+
+        def get_data_method():
+            calls.append(1)
+            return {'computed': True}
+
+        data = yield [
+            Task(self.cache.get_data, key, 10, get_data_method),
+            Task(self.cache.get_data, key, 10, get_data_method)
+        ]
+
+        expect(calls).to_length(1)
+        expect(data).to_be_like([{'computed': True}, {'computed': True}])
+
+    @gen_test
+    def test_can_get_last_reviews(self):
+        for i in range(3):
+            ReviewFactory.create(
+                is_active=True,
+                is_complete=True,
+                completed_date=datetime(2014, 4, 1, 10, i, 0),
+                number_of_violations=i
+            )
+
+        reviews = yield self.cache.get_last_reviews()
+        expect(reviews).to_length(3)
+        expect([review['violationCount'] for review in reviews]).to_equal([2, 1, 0])
+
+        self.cache.db = None
+
+        reviews_from_cache = yield self.cache.get_last_reviews()
+        expect(reviews_from_cache).to_length(3)
+        expect([review['uuid'] for review in reviews_from_cache]).to_equal([review['uuid'] for review in reviews])
+
+    @gen_test
+    def test_can_get_last_requests(self):
+        self.db.query(Request).delete()
+
+        requests = [RequestFactory.create() for i in range(3)]
+
+        loaded = yield self.cache.get_last_requests(page_size=2)
+        expect([request['id'] for request in loaded]).to_equal([requests[2].id, requests[1].id])
+
+        self.cache.db = None
+
+        loaded = yield self.cache.get_last_requests(current_page=2, page_size=2)
+        expect([request['id'] for request in loaded]).to_equal([requests[0].id])
+
+        loaded = yield self.cache.get_last_requests(current_page=3, page_size=2)
+        expect(loaded).to_be_empty()
+
+    @gen_test
+    def test_can_get_review_document(self):
+        review = ReviewFactory.create(is_complete=True, number_of_violations=2)
+        self.cache.redis.delete(get_review_document_key(review.uuid))
+
+        document = yield self.cache.get_review_document(review.uuid)
+        expect(document['uuid']).to_equal(str(review.uuid))
+        expect(document['violationCount']).to_equal(2)
+        expect(document['page']).to_equal({'uuid': str(review.page.uuid), 'url': review.page.url})
+        expect(document['violationPoints']).to_equal(sum(violation.points for violation in review.violations))
+
+        self.cache.db = None
+
+        document_from_cache = yield self.cache.get_review_document(review.uuid)
+        expect(document_from_cache['uuid']).to_equal(str(review.uuid))
+        expect(document_from_cache['violations']).to_length(2)
+
+    @gen_test
+    def test_review_document_is_not_stored_for_incomplete_review(self):
+        review = ReviewFactory.create(is_complete=False)
+        key = get_review_document_key(review.uuid)
+        self.cache.redis.delete(key)
+
+        document = yield self.cache.get_review_document(review.uuid)
+        expect(document['isComplete']).to_be_false()
+
+        has_key = yield self.cache.has_key(key)
+        expect(has_key).to_be_false()
+
+    @gen_test
+    def test_can_get_reviews_count_in_period(self):
+        to_date = datetime.utcnow()
+        from_date = to_date - timedelta(hours=1)
+
+        first_date = to_date - timedelta(minutes=45, seconds=10)
+        reviews = {
+            'old': to_date - timedelta(minutes=70),
+            'first': first_date,
+            'last': to_date - timedelta(minutes=5),
+        }
+
+        yield Task(self.cache.redis.set, COMPLETED_REVIEWS_SINCE_KEY, repr(get_timestamp(to_date - timedelta(hours=2))))
+        yield Task(self.cache.redis.zadd, COMPLETED_REVIEWS_KEY, dict(
+            (review_uuid, get_timestamp(completed_date)) for review_uuid, completed_date in reviews.items()
+        ))
+
+        self.cache.db = None
+
+        count, first = yield self.cache.get_reviews_count_in_period(from_date, to_date)
+        expect(count).to_equal(2)
+        expect(abs((first - first_date).total_seconds())).to_be_lesser_than(0.001)
+
+    @gen_test
+    def test_reviews_count_in_period_falls_back_to_db_until_recorded(self):
+        to_date = datetime.utcnow()
+        from_date = to_date - timedelta(hours=1)
+
+        ReviewFactory.create(is_active=True, completed_date=to_date - timedelta(minutes=30))
+        ReviewFactory.create(is_active=False, completed_date=to_date - timedelta(minutes=20))
+
+        yield Task(self.cache.redis.set, COMPLETED_REVIEWS_SINCE_KEY, repr(get_timestamp(to_date - timedelta(minutes=10))))
+
+        count, first = yield self.cache.get_reviews_count_in_period(from_date, to_date)
+        expect(count).to_equal(1)
+
+    @gen_test
+    def test_feed_is_seeded_once(self):
+        self.db.query(Request).delete()
+        requests = [RequestFactory.create() for i in range(3)]
+
+        yield [
+            Task(self.cache.get_last_requests, page_size=2),
+            Task(self.cache.get_last_requests, page_size=2)
+        ]
+
+        items = yield Task(self.cache.redis.lrange, 'last-requests', 0, -1)
+        expect([loads(item)['id'] for item in items]).to_equal([request.id for request in reversed(requests)])
+
     @gen_test
     def test_can_get_next_jobs_count(self):
         self.db.query(Domain).delete()
@@ -460,6 +738,19 @@ class CacheTestCase(ApiTestCase):
         expect(limit).to_equal(3)
 
 
+    @gen_test
+    def test_can_get_limits_usage(self):
+        urls = ['http://globo.com', 'http://g1.globo.com']
+        yield Task(self.cache.redis.delete, ['limit-for-%s' % url for url in urls])
+
+        yield Task(self.cache.redis.zadd, 'limit-for-http://globo.com', {'a': 1, 'b': 2, 'c': 3})
+
+        usages = yield self.cache.get_limits_usage(urls)
+        expect(usages).to_equal([3, 0])
+
+        usages = yield self.cache.get_limits_usage([])
+        expect(usages).to_be_empty()
+
 class SyncCacheTestCase(ApiTestCase):
     def setUp(self):
         super(SyncCacheTestCase, self).setUp()
@@ -648,6 +939,118 @@ class SyncCacheTestCase(ApiTestCase):
         page_count = self.sync_cache.redis.get(key)
         expect(page_count).to_equal('2')
 
+    def test_increment_count_buffers_increments_while_seeding(self):
+        key = 'g.com-my-key'
+        self.sync_cache.redis.delete(*get_counter_keys(key))
+
+        gcom = DomainFactory.create(url="http://g.com", name="g.com")
+        PageFactory.create(domain=gcom)
+
+        # another worker is loading the counter from the database
+        self.sync_cache.redis.set('%s-seed-lock' % key, 1)
+
+        for i in range(2):
+            value = self.sync_cache.increment_count(
+                'my-key',
+                gcom.name,
+                lambda domain: domain.get_page_count(self.db)
+            )
+            expect(value).to_be_null()
+
+        expect(self.sync_cache.redis.exists(key)).to_be_false()
+        expect(self.sync_cache.redis.get('%s-pending' % key)).to_equal('2')
+
+        self.sync_cache.redis.delete('%s-seed-lock' % key)
+
+        value = self.sync_cache.increment_count(
+            'my-key',
+            gcom.name,
+            lambda domain: domain.get_page_count(self.db)
+        )
+        expect(value).to_equal(3)
+        expect(self.sync_cache.redis.get(key)).to_equal('3')
+        expect(self.sync_cache.redis.exists('%s-pending' % key)).to_be_false()
+        expect(self.sync_cache.redis.exists('%s-seed-lock' % key)).to_be_false()
+
+    def test_can_get_and_remove_dirty_domains(self):
+        self.sync_cache.redis.delete('dirty-domains')
+
+        self.sync_cache.mark_domain_dirty('globo.com')
+        self.sync_cache.mark_domain_dirty('g1.globo.com')
+        self.sync_cache.mark_domain_dirty('globo.com')
+
+        domain_names = self.sync_cache.get_dirty_domains()
+        expect(domain_names).to_equal(set(['globo.com', 'g1.globo.com']))
+
+        self.sync_cache.mark_domain_dirty('globoesporte.com')
+        self.sync_cache.remove_dirty_domains(domain_names)
+
+        expect(self.sync_cache.get_dirty_domains()).to_equal(set(['globoesporte.com']))
+
+    def test_can_pop_material_reads(self):
+        self.sync_cache.redis.delete('material-reads')
+        self.sync_cache.redis.hincrby('material-reads', 'domains_details', 2)
+
+        expect(self.sync_cache.pop_material_reads()).to_equal({'domains_details': 2})
+        expect(self.sync_cache.pop_material_reads()).to_be_empty()
+
+    def test_can_get_material_next_refresh(self):
+        self.sync_cache.redis.delete('material-refreshes')
+
+        expect(self.sync_cache.get_material_next_refresh('domains_details')).to_be_null()
+
+        self.sync_cache.set_material_next_refresh('domains_details', 110.5)
+
+        expect(self.sync_cache.get_material_next_refresh('domains_details')).to_equal(110.5)
+
+    def test_increment_violations_ranking(self):
+        key = 'violations-ranking'
+        self.sync_cache.redis.delete(key)
+
+        self.sync_cache.increment_violations_ranking({'violation.1': 1})
+        expect(self.sync_cache.redis.exists(key)).to_be_false()
+
+        self.sync_cache.redis.zadd(key, 3, 'violation.1', 1, 'violation.2')
+
+        self.sync_cache.increment_violations_ranking({
+            'violation.1': 2,
+            'violation.2': -1,
+            'violation.3': 1
+        })
+
+        ranking = self.sync_cache.redis.zrevrange(key, 0, -1, withscores=True)
+        expect(ranking).to_be_like([('violation.1', 5.0), ('violation.3', 1.0)])
+
+    def test_add_last_request(self):
+        key = 'last-requests'
+        self.sync_cache.redis.delete(key)
+
+        self.sync_cache.add_last_request({'id': 1})
+        expect(self.sync_cache.redis.exists(key)).to_be_false()
+
+        self.sync_cache.redis.rpush(key, dumps({'id': 1}))
+
+        for request_id in range(2, self.config.LAST_REQUESTS_LIMIT + 2):
+            self.sync_cache.add_last_request({'id': request_id})
+
+        requests = self.sync_cache.redis.lrange(key, 0, -1)
+        expect(requests).to_length(self.config.LAST_REQUESTS_LIMIT)
+        expect(loads(requests[0])).to_equal({'id': self.config.LAST_REQUESTS_LIMIT + 1})
+
+    def test_add_and_remove_completed_reviews(self):
+        self.sync_cache.redis.delete(COMPLETED_REVIEWS_KEY, COMPLETED_REVIEWS_SINCE_KEY)
+        completed_date = datetime.utcnow()
+
+        self.sync_cache.add_completed_review('review-1', completed_date - timedelta(hours=3))
+        self.sync_cache.add_completed_review('review-2', completed_date)
+        self.sync_cache.add_completed_review('review-3', completed_date)
+        self.sync_cache.remove_completed_review('review-3')
+
+        expect(self.sync_cache.redis.zrange(COMPLETED_REVIEWS_KEY, 0, -1)).to_equal(['review-2'])
+        expect(float(self.sync_cache.redis.get(COMPLETED_REVIEWS_SINCE_KEY))).to_equal(
+            get_timestamp(completed_date - timedelta(hours=3))
+        )
+
     def test_get_page_count(self):
         self.sync_cache.redis.delete('g.com-page-count')
 
@@ -777,6 +1180,23 @@ class SyncCacheTestCase(ApiTestCase):
         )
         expect(count).to_equal(1)
 
+    def test_get_count_refreshes_expired_count(self):
+        gcom = DomainFactory.create(url="http://g.com", name="g.com")
+        PageFactory.create(domain=gcom)
+
+        key = 'g.com-my-key'
+        self.sync_cache.redis.delete(key, get_fresh_key(key))
+        self.sync_cache.redis.setex(key, 60, 10)
+
+        count = self.sync_cache.get_count(
+            'my-key',
+            gcom.name,
+            int(self.config.PAGE_COUNT_EXPIRATION_IN_SECONDS),
+            lambda domain: domain.get_page_count(self.db)
+        )
+        expect(count).to_equal(1)
+        expect(self.sync_cache.redis.ttl(key)).to_be_greater_than(60)
+
     def test_get_request_with_url_not_cached(self):
         url = 'http://g.com/test.html'
         key = 'urls-%s' % url
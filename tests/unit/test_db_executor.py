@@ -0,0 +1,60 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import threading
+
+from mock import Mock
+from preggy import expect
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+from tornado.testing import AsyncTestCase, gen_test
+
+from holmes.config import Config
+from holmes.db_executor import DatabaseExecutor
+from holmes.db_router import DatabaseRouter
+
+
+class TestDatabaseExecutor(AsyncTestCase):
+
+    @gen_test
+    def test_runs_inline_with_application_session_without_pool(self):
+        db = Mock()
+        executor = DatabaseExecutor(DatabaseRouter(db, Config()), 0)
+
+        result = yield executor.run(lambda session, value: (session, value), 10)
+
+        expect(result).to_equal((db, 10))
+
+    @gen_test
+    def test_runs_in_a_thread_with_its_own_session(self):
+        db = scoped_session(sessionmaker(bind=create_engine('sqlite://')))
+        executor = DatabaseExecutor(DatabaseRouter(db, Config()), 2)
+
+        session, thread = yield executor.run(lambda session: (session, threading.current_thread()))
+
+        expect(thread).not_to_equal(threading.current_thread())
+        expect(session).not_to_equal(db)
+        expect(session.get_bind()).to_equal(db.get_bind())
+
+        executor.shutdown()
+
+    @gen_test
+    def test_raises_errors_from_the_executed_method(self):
+        executor = DatabaseExecutor(DatabaseRouter(Mock(), Config()), 0)
+
+        try:
+            yield executor.run(lambda session: 1 / 0)
+        except ZeroDivisionError:
+            pass
+        else:
+            assert False, 'Should not have got this far'
+
+    @gen_test
+    def test_submits_methods_without_a_session_to_the_pool(self):
+        executor = DatabaseExecutor(DatabaseRouter(Mock(), Config()), 2)
+
+        thread = yield executor.submit(threading.current_thread)
+
+        expect(thread).not_to_equal(threading.current_thread())
+
+        executor.shutdown()
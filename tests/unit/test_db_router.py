@@ -0,0 +1,88 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from mock import Mock
+from preggy import expect
+from tornado.testing import AsyncTestCase
+
+from holmes.config import Config
+from holmes.db_executor import DatabaseExecutor
+from holmes.db_router import DatabaseRouter
+
+
+class TestDatabaseRouter(AsyncTestCase):
+
+    def test_reads_from_primary_without_replica(self):
+        db = Mock()
+        router = DatabaseRouter(db, Config())
+
+        expect(router.read_db).to_equal(db)
+        expect(router.replica_db).to_be_null()
+
+    def test_reads_from_primary_before_replica_lag_is_checked(self):
+        db = Mock()
+        router = DatabaseRouter(db, Config(SQLALCHEMY_REPLICA_CONNECTION_STRING='sqlite://'))
+        router.get_replica_lag = Mock(return_value=0)
+
+        expect(router.read_db).to_equal(db)
+        expect(router.get_replica_lag.called).to_be_false()
+
+    def test_reads_from_fresh_replica(self):
+        db = Mock()
+        router = DatabaseRouter(db, Config(SQLALCHEMY_REPLICA_CONNECTION_STRING='sqlite://'))
+
+        router.check_replica_lag()
+
+        expect(router.read_db).to_equal(router.replica_db)
+        expect(router.get_read_bind()).to_equal(router.replica_engine)
+
+    def test_reads_from_primary_when_replica_is_behind(self):
+        db = Mock()
+        router = DatabaseRouter(db, Config(
+            SQLALCHEMY_REPLICA_CONNECTION_STRING='sqlite://',
+            REPLICA_MAX_LAG_IN_SECONDS=10
+        ))
+        router.get_replica_lag = Mock(return_value=11)
+
+        router.check_replica_lag()
+
+        expect(router.read_db).to_equal(db)
+
+    def test_reads_from_primary_when_replica_lag_is_unknown(self):
+        db = Mock()
+        router = DatabaseRouter(db, Config(SQLALCHEMY_REPLICA_CONNECTION_STRING='sqlite://'))
+        router.get_replica_lag = Mock(return_value=None)
+
+        router.check_replica_lag()
+
+        expect(router.read_db).to_equal(db)
+
+    def test_replica_without_slave_status_is_not_fresh(self):
+        router = DatabaseRouter(Mock(), Config(SQLALCHEMY_REPLICA_CONNECTION_STRING='sqlite://'))
+        router.replica_engine = Mock()
+        router.replica_engine.dialect.name = 'mysql'
+        router.replica_engine.execute.return_value.first.return_value = None
+
+        expect(router.get_replica_lag()).to_be_null()
+
+    def test_checks_replica_lag_in_the_executor_pool(self):
+        db = Mock()
+        router = DatabaseRouter(db, Config(
+            SQLALCHEMY_REPLICA_CONNECTION_STRING='sqlite://',
+            REPLICA_LAG_CHECK_INTERVAL_IN_SECONDS=60
+        ))
+        executor = DatabaseExecutor(router, 2)
+
+        router.start_lag_checks(executor, self.io_loop)
+        expect(router.lag_check_pending).to_be_true()
+
+        self.io_loop.add_timeout(self.io_loop.time() + 0.1, self.stop)
+        self.wait()
+
+        expect(router.lag_check_pending).to_be_false()
+        expect(router.read_db).to_equal(router.replica_db)
+
+        router.remove()
+        executor.shutdown()
+
+        expect(router.lag_check_callback).to_be_null()
@@ -1,11 +1,11 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-from ujson import dumps
+from ujson import dumps, loads
 from preggy import expect
 from mock import Mock, patch
 
-from holmes.event_bus import EventBus
+from holmes.event_bus import EventBus, EventPublisher, PUBLISH_EVENT_SCRIPT
 from tests.unit.base import ApiTestCase
 
 
@@ -14,9 +14,18 @@ class TestEventBus(ApiTestCase):
         redis = Mock()
         app = Mock(
             redis=redis,
-            redis_pub_sub=redis
+            redis_pub_sub=redis,
+            config=Mock(
+                EVENT_BUS_THROTTLING_MESSAGE_TYPE={},
+                EVENT_BUS_MAX_EVENTS_PER_TYPE=2,
+                EVENT_BUS_FRAME_INTERVAL_IN_MS=500,
+                EVENT_BUS_REPLAY_BUFFER_SIZE=2,
+                EVENT_BUS_DELTA_MESSAGE_TYPE=['domain-counts']
+            )
         )
-        return redis, app, EventBus(app)
+        bus = EventBus(app)
+        bus.frames.stop()
+        return redis, app, bus
 
     def test_create_event_bus(self):
         redis, app, bus = self.get_bus()
@@ -81,8 +90,12 @@ class TestEventBus(ApiTestCase):
 
         expect(bus.publish_items).to_be_empty()
 
-        redis.publish.assert_any_call('events', 'message')
-        redis.publish.assert_any_call('events', 'message2')
+        redis.send_message.assert_any_call(
+            ['EVAL', PUBLISH_EVENT_SCRIPT, 2, 'events-sequence', 'events-replay', 'events', 2, 'message']
+        )
+        redis.send_message.assert_any_call(
+            ['EVAL', PUBLISH_EVENT_SCRIPT, 2, 'events-sequence', 'events-replay', 'events', 2, 'message2']
+        )
 
     def test_on_message_returns_if_null_message(self):
         redis, app, bus = self.get_bus()
@@ -116,9 +129,11 @@ class TestEventBus(ApiTestCase):
 
         value = dumps({'type': 'test'})
 
-        bus.on_message(('message', 'events', value))
+        bus.on_message(('message', 'events', '7:%s' % value))
+        expect(handler_mock.called).to_be_false()
 
-        expect(handler_mock.called).to_be_true()
+        bus.send_frames()
+        handler_mock.assert_called_once_with('{"cursor":"7","events":[%s]}' % value, 7, 7)
 
     @patch.object(EventBus, 'get_time')
     def test_throttling_message_by_message_type(self, time_mock):
@@ -131,6 +146,7 @@ class TestEventBus(ApiTestCase):
         bus.handlers['events']['uuid'] = handler_mock
         value = dumps({'type': 'new-request', 'url': 'http://globo.com/'})
         bus.on_message(('message', 'events', value))
+        bus.send_frames()
         expect(handler_mock.called).to_be_true()
 
         time_mock.return_value = 10
@@ -138,6 +154,7 @@ class TestEventBus(ApiTestCase):
         bus.handlers['events']['uuid'] = handler_mock
         value = dumps({'type': 'new-request', 'url': 'http://g1.globo.com/'})
         bus.on_message(('message', 'events', value))
+        bus.send_frames()
         expect(handler_mock.called).to_be_false()
 
         time_mock.return_value = 15
@@ -145,4 +162,197 @@ class TestEventBus(ApiTestCase):
         bus.handlers['events']['uuid'] = handler_mock
         value = dumps({'type': 'new-request', 'url': 'http://g2.globo.com/'})
         bus.on_message(('message', 'events', value))
+        bus.send_frames()
         expect(handler_mock.called).to_be_true()
+
+    def test_on_message_invalidates_local_cache(self):
+        redis, app, bus = self.get_bus()
+
+        bus.on_message(('message', 'events', dumps({'type': 'new-review'})))
+
+        app.local_cache.invalidate.assert_called_once_with('new-review')
+
+    def test_send_frames_coalesces_events_by_type(self):
+        redis, app, bus = self.get_bus()
+        handler_mock = Mock()
+        bus.handlers['events']['uuid'] = handler_mock
+
+        messages = [
+            dumps({'type': 'new-request', 'url': 'http://globo.com/%d' % i}) for i in range(4)
+        ]
+        review = dumps({'type': 'new-review', 'reviewId': '1'})
+
+        for message in messages[:2] + [review] + messages[2:]:
+            bus.on_message(('message', 'events', message))
+
+        bus.send_frames()
+
+        dropped = dumps({'type': 'dropped-events', 'eventType': 'new-request', 'count': 2})
+        handler_mock.assert_called_once_with(
+            '{"cursor":"0","events":[%s]}' % ','.join([messages[2], messages[3], dropped, review]), None, 0
+        )
+
+        handler_mock.reset_mock()
+        bus.send_frames()
+        expect(handler_mock.called).to_be_false()
+
+
+    def test_frames_carry_the_sequences_of_their_events(self):
+        redis, app, bus = self.get_bus()
+        handler_mock = Mock()
+        bus.handlers['events']['uuid'] = handler_mock
+
+        expect(bus.get_cursor('events')).to_equal('0')
+
+        bus.on_message(('message', 'events', '3:%s' % dumps({'type': 'new-review', 'id': 1})))
+        bus.on_message(('message', 'events', '4:%s' % dumps({'type': 'new-review', 'id': 2})))
+        bus.send_frames()
+
+        frame, first_sequence, last_sequence = handler_mock.call_args[0]
+        expect(loads(frame)['cursor']).to_equal('4')
+        expect((first_sequence, last_sequence)).to_equal((3, 4))
+        expect(bus.get_cursor('events')).to_equal('4')
+
+    def get_frames_since(self, bus, redis, cursor, events):
+        results = []
+        bus.get_frames_since('events', cursor, results.append)
+
+        if events is not None:
+            redis.send_message.call_args[1]['callback'](events)
+
+        return results[0]
+
+    def test_get_frames_since_cursor(self):
+        redis, app, bus = self.get_bus()
+        first = dumps({'type': 'test', 'id': 1})
+        second = dumps({'type': 'test', 'id': 2})
+
+        frame, sequence = self.get_frames_since(bus, redis, '2', ['3:%s' % first, '4:%s' % second])
+
+        redis.send_message.assert_called_once_with(
+            ['ZRANGEBYSCORE', 'events-replay', '(2', '+inf'],
+            callback=redis.send_message.call_args[1]['callback']
+        )
+        expect(frame).to_equal('{"cursor":"4","events":[%s,%s]}' % (first, second))
+        expect(sequence).to_equal(4)
+
+        expect(self.get_frames_since(bus, redis, '4', [])).to_equal((None, 4))
+
+    def test_get_frames_since_cursor_requires_reload(self):
+        redis, app, bus = self.get_bus()
+
+        # the events right after the cursor are no longer kept
+        expect(self.get_frames_since(bus, redis, '1', ['3:{}', '4:{}'])).to_be_null()
+
+        expect(self.get_frames_since(bus, redis, 'other-bus:1', None)).to_be_null()
+        expect(self.get_frames_since(bus, redis, 'invalid', None)).to_be_null()
+
+    def test_send_frames_sums_deltas(self):
+        redis, app, bus = self.get_bus()
+        handler_mock = Mock()
+        bus.handlers['events']['uuid'] = handler_mock
+
+        # more deltas than EVENT_BUS_MAX_EVENTS_PER_TYPE, none can be dropped
+        for i in range(3):
+            bus.on_message(('message', 'events', dumps({
+                'type': 'domain-counts', 'domainName': 'globo.com', 'pageCount': 1
+            })))
+        bus.on_message(('message', 'events', dumps({
+            'type': 'domain-counts', 'domainName': 'globo.com', 'reviewCount': 1, 'violationCount': 5
+        })))
+
+        bus.send_frames()
+
+        frame = loads(handler_mock.call_args[0][0])
+        expect(frame['events']).to_be_like([{
+            'type': 'domain-counts',
+            'domainName': 'globo.com',
+            'pageCount': 3,
+            'reviewCount': 1,
+            'violationCount': 5
+        }])
+
+class TestEventPublisher(ApiTestCase):
+    def get_publisher(self):
+        redis = Mock()
+        config = Mock(
+            EVENT_BUS_REPLAY_BUFFER_SIZE=10,
+            EVENT_PUBLISHER_FLUSH_INTERVAL_IN_SECONDS=1,
+            EVENT_PUBLISHER_AGGREGATED_MESSAGE_TYPE=['new-request'],
+            EVENT_BUS_DELTA_MESSAGE_TYPE=['domain-counts']
+        )
+
+        with patch.object(EventPublisher, 'get_time', return_value=10):
+            publisher = EventPublisher(redis, config)
+
+        return redis, publisher
+
+    @patch.object(EventPublisher, 'get_time')
+    def test_publish_buffers_messages(self, time_mock):
+        redis, publisher = self.get_publisher()
+        time_mock.return_value = 10
+
+        message = dumps({'type': 'new-review', 'reviewId': '1'})
+        publisher.publish(message)
+
+        expect(publisher.messages).to_equal([message])
+        expect(redis.pipeline.called).to_be_false()
+
+    @patch.object(EventPublisher, 'get_time')
+    def test_publish_aggregates_events_by_domain(self, time_mock):
+        redis, publisher = self.get_publisher()
+        time_mock.return_value = 10
+
+        for url in ('http://globo.com/1', 'http://globo.com/2', 'http://g1.globo.com/'):
+            publisher.publish(dumps({'type': 'new-request', 'url': url}))
+
+        expect(publisher.messages).to_be_empty()
+        expect(publisher.aggregated.values()).to_be_like([
+            {'type': 'new-request', 'url': 'http://globo.com/2', 'domainName': 'globo.com', 'count': 2},
+            {'type': 'new-request', 'url': 'http://g1.globo.com/', 'domainName': 'g1.globo.com', 'count': 1},
+        ])
+
+    @patch.object(EventPublisher, 'get_time')
+    def test_publish_flushes_after_interval(self, time_mock):
+        redis, publisher = self.get_publisher()
+        pipe = redis.pipeline.return_value
+
+        time_mock.return_value = 10
+        review = dumps({'type': 'new-review', 'reviewId': '1'})
+        publisher.publish(review)
+
+        time_mock.return_value = 11
+        publisher.publish(dumps({'type': 'new-request', 'url': 'http://globo.com/'}))
+
+        redis.pipeline.assert_called_once_with(transaction=False)
+        expect(pipe.eval.call_args_list).to_length(2)
+        pipe.eval.assert_any_call(PUBLISH_EVENT_SCRIPT, 2, 'events-sequence', 'events-replay', 'events', 10, review)
+        pipe.execute.assert_called_once_with()
+
+        expect(publisher.messages).to_be_empty()
+        expect(publisher.aggregated).to_be_empty()
+
+    def test_flush_without_messages(self):
+        redis, publisher = self.get_publisher()
+
+        publisher.flush()
+
+        expect(redis.pipeline.called).to_be_false()
+
+    @patch.object(EventPublisher, 'get_time')
+    def test_publish_sums_deltas_by_domain(self, time_mock):
+        redis, publisher = self.get_publisher()
+        time_mock.return_value = 10
+
+        for domain_name, violation_count in (('globo.com', 3), ('globo.com', -1), ('g1.globo.com', 2)):
+            publisher.publish(dumps({
+                'type': 'domain-counts',
+                'domainName': domain_name,
+                'violationCount': violation_count
+            }))
+
+        expect(publisher.messages).to_be_empty()
+        expect(publisher.aggregated.values()).to_be_like([
+            {'type': 'domain-counts', 'domainName': 'globo.com', 'violationCount': 2},
+            {'type': 'domain-counts', 'domainName': 'g1.globo.com', 'violationCount': 2},
+        ])
@@ -0,0 +1,188 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from preggy import expect
+from mock import Mock, patch
+
+from holmes.material import DomainsDetailsMaterial, MaterialScheduler
+from holmes.models import Domain
+from tests.unit.base import ApiTestCase
+
+
+class TestDomainsDetailsMaterial(ApiTestCase):
+    def get_material(self, dirty_domains, stored_details=None, next_full_refresh=None):
+        db_router = Mock()
+        cache = Mock()
+        cache.get_dirty_domains.return_value = dirty_domains
+        cache.get_material_next_refresh.return_value = next_full_refresh
+        storage = Mock()
+        storage.retrieve.return_value = stored_details
+        config = Mock(DOMAINS_DETAILS_FULL_REFRESH_IN_SECONDS=600)
+
+        material = DomainsDetailsMaterial(db_router, config, cache, storage)
+        material.get_time = Mock(return_value=100)
+
+        return db_router, material
+
+    @patch.object(Domain, 'get_domains_details')
+    def test_first_run_is_a_full_refresh(self, details_mock):
+        db_router, material = self.get_material(set())
+        details_mock.return_value = [{'name': 'a.com'}, {'name': 'b.com'}]
+
+        expect(material()).to_equal([{'name': 'a.com'}, {'name': 'b.com'}])
+
+        details_mock.assert_called_once_with(db_router.read_db)
+        material.cache.set_material_next_refresh.assert_called_once_with('domains_details-full-refresh', 700)
+
+    @patch.object(Domain, 'get_domains_details')
+    def test_full_refresh_patches_dirty_domains_from_primary(self, details_mock):
+        db_router, material = self.get_material(set(['a.com']))
+        details_mock.side_effect = [
+            [{'name': 'a.com', 'pageCount': 1}, {'name': 'b.com', 'pageCount': 1}],
+            [{'name': 'a.com', 'pageCount': 2}]
+        ]
+
+        expect(material()).to_equal([{'name': 'a.com', 'pageCount': 2}, {'name': 'b.com', 'pageCount': 1}])
+
+        expect(details_mock.call_args_list[0][0]).to_equal((db_router.read_db,))
+        expect(details_mock.call_args_list[1][0]).to_equal((db_router.db,))
+
+    @patch.object(Domain, 'get_domains_details')
+    def test_full_refresh_without_stored_details(self, details_mock):
+        db_router, material = self.get_material(set(), next_full_refresh=200)
+        details_mock.return_value = [{'name': 'a.com'}]
+
+        expect(material()).to_equal([{'name': 'a.com'}])
+
+        material.storage.retrieve.assert_called_once_with('domains_details')
+        details_mock.assert_called_once_with(db_router.read_db)
+
+    @patch.object(Domain, 'get_domains_details')
+    def test_patches_dirty_domains_into_stored_details(self, details_mock):
+        db_router, material = self.get_material(
+            set(['b.com', 'c.com']),
+            stored_details=[{'name': 'a.com', 'pageCount': 1}, {'name': 'b.com', 'pageCount': 1}],
+            next_full_refresh=200
+        )
+
+        details_mock.return_value = [{'name': 'b.com', 'pageCount': 2}, {'name': 'c.com', 'pageCount': 1}]
+
+        expect(material()).to_equal([
+            {'name': 'a.com', 'pageCount': 1},
+            {'name': 'b.com', 'pageCount': 2},
+            {'name': 'c.com', 'pageCount': 1},
+        ])
+
+        expect(details_mock.call_args[0][0]).to_equal(db_router.db)
+        expect(sorted(details_mock.call_args[1]['domain_names'])).to_equal(['b.com', 'c.com'])
+        expect(material.cache.set_material_next_refresh.called).to_be_false()
+
+    @patch.object(Domain, 'get_domains_details')
+    def test_keeps_dirty_domains_when_patching_fails(self, details_mock):
+        db_router, material = self.get_material(
+            set(['b.com']),
+            stored_details=[{'name': 'a.com', 'pageCount': 1}],
+            next_full_refresh=200
+        )
+
+        details_mock.side_effect = RuntimeError('database is gone')
+
+        try:
+            material()
+        except RuntimeError:
+            pass
+        else:
+            assert False, 'Should not have got this far'
+
+        expect(material.cache.remove_dirty_domains.called).to_be_false()
+
+        details_mock.side_effect = None
+        details_mock.return_value = [{'name': 'b.com', 'pageCount': 1}]
+
+        material()
+
+        material.cache.remove_dirty_domains.assert_called_once_with(set(['b.com']))
+
+    @patch.object(Domain, 'get_domains_details')
+    def test_does_not_query_without_dirty_domains(self, details_mock):
+        db_router, material = self.get_material(set(), stored_details=[{'name': 'a.com'}], next_full_refresh=200)
+
+        expect(material()).to_equal([{'name': 'a.com'}])
+        expect(details_mock.called).to_be_false()
+
+
+class TestMaterialScheduler(ApiTestCase):
+    def get_scheduler(self, reads=None, expiration=10):
+        material = Mock(expiration=expiration, lock_timeout=None)
+        material.get.return_value = {'count': 1}
+
+        girl = Mock(materials={'count': material})
+        girl.storage.is_expired.return_value = False
+
+        cache = Mock()
+        cache.pop_material_reads.return_value = reads or {}
+        cache.get_material_next_refresh.return_value = None
+
+        config = Mock(
+            MATERIAL_MIN_EXPIRATION_IN_SECONDS=5,
+            MATERIAL_MAX_EXPIRATION_IN_SECONDS=40,
+            MATERIAL_EXPENSIVE_COMPUTATION_IN_SECONDS=1,
+            MATERIAL_HOT_READS_PER_MINUTE=60,
+            MATERIAL_COLD_READS_PER_MINUTE=1
+        )
+
+        scheduler = MaterialScheduler(girl, cache, config)
+        scheduler.get_time = Mock(return_value=100)
+
+        return scheduler, girl, cache, material
+
+    def test_refreshes_and_records_stats(self):
+        scheduler, girl, cache, material = self.get_scheduler(reads={'count': 3})
+
+        scheduler.run()
+
+        girl.storage.store.assert_called_once_with('count', {'count': 1}, expiration=10, grace_period=20)
+        expect(scheduler.next_refresh['count']).to_equal(110)
+        cache.set_material_next_refresh.assert_called_once_with('count', 110)
+
+        name, stats = cache.set_material_stats.call_args[0]
+        expect(name).to_equal('count')
+        expect(stats['reads']).to_equal(3)
+        expect(stats['computations']).to_equal(1)
+        expect(stats['payloadSize']).to_equal(len('{"count":1}'))
+        expect(stats['expiration']).to_equal(10)
+
+    def test_skips_materials_not_due(self):
+        scheduler, girl, cache, material = self.get_scheduler()
+        scheduler.next_refresh['count'] = 110
+
+        scheduler.run()
+
+        expect(material.get.called).to_be_false()
+
+    def test_skips_materials_refreshed_by_another_worker(self):
+        scheduler, girl, cache, material = self.get_scheduler()
+        cache.get_material_next_refresh.return_value = 110
+
+        scheduler.run()
+
+        expect(material.get.called).to_be_false()
+        expect(scheduler.next_refresh['count']).to_equal(110)
+        expect(girl.storage.release_lock.call_count).to_equal(1)
+
+    def test_adapts_expiration_within_bounds(self):
+        scheduler, girl, cache, material = self.get_scheduler()
+
+        expect(scheduler.get_expiration(10, 0.1, 120, 10)).to_equal(5)
+        expect(scheduler.get_expiration(5, 0.1, 120, 10)).to_equal(5)
+        expect(scheduler.get_expiration(10, 2, 0, 10)).to_equal(20)
+        expect(scheduler.get_expiration(40, 2, 0, 10)).to_equal(40)
+        expect(scheduler.get_expiration(10, 2, 30, 10)).to_equal(10)
+        expect(scheduler.get_expiration(10, 0.1, 0, 10)).to_equal(10)
+
+    def test_moves_expiration_back_to_configured_one(self):
+        scheduler, girl, cache, material = self.get_scheduler()
+
+        expect(scheduler.get_expiration(5, 0.1, 30, 10)).to_equal(10)
+        expect(scheduler.get_expiration(40, 0.1, 0, 10)).to_equal(20)
+        expect(scheduler.get_expiration(20, 2, 30, 10)).to_equal(10)
@@ -0,0 +1,72 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+from os.path import exists
+from unittest import TestCase
+
+from preggy import expect
+
+from holmes.config import Config
+from holmes.plugins import PluginRegistry
+from holmes.validators.title import TitleValidator
+
+
+class TestPluginRegistry(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_registry(self, facters=None):
+        config = Config(
+            FACTERS=facters or ['holmes.facters.title.TitleFacter'],
+            VALIDATORS=['holmes.validators.title.TitleValidator'],
+            PLUGIN_MANIFEST_DIRECTORY=self.directory
+        )
+
+        return PluginRegistry(config)
+
+    def test_builds_and_writes_manifest(self):
+        registry = self.get_registry()
+
+        definitions = registry.get_violation_definitions()
+
+        expect(exists(registry.manifest_path)).to_be_true()
+        expect(registry.validators).to_equal([TitleValidator])
+        expect(definitions['page.title.size']['title']).to_equal('Maximum size of a page title')
+        expect(definitions['page.title.size']['category']).to_equal('SEO')
+
+    def test_reads_manifest_without_importing_plugins(self):
+        self.get_registry().get_violation_definitions()
+
+        registry = self.get_registry()
+        definitions = registry.get_violation_definitions()
+
+        expect(registry._validators).to_be_null()
+        expect(definitions['page.title.not_found']['description']('http://globo.com')).to_equal(
+            "Title was not found on 'http://globo.com'."
+        )
+        expect(registry.validators).to_equal([TitleValidator])
+
+    def test_manifest_is_keyed_by_configured_classes(self):
+        registry = self.get_registry()
+        other_registry = self.get_registry(facters=['holmes.facters.body.BodyFacter'])
+
+        expect(registry.manifest_path).not_to_equal(other_registry.manifest_path)
+
+    def test_manifest_is_keyed_by_plugin_module_mtime(self):
+        registry = self.get_registry()
+        module_path = os.path.splitext(__import__('holmes.facters.title', fromlist=['title']).__file__)[0] + '.py'
+        mtime = os.path.getmtime(module_path)
+
+        try:
+            os.utime(module_path, (mtime + 10, mtime + 10))
+            other_registry = self.get_registry()
+        finally:
+            os.utime(module_path, (mtime, mtime))
+
+        expect(registry.manifest_path).not_to_equal(other_registry.manifest_path)
@@ -0,0 +1,48 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+
+from preggy import expect
+from tornado.testing import AsyncTestCase
+
+from holmes.process_executor import ProcessExecutor
+
+
+def divide(dividend, divisor):
+    return dividend / divisor
+
+
+class TestProcessExecutor(AsyncTestCase):
+
+    def test_runs_inline_without_pool(self):
+        executor = ProcessExecutor(self.io_loop, 0)
+        futures = []
+
+        executor.run(futures.append, divide, 10, 2)
+
+        expect(futures).to_length(1)
+        expect(futures[0].result()).to_equal(5)
+
+    def test_runs_in_another_process(self):
+        executor = ProcessExecutor(self.io_loop, 2)
+
+        executor.run(self.stop, os.getpid)
+        future = self.wait()
+
+        expect(future.result()).not_to_equal(os.getpid())
+
+        executor.shutdown()
+
+    def test_keeps_errors_from_the_executed_method(self):
+        executor = ProcessExecutor(self.io_loop, 0)
+        futures = []
+
+        executor.run(futures.append, divide, 1, 0)
+
+        try:
+            futures[0].result()
+        except ZeroDivisionError:
+            pass
+        else:
+            assert False, 'Should not have got this far'
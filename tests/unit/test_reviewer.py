@@ -9,7 +9,9 @@ import requests
 from preggy import expect
 from mock import patch, Mock, call
 
-from holmes.reviewer import Reviewer, ReviewDAO
+from holmes.reviewer import Reviewer, ReviewDAO, InvalidReviewError
+from holmes.process_executor import ProcessExecutor
+from holmes.facters import Facter
 from holmes.config import Config
 from holmes.validators.base import Validator
 from tests.unit.base import ApiTestCase
@@ -231,3 +233,161 @@ class TestReview(ApiTestCase):
 
         reviewer = self.get_reviewer(page_url="http://g1.globo.com/index.html")
         expect(reviewer.is_root()).to_equal(False)
+
+    def get_concurrent_reviewer(self, facters=[], validators=[], process_executor=None):
+        requests = []
+
+        reviewer = Reviewer(
+            api_url=self.get_url('/'),
+            page_uuid=uuid4(),
+            page_url='http://page.url',
+            page_score=0.0,
+            config=Config(),
+            facters=facters,
+            validators=validators,
+            async_get=lambda url, handler, method='GET', **kw: requests.append((url, handler)),
+            complete_method=Mock(),
+            process_executor=process_executor
+        )
+
+        reviewer.save_request = Mock()
+        reviewer.save_review = Mock()
+
+        return reviewer, requests
+
+    def test_concurrent_review_steps_when_its_requests_finish(self):
+        class MockFacter(Facter):
+            def get_facts(self):
+                self.async_get('http://page.url/style.css', lambda url, response: None)
+
+        steps = []
+
+        class MockValidator(Validator):
+            def validate(self):
+                steps.append('validated')
+
+        reviewer, requests = self.get_concurrent_reviewer([MockFacter], [MockValidator])
+
+        reviewer.review()
+        expect(requests).to_length(1)
+
+        url, handler = requests.pop()
+        handler(url, Mock(status_code=200, text='<html></html>', headers={}))
+
+        expect(requests).to_length(1)
+        expect(steps).to_be_empty()
+        expect(reviewer.complete_method.called).to_be_false()
+
+        url, handler = requests.pop()
+        handler(url, Mock(status_code=200, text='', headers={}))
+
+        expect(steps).to_equal(['validated'])
+        expect(reviewer.save_review.call_count).to_equal(1)
+        reviewer.complete_method.assert_called_once_with(reviewer)
+
+    def test_concurrent_review_completes_with_error(self):
+        class MockFacter(Facter):
+            def get_facts(self):
+                raise InvalidReviewError('invalid page')
+
+        reviewer, requests = self.get_concurrent_reviewer([MockFacter])
+
+        reviewer.review()
+
+        url, handler = requests.pop()
+        handler(url, Mock(status_code=200, text='<html></html>', headers={}))
+
+        expect(reviewer.error).to_equal('invalid page')
+        expect(reviewer.save_review.called).to_be_false()
+        reviewer.complete_method.assert_called_once_with(reviewer)
+
+    def test_concurrent_review_waits_for_process_results(self):
+        class MockFacter(Facter):
+            def get_facts(self):
+                self.run_in_process(lambda size: self.add_fact('size', size), len, 'content')
+
+        runs = []
+        process_executor = Mock(run=lambda callback, method, *args: runs.append((callback, method, args)))
+
+        reviewer, requests = self.get_concurrent_reviewer([MockFacter], process_executor=process_executor)
+
+        reviewer.review()
+
+        url, handler = requests.pop()
+        handler(url, Mock(status_code=200, text='<html></html>', headers={}))
+
+        expect(runs).to_length(1)
+        expect(reviewer.save_review.called).to_be_false()
+
+        callback, method, args = runs.pop()
+        callback(Mock(result=Mock(return_value=method(*args))))
+
+        expect(reviewer.review_dao.facts['size']['value']).to_equal(7)
+        expect(reviewer.save_review.call_count).to_equal(1)
+        reviewer.complete_method.assert_called_once_with(reviewer)
+
+    def test_concurrent_review_saves_after_validators_run_in_an_inline_pool(self):
+        class MockValidator(Validator):
+            def validate(self):
+                self.run_in_process(lambda size: self.add_fact('size', size), len, 'content')
+
+        process_executor = ProcessExecutor(None, 0)
+        reviewer, requests = self.get_concurrent_reviewer(validators=[MockValidator], process_executor=process_executor)
+
+        reviewer.review()
+
+        url, handler = requests.pop()
+        handler(url, Mock(status_code=200, text='<html></html>', headers={}))
+
+        expect(reviewer.review_dao.facts['size']['value']).to_equal(7)
+        expect(reviewer.save_review.call_count).to_equal(1)
+        expect(reviewer.error).to_be_null()
+        reviewer.complete_method.assert_called_once_with(reviewer)
+
+    @patch('holmes.reviewer.Page.add_page')
+    def test_concurrent_review_waits_for_enqueued_pages(self, add_page_mock):
+        class MockValidator(Validator):
+            def validate(self):
+                self.enqueue([('http://page.url/other/', 1.0)])
+
+        reviewer, requests = self.get_concurrent_reviewer(validators=[MockValidator])
+
+        add_page_mock.side_effect = lambda db, cache, url, score, fetch, *args: fetch(url, lambda url, response: None)
+
+        reviewer.review()
+
+        url, handler = requests.pop()
+        handler(url, Mock(status_code=200, text='<html></html>', headers={}))
+
+        expect(requests).to_length(1)
+        expect(reviewer.save_review.called).to_be_false()
+        expect(reviewer.complete_method.called).to_be_false()
+
+        url, handler = requests.pop()
+        handler(url, Mock(status_code=200, text='', headers={}))
+
+        expect(reviewer.save_review.call_count).to_equal(1)
+        reviewer.complete_method.assert_called_once_with(reviewer)
+
+    def test_runs_in_process_inline_when_not_concurrent(self):
+        reviewer = self.get_reviewer()
+        results = []
+
+        reviewer.run_in_process(results.append, len, 'content')
+
+        expect(results).to_equal([7])
+
+    def test_concurrent_step_leaves_nothing_pending_in_the_shared_session(self):
+        reviewer, requests = self.get_concurrent_reviewer()
+        added = Mock()
+        reviewer.db = Mock(new=[added], dirty=[], deleted=[])
+
+        reviewer.run_step(lambda: None)
+        expect(reviewer.db.flush.call_count).to_equal(1)
+
+        def fail():
+            raise InvalidReviewError('invalid page')
+
+        reviewer.run_step(fail)
+        reviewer.db.expunge.assert_called_once_with(added)
+        expect(reviewer.error).to_equal('invalid page')
@@ -2,11 +2,13 @@
 # -*- coding: utf-8 -*-
 
 from unittest import TestCase
+from datetime import datetime, date
 
 from preggy import expect
 
 from holmes.utils import (
-    get_domain_from_url, get_class, load_classes, get_status_code_title
+    get_domain_from_url, get_class, load_classes, get_status_code_title,
+    encode_cursor, decode_cursor, get_url_path, get_like_prefix
 )
 
 
@@ -86,6 +88,18 @@ class TestUtils(TestCase):
         expect(domain).to_equal('localhost')
         expect(url).to_equal('http://localhost')
 
+    def test_can_get_url_path(self):
+        expect(get_url_path('http://globo.com/esportes/index.html?a=1')).to_equal('esportes/index.html?a=1')
+        expect(get_url_path('https://www.globo.com:8080/esportes/')).to_equal('esportes/')
+        expect(get_url_path('globo.com/esportes')).to_equal('esportes')
+        expect(get_url_path('http://globo.com')).to_equal('')
+        expect(get_url_path(None)).to_equal('')
+
+    def test_can_get_like_prefix(self):
+        expect(get_like_prefix('esportes/')).to_equal('esportes/%')
+        expect(get_like_prefix('my_page%')).to_equal('my\\_page\\%%')
+        expect(get_like_prefix('a\\b')).to_equal('a\\\\b%')
+
     def test_can_get_class(self):
         from Queue import Queue
 
@@ -124,3 +138,15 @@ class TestUtils(TestCase):
 
         title = get_status_code_title(120)
         expect(title).to_equal('Unknown')
+
+    def test_can_encode_and_decode_cursor(self):
+        values = (datetime(2014, 4, 7, 10, 11, 12), date(2014, 4, 7), 0.1 + 0.2, 10, 'value')
+
+        cursor = encode_cursor(*values)
+
+        expect(decode_cursor(cursor)).to_equal(values)
+
+    def test_decode_invalid_cursor(self):
+        expect(decode_cursor(None)).to_be_null()
+        expect(decode_cursor('')).to_be_null()
+        expect(decode_cursor('invalid cursor')).to_be_null()
@@ -77,3 +77,22 @@ class WorkerTestCase(ApiTestCase):
         worker = HolmesWorker(['-c', join(self.root_path, 'tests/unit/test_worker.conf')])
 
         expect(worker.get_config_class()).to_equal(Config)
+
+    def test_start_reviews_runs_up_to_the_concurrent_reviews(self):
+        worker = HolmesWorker(['-c', join(self.root_path, 'tests/unit/test_worker.conf')])
+        worker.config = Config(WORKER_CONCURRENT_REVIEWS=2)
+        worker.reviewers = set()
+
+        worker._ping_api = Mock(return_value=True)
+        worker._start_job = Mock(return_value=True)
+        worker._load_next_job = Mock(side_effect=[
+            {'url': 'http://globo.com/'},
+            {'url': 'http://g1.globo.com/'},
+            {'url': 'http://globoesporte.com/'},
+        ])
+        worker._start_concurrent_reviewer = lambda job: worker.reviewers.add(job['url'])
+
+        worker._start_reviews()
+
+        expect(worker.reviewers).to_equal(set(['http://globo.com/', 'http://g1.globo.com/']))
+        expect(worker._load_next_job.call_count).to_equal(2)